@@ -0,0 +1,131 @@
+"""Benchmark the scoring engine's per-participant loads and graph alignment against the old loops.
+
+Run from the repo root:  python -m benchmarks.bench_competition_scoring
+"""
+import datetime
+import random
+import sys
+import time
+
+import config
+from models.user_stats import UserStats
+from utils.scoring import ParticipantSeries
+from utils.standings import build_progress_data
+from utils.vector_scoring import align_points
+
+def generate(participants=100, days=365, seed=42):
+    """Synthetic competition with a reading on ~80% of days per participant"""
+    rng = random.Random(seed)
+    start = datetime.date(2024, 1, 1)
+    dates = [(start + datetime.timedelta(days=i)).isoformat() for i in range(days)]
+    competition = {
+        'start_date': dates[0],
+        'end_date': dates[-1],
+        'participants': {},
+        'creator': '0'
+    }
+    health_data = {}
+    for p in range(participants):
+        user_id = str(100000000000000000 + p)
+        initial = {
+            'weight': rng.uniform(140, 240),
+            'body_fat': rng.uniform(12, 40),
+            'muscle_mass': rng.uniform(80, 150),
+            'bmr': rng.uniform(1300, 2200)
+        }
+        competition['participants'][user_id] = initial
+        health_data[user_id] = {
+            date: {metric: value * rng.uniform(0.95, 1.05) for metric, value in initial.items()}
+            for date in dates if rng.random() < 0.8
+        }
+    return competition, health_data
+
+def legacy_scoring(competition, health_data):
+    """The scoring loop /compstatus used to run"""
+    start_date = datetime.datetime.strptime(competition['start_date'], '%Y-%m-%d')
+    end_date = datetime.datetime.strptime(competition['end_date'], '%Y-%m-%d')
+    current_date = datetime.datetime.now()
+    progress_data = {}
+    for user_id, initial_stats in competition['participants'].items():
+        progress_data[user_id] = {'dates': [], 'points': [], 'body_fat_points': [],
+                                  'muscle_mass_points': [], 'bmr_points': []}
+        for date_str, daily_stats in sorted(health_data.get(user_id, {}).items()):
+            date = datetime.datetime.strptime(date_str, '%Y-%m-%d')
+            if date < start_date or date > min(end_date, current_date):
+                continue
+            bf_points = (initial_stats['body_fat'] - daily_stats['body_fat']) / initial_stats['body_fat'] * 100 * config.BF_POINTS_MULTIPLIER
+            mm_points = ((daily_stats['muscle_mass'] / initial_stats['muscle_mass'] * 100) - 100) * config.MM_POINTS_MULTIPLIER
+            bmr_points = ((daily_stats['bmr'] / initial_stats['bmr'] * 100) - 100) * config.BMR_POINTS_MULTIPLIER
+            progress_data[user_id]['dates'].append(date_str)
+            progress_data[user_id]['points'].append(bf_points + mm_points + bmr_points)
+            progress_data[user_id]['body_fat_points'].append(bf_points)
+            progress_data[user_id]['muscle_mass_points'].append(mm_points)
+            progress_data[user_id]['bmr_points'].append(bmr_points)
+    return progress_data
+
+def legacy_alignment(progress_data):
+    """The timeline alignment create_competition_graph used to run"""
+    all_dates = set()
+    for user_id in progress_data:
+        all_dates.update(progress_data[user_id]['dates'])
+    all_dates = sorted(list(all_dates))
+    aligned = {}
+    for user_id in progress_data:
+        complete_points = []
+        last_valid_point = 0
+        for date in all_dates:
+            if date in progress_data[user_id]['dates']:
+                idx = progress_data[user_id]['dates'].index(date)
+                last_valid_point = progress_data[user_id]['points'][idx]
+            complete_points.append(last_valid_point)
+        aligned[user_id] = complete_points
+    return all_dates, aligned
+
+def engine_scoring(competition, health_data):
+    """What ScoringEngine builds for a competition: one vectorized load per participant"""
+    start_date = competition['start_date']
+    end_date = competition['end_date']
+    series = {}
+    for user_id, initial_stats in competition['participants'].items():
+        participant = ParticipantSeries(UserStats.from_dict(initial_stats))
+        participant.load({
+            date: stats for date, stats in health_data.get(user_id, {}).items()
+            if start_date <= date <= end_date
+        })
+        series[user_id] = participant
+    return series
+
+def timed(func, *args, repeat=3):
+    best = float('inf')
+    result = None
+    for _ in range(repeat):
+        start = time.perf_counter()
+        result = func(*args)
+        best = min(best, time.perf_counter() - start)
+    return best, result
+
+def main(participants=100, days=365):
+    competition, health_data = generate(participants, days)
+    print(f"{participants} participants x {days} days")
+
+    legacy_score_time, progress_data = timed(legacy_scoring, competition, health_data)
+    legacy_align_time, (legacy_dates, legacy_aligned) = timed(legacy_alignment, progress_data, repeat=1)
+    vector_score_time, series = timed(engine_scoring, competition, health_data)
+    engine_progress = build_progress_data(series, competition['end_date'])
+    vector_align_time, (dates, user_ids, aligned) = timed(align_points, engine_progress)
+
+    # Sanity check: both paths must agree
+    for user_id, legacy in progress_data.items():
+        assert engine_progress[user_id]['dates'] == legacy['dates']
+        for key in ('points', 'body_fat_points', 'muscle_mass_points', 'bmr_points'):
+            assert max((abs(a - b) for a, b in zip(engine_progress[user_id][key], legacy[key])), default=0) < 1e-9
+    assert dates == legacy_dates
+    for col, user_id in enumerate(user_ids):
+        assert max(abs(a - b) for a, b in zip(aligned[:, col], legacy_aligned[user_id])) < 1e-9
+
+    print(f"scoring:   legacy {legacy_score_time * 1000:9.1f} ms   engine     {vector_score_time * 1000:9.1f} ms")
+    print(f"alignment: legacy {legacy_align_time * 1000:9.1f} ms   vectorized {vector_align_time * 1000:9.1f} ms")
+
+if __name__ == "__main__":
+    args = [int(a) for a in sys.argv[1:3]]
+    main(*args)
@@ -0,0 +1,71 @@
+"""Offline stand-ins for the discord objects the cogs touch."""
+
+class FakeUser:
+    def __init__(self, user_id, name=None):
+        self.id = int(user_id)
+        self.name = name or f"user{str(user_id)[-4:]}"
+        self.display_name = self.name
+
+class FakeResponse:
+    def __init__(self, sent):
+        self._sent = sent
+        self._done = False
+
+    def is_done(self):
+        return self._done
+
+    async def send_message(self, content=None, **kwargs):
+        self._done = True
+        self._sent.append(('send_message', content, kwargs))
+
+    async def defer(self, **kwargs):
+        self._done = True
+        self._sent.append(('defer', None, kwargs))
+
+    async def edit_message(self, **kwargs):
+        self._sent.append(('edit_message', None, kwargs))
+
+class FakeMessage:
+    def __init__(self, sent):
+        self._sent = sent
+
+    async def edit(self, **kwargs):
+        self._sent.append(('edit', None, kwargs))
+
+class FakeFollowup:
+    def __init__(self, sent):
+        self._sent = sent
+
+    async def send(self, content=None, **kwargs):
+        self._sent.append(('followup', content, kwargs))
+        return FakeMessage(self._sent)
+
+class FakeInteraction:
+    """Records everything a command sends instead of talking to Discord"""
+    def __init__(self, user_id, guild=None):
+        self.sent = []
+        self.user = FakeUser(user_id)
+        self.guild = guild
+        self.response = FakeResponse(self.sent)
+        self.followup = FakeFollowup(self.sent)
+
+    async def edit_original_response(self, **kwargs):
+        self.sent.append(('edit_original_response', None, kwargs))
+
+    async def original_response(self):
+        return FakeMessage(self.sent)
+
+class FakeBot:
+    """Enough of commands.Bot for the cogs; user lookups never hit the network"""
+    def __init__(self):
+        self.guilds = []
+        self.owner_id = 0
+
+    def get_user(self, user_id):
+        return None
+
+    async def fetch_user(self, user_id):
+        return FakeUser(user_id)
+
+    async def is_owner(self, user):
+        return user.id == self.owner_id
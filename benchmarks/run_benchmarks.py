@@ -0,0 +1,175 @@
+"""Benchmark data loading, scoring and rendering against synthetic data.
+
+Runs fully offline. Results are written as JSON so runs can be compared:
+
+    python -m benchmarks.run_benchmarks --scales 100x90x5,1000x365x20 --out bench.json
+"""
+import argparse
+import asyncio
+import datetime
+import json
+import os
+import platform
+import shutil
+import tempfile
+import time
+
+import config
+from benchmarks.synthetic import generate_dataset
+from benchmarks.fakes import FakeBot, FakeInteraction
+
+DEFAULT_SCALES = "100x90x5,1000x180x20,5000x365x50"
+
+def parse_scales(text):
+    scales = []
+    for part in text.split(','):
+        users, days, comps = (int(x) for x in part.lower().split('x'))
+        scales.append((users, days, comps))
+    return scales
+
+def timed(func, repeat):
+    """Best and mean wall time of `func()` over `repeat` runs, in ms"""
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {'best_ms': min(samples), 'mean_ms': sum(samples) / len(samples), 'runs': repeat}
+
+async def timed_async(func, repeat):
+    samples = []
+    for _ in range(repeat):
+        start = time.perf_counter()
+        await func()
+        samples.append((time.perf_counter() - start) * 1000)
+    return {'best_ms': min(samples), 'mean_ms': sum(samples) / len(samples), 'runs': repeat}
+
+def point_config_at(directory):
+    """Redirect every data file the bot uses into a scratch directory"""
+    for key in dir(config):
+        value = getattr(config, key)
+        if key.endswith(('_PATH', '_DIR')) and isinstance(value, str) and value.startswith('data/'):
+            setattr(config, key, os.path.join(directory, value[len('data/'):]))
+
+def write_dataset(health_data, competitions):
+    with open(config.HEALTH_DATA_PATH, 'w') as f:
+        json.dump(health_data, f, indent=2)
+    with open(config.COMPETITIONS_PATH, 'w') as f:
+        json.dump(competitions, f, indent=2)
+
+async def bench_scale(users, days, comps, repeat):
+    from utils import data_manager
+    from utils.scoring import ScoringEngine
+    from utils.repository import get_competition_repository
+    from utils.render_cache import get_render_cache
+    from utils.visualization import create_personal_progress_graph, create_competition_graph
+    from utils.standings import build_progress_data
+    from cogs.competition_commands import CompetitionCommands
+
+    result = {'users': users, 'days': days, 'competitions': comps}
+    start = time.perf_counter()
+    health_data, competitions = generate_dataset(users, days, comps)
+    result['generate_ms'] = (time.perf_counter() - start) * 1000
+    write_dataset(health_data, competitions)
+    result['health_file_bytes'] = os.path.getsize(config.HEALTH_DATA_PATH)
+    data_manager.invalidate_caches()
+
+    def cold_load():
+        data_manager.invalidate_caches()
+        data_manager.load_health_data()
+    result['load_health_data_cold'] = timed(cold_load, repeat)
+    result['load_health_data_cached'] = timed(data_manager.load_health_data, repeat)
+
+    def save():
+        data_manager.save_health_data(data_manager.load_health_data())
+        data_manager.flush_sync()
+    result['save_health_data'] = timed(save, repeat)
+
+    # The same readings in the memory-mapped binary format
+    from utils.binary_store import HealthReadings, write_binary
+    write_binary(data_manager.load_health_data())
+    result['binary_file_bytes'] = os.path.getsize(config.HEALTH_BINARY_PATH)
+    def binary_open():
+        with HealthReadings() as readings:
+            readings.columns(next(iter(health_data)))
+    result['binary_open_and_read_user'] = timed(binary_open, repeat)
+
+    # Pick the competition with the most participants for scoring/rendering
+    name = max(competitions, key=lambda n: len(competitions[n]['participants']))
+    competition = get_competition_repository().get(name)
+    result['scored_competition'] = {'name': name, 'participants': len(competition.participants)}
+
+    result['scoring_build'] = timed(lambda: ScoringEngine().get_competition_series(competition), repeat)
+
+    # Full /compstatus path through the cog with a fake interaction
+    cog = CompetitionCommands(FakeBot())
+    async def compstatus():
+        get_render_cache().clear()
+        interaction = FakeInteraction(competition.creator)
+        await cog.compstatus.callback(cog, interaction, name)
+    result['compstatus_command'] = await timed_async(compstatus, repeat)
+
+    user_id = max(health_data, key=lambda u: len(health_data[u]))
+    result['personal_graph'] = timed(
+        lambda: create_personal_progress_graph(user_id, 'bench', health_data, show_weight=True, show_body_fat=True,
+                                               show_muscle_mass=True, show_bmr=True),
+        repeat
+    )
+
+    series = ScoringEngine().get_competition_series(competition)
+    progress_data = build_progress_data(series, datetime.date.today().isoformat())
+    user_names = {u: f"user{u[-4:]}" for u in progress_data}
+    result['competition_graph'] = timed(lambda: create_competition_graph(name, progress_data, user_names), repeat)
+    return result
+
+async def run(scales, repeat):
+    from utils.render_service import get_render_service
+    results = []
+    try:
+        for users, days, comps in scales:
+            print(f"Benchmarking {users} users x {days} days x {comps} competitions...")
+            results.append(await bench_scale(users, days, comps, repeat))
+    finally:
+        get_render_service().shutdown()
+    return results
+
+def main():
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument('--scales', default=DEFAULT_SCALES, help="Comma-separated USERSxDAYSxCOMPETITIONS")
+    parser.add_argument('--repeat', type=int, default=3)
+    parser.add_argument('--out', default=None, help="JSON output path (default: benchmarks/results/<timestamp>.json)")
+    args = parser.parse_args()
+
+    workdir = tempfile.mkdtemp(prefix='bot-bench-')
+    point_config_at(workdir)
+    # Write saves straight through so timings measure the write itself
+    config.SAVE_DEBOUNCE_SECONDS = 0
+    try:
+        results = asyncio.run(run(parse_scales(args.scales), args.repeat))
+    finally:
+        shutil.rmtree(workdir, ignore_errors=True)
+
+    report = {
+        'timestamp': datetime.datetime.now().isoformat(timespec='seconds'),
+        'python': platform.python_version(),
+        'machine': platform.machine(),
+        'storage_backend': config.STORAGE_BACKEND,
+        'results': results
+    }
+    out = args.out
+    if out is None:
+        os.makedirs(os.path.join('benchmarks', 'results'), exist_ok=True)
+        out = os.path.join('benchmarks', 'results', datetime.datetime.now().strftime('%Y%m%d-%H%M%S') + '.json')
+    with open(out, 'w') as f:
+        json.dump(report, f, indent=2)
+
+    for r in results:
+        print(f"\n{r['users']} users x {r['days']} days x {r['competitions']} competitions "
+              f"({r['health_file_bytes'] / 1e6:.1f} MB)")
+        for key, value in r.items():
+            if isinstance(value, dict) and 'best_ms' in value:
+                print(f"  {key:28s} best {value['best_ms']:9.1f} ms   mean {value['mean_ms']:9.1f} ms")
+    print(f"\nWrote {out}")
+
+if __name__ == "__main__":
+    main()
@@ -0,0 +1,54 @@
+"""Deterministic synthetic data in the bot's JSON schema."""
+import datetime
+import random
+
+def generate_dataset(users, days, competitions, seed=1234, end=None):
+    """Build (health_data, competitions) for `users` x `days` x `competitions`.
+
+    Every user logs on roughly 85% of the `days` days ending at `end` (today by
+    default). Competitions span random windows in that range, the most recent
+    ones still running, with 2-50 participants each.
+    """
+    rng = random.Random(seed)
+    end = end or datetime.date.today()
+    dates = [(end - datetime.timedelta(days=days - 1 - i)).isoformat() for i in range(days)]
+    user_ids = [str(200000000000000000 + i) for i in range(users)]
+
+    health_data = {}
+    baselines = {}
+    for user_id in user_ids:
+        base = {
+            'weight': round(rng.uniform(120, 260), 1),
+            'body_fat': round(rng.uniform(10, 42), 1),
+            'muscle_mass': round(rng.uniform(70, 160), 1),
+            'bmr': float(rng.randint(1200, 2400))
+        }
+        baselines[user_id] = base
+        history = {}
+        drift = rng.uniform(-0.0005, 0.0005)
+        for i, date in enumerate(dates):
+            if rng.random() > 0.85:
+                continue
+            factor = 1 + drift * i
+            history[date] = {
+                'weight': round(base['weight'] * factor * rng.uniform(0.99, 1.01), 1),
+                'body_fat': round(base['body_fat'] * factor * rng.uniform(0.98, 1.02), 1),
+                'muscle_mass': round(base['muscle_mass'] / factor * rng.uniform(0.99, 1.01), 1),
+                'bmr': float(round(base['bmr'] / factor * rng.uniform(0.99, 1.01)))
+            }
+        health_data[user_id] = history
+
+    comps = {}
+    for c in range(competitions):
+        length = rng.randint(min(14, days), max(min(14, days), min(120, days)))
+        start_index = rng.randint(0, max(0, days - length))
+        start_date = dates[start_index]
+        end_date = (datetime.date.fromisoformat(start_date) + datetime.timedelta(days=length)).isoformat()
+        members = rng.sample(user_ids, min(len(user_ids), rng.randint(2, 50)))
+        comps[f"Competition {c:04d}"] = {
+            'start_date': start_date,
+            'end_date': end_date,
+            'participants': {user_id: dict(baselines[user_id]) for user_id in members},
+            'creator': members[0]
+        }
+    return health_data, comps
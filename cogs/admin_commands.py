@@ -0,0 +1,109 @@
+import discord
+from discord import app_commands
+from discord.ext import commands
+import datetime
+from typing import List, Optional
+
+from utils.metrics import get_metrics, cache_stats, instrumented, phase
+from utils.repository import get_competition_repository
+from utils.competition_index import get_competition_index
+from utils.scoring import get_scoring_engine
+from utils.user_resolver import get_username_resolver
+from utils.export import (
+    FORMAT_CHOICES, COMPETITION_FIELDS, competition_rows, iter_export_parts, send_export, upload_limit, export_file_name
+)
+
+class AdminCommands(commands.Cog):
+    def __init__(self, bot):
+        self.bot = bot
+
+    async def is_admin(self, interaction: discord.Interaction) -> bool:
+        """The bot owner, or a member who can manage the server"""
+        if await self.bot.is_owner(interaction.user):
+            return True
+        permissions = getattr(interaction.user, 'guild_permissions', None)
+        return interaction.guild is not None and permissions is not None and permissions.manage_guild
+
+    @app_commands.command(name="botmetrics", description="Show command latency metrics (bot owner only)")
+    async def botmetrics(self, interaction: discord.Interaction):
+        if not await self.bot.is_owner(interaction.user):
+            await interaction.response.send_message("Only the bot owner can use this command.", ephemeral=True)
+            return
+
+        metrics = get_metrics()
+        summary = metrics.summary()
+        if not summary:
+            await interaction.response.send_message("No commands have run yet.", ephemeral=True)
+            return
+
+        started = datetime.datetime.fromtimestamp(metrics.started).strftime('%Y-%m-%d %H:%M')
+        embed = discord.Embed(title="Command Metrics", description=f"Since {started} (times in ms)")
+        # Discord allows at most 25 fields per embed; the last is for the caches
+        for command, entry in list(summary.items())[:24]:
+            rows = [f"{'phase':<15}{'n':>6}{'p50':>8}{'p95':>8}{'p99':>8}"]
+            # Total first, then the individual phases
+            phases = sorted(entry['phases'].items(), key=lambda item: item[0] != 'total')
+            for name, stats in phases:
+                rows.append(
+                    f"{name[:14]:<15}{stats['count']:>6}"
+                    f"{stats['p50'] * 1000:>8.1f}{stats['p95'] * 1000:>8.1f}{stats['p99'] * 1000:>8.1f}"
+                )
+            embed.add_field(
+                name=f"/{command}: {entry['calls']} calls, {entry['errors']} errors",
+                value="```\n" + "\n".join(rows) + "\n```",
+                inline=False
+            )
+        rows = []
+        for cache, counters in cache_stats().items():
+            values = ", ".join(
+                f"{name}={value:.2f}" if isinstance(value, float) else f"{name}={value}"
+                for name, value in counters.items()
+            )
+            rows.append(f"{cache}: {values}")
+        embed.add_field(name="Caches", value="\n".join(rows)[:1024], inline=False)
+        await interaction.response.send_message(embed=embed, ephemeral=True)
+
+    async def comp_name_autocomplete(self, interaction: discord.Interaction, current: str) -> List[app_commands.Choice[str]]:
+        competitions = get_competition_index().search(current, limit=25)  # Discord limits to 25 choices
+        return [app_commands.Choice(name=comp, value=comp) for comp in competitions]
+
+    @app_commands.command(name="exportcomp", description="Download every participant's readings and points (admins only)")
+    @app_commands.describe(name="Name of the competition", format="File format (default: CSV)")
+    @app_commands.autocomplete(name=comp_name_autocomplete)
+    @app_commands.choices(format=[app_commands.Choice(name=label, value=value) for label, value in FORMAT_CHOICES])
+    @instrumented
+    async def exportcomp(self, interaction: discord.Interaction, name: str,
+                         format: Optional[app_commands.Choice[str]] = None):
+        with phase('defer'):
+            await interaction.response.defer(thinking=True, ephemeral=True)
+        if not await self.is_admin(interaction):
+            await interaction.followup.send("Only the bot owner or server managers can use this command.")
+            return
+        fmt = format.value if format else 'csv'
+
+        with phase('load'):
+            competition = get_competition_repository().get(name)
+        if competition is None:
+            await interaction.followup.send(f"Competition '{name}' doesn't exist!")
+            return
+
+        # Readings inside the competition window with the points each one earned, capped at today
+        with phase('scoring'):
+            series = get_scoring_engine().get_competition_series(competition)
+        with phase('resolve_names'):
+            user_names = await get_username_resolver(self.bot).resolve(competition.participants, interaction.guild)
+
+        today = datetime.date.today().isoformat()
+        parts = iter_export_parts(
+            competition_rows(series, user_names, today), COMPETITION_FIELDS, fmt,
+            export_file_name('competition', name), upload_limit(interaction.guild)
+        )
+        with phase('send'):
+            await send_export(
+                interaction, parts,
+                f"Export of '{name}' ({competition.start_date} to {competition.end_date}, "
+                f"{len(competition.participants)} participants):"
+            )
+
+async def setup(bot):
+    await bot.add_cog(AdminCommands(bot))
@@ -2,18 +2,33 @@ import discord
 from discord import app_commands
 from discord.ext import commands
 import datetime
-from typing import Optional, Dict, List
+import asyncio
+from typing import Optional, List
 import io
-import numpy as np
+import math
 
-from utils.data_manager import (
-    load_health_data, save_health_data, 
-    load_competitions, save_competitions,
-    get_competition_choices
+from utils.data_manager import get_user_version, get_competition_version
+from utils.repository import get_competition_repository
+from models.competition import Competition, CompetitionParticipant
+from models.user_stats import UserStats
+from utils.scoring import get_scoring_engine
+from utils.standings import (
+    build_progress_data, has_progress, count_with_data,
+    rank_standings, format_standings, format_participant_details
 )
-from utils.visualization import create_competition_graph
+from utils.pagination import LazyPaginator
+from utils.scheduler import get_competition_scheduler
+from utils.user_resolver import get_username_resolver
+from utils.competition_index import get_competition_index
+from utils.leaderboard import get_leaderboard
+from utils.visualization import render_competition_png
+from utils.render_service import RenderError
+from utils.render_cache import get_render_cache, render_cached
+from utils.metrics import instrumented, phase
 import config
 
+LEADERBOARD_CHOICES = [('Points', 'points'), ('Wins', 'wins'), ('Podiums', 'podiums')]
+
 class CompetitionCommands(commands.Cog):
     def __init__(self, bot):
         self.bot = bot
@@ -27,39 +42,43 @@ class CompetitionCommands(commands.Cog):
         muscle_mass="Your starting muscle mass",
         bmr="Your starting BMR"
     )
+    @instrumented
     async def startcomp(self, interaction: discord.Interaction, name: str, end_date: str,
                         weight: float, body_fat: float, muscle_mass: float, bmr: float):
+        # Points are relative changes, so the starting stats must be positive
+        if min(weight, body_fat, muscle_mass, bmr) <= 0:
+            await interaction.response.send_message("Starting stats must all be greater than zero.")
+            return
+
         # Check to make sure the comp ends in the future & date format is good
+        user_id = str(interaction.user.id)
         try:
-            end_datetime = datetime.datetime.strptime(end_date, '%Y-%m-%d')
-            if end_datetime < datetime.datetime.now():
-                await interaction.response.send_message("End date must be in the future!")
-                return
+            competition = Competition(
+                name=name,
+                start_date=datetime.date.today().isoformat(),
+                end_date=end_date,
+                creator=user_id,
+                participants={
+                    user_id: CompetitionParticipant(user_id, UserStats(weight, body_fat, muscle_mass, bmr))
+                }
+            )
         except ValueError:
             await interaction.response.send_message("Invalid date format. Use YYYY-MM-DD")
             return
+        if competition.end <= datetime.date.today():
+            await interaction.response.send_message("End date must be in the future!")
+            return
         
-        comps = load_competitions()
-        if name in comps:
+        repository = get_competition_repository()
+        if repository.get(name) is not None:
             await interaction.response.send_message(f"Competition '{name}' already exists!")
             return
         
-        user_id = str(interaction.user.id)
-        comps[name] = {
-            'start_date': datetime.datetime.now().strftime('%Y-%m-%d'),
-            'end_date': end_date,
-            'participants': {
-                user_id: {
-                    'weight': weight,
-                    'body_fat': body_fat,
-                    'muscle_mass': muscle_mass,
-                    'bmr': bmr
-                }
-            },
-            'creator': user_id
-        }
-        
-        save_competitions(comps)
+        with phase('save'):
+            repository.create(competition)
+            get_competition_index().add(name, end_date)
+            get_competition_scheduler(self.bot).schedule(competition)
+            get_leaderboard().competition_changed(name)
         await interaction.response.send_message(
             f"Competition '{name}' created! Others can join using /joincomp {name}"
         )
@@ -72,212 +91,281 @@ class CompetitionCommands(commands.Cog):
         muscle_mass="Your starting muscle mass",
         bmr="Your starting BMR"
     )
+    @instrumented
     async def joincomp(self, interaction: discord.Interaction, name: str,
                         weight: float, body_fat: float, muscle_mass: float, bmr: float):
         user_id = str(interaction.user.id)
+
+        # Points are relative changes, so the starting stats must be positive
+        if min(weight, body_fat, muscle_mass, bmr) <= 0:
+            await interaction.response.send_message("Starting stats must all be greater than zero.")
+            return
         
-        # Load competitions data
-        competitions = load_competitions()
+        # Load competition data
+        repository = get_competition_repository()
+        with phase('load'):
+            competition = repository.get(name)
         
         # Check if competition exists
-        if name not in competitions:
+        if competition is None:
             await interaction.response.send_message(f"Competition '{name}' doesn't exist!")
             return
         
         # Check if user is already in competition
-        if user_id in competitions[name]['participants']:
+        if user_id in competition.participants:
             await interaction.response.send_message("You're already in this competition!")
             return
         
         # Check if competition end date has passed
-        end_date = datetime.datetime.strptime(competitions[name]['end_date'], '%Y-%m-%d')
-        if end_date < datetime.datetime.now():
+        if competition.has_ended():
             await interaction.response.send_message("This competition has already ended!")
             return
             
         # Add user to competition with their stats
-        competitions[name]['participants'][user_id] = {
-            'weight': weight,
-            'body_fat': body_fat,
-            'muscle_mass': muscle_mass,
-            'bmr': bmr
-        }
-        save_competitions(competitions)
+        with phase('save'):
+            repository.add_participant(competition, user_id, UserStats(weight, body_fat, muscle_mass, bmr))
+            get_render_cache().invalidate_competition(name)
+            get_leaderboard().competition_changed(name)
         
         await interaction.response.send_message(f"You've successfully joined '{name}'!")
 
     @app_commands.command(name="listcomps", description="List all active competitions")
+    @instrumented
     async def listcomps(self, interaction: discord.Interaction):
-        competitions = load_competitions()
-        if not competitions:
+        # The scheduler keeps end-date-sorted indexes of running and finished competitions
+        scheduler = get_competition_scheduler(self.bot)
+        active_count = scheduler.active_count()
+        past_count = scheduler.finished_count()
+        if not active_count and not past_count:
             await interaction.response.send_message("No active competitions found!")
             return
         
-        now = datetime.datetime.now()
-        active_comps = []
-        past_comps = []
-        
-        for name, data in competitions.items():
-            end_date = datetime.datetime.strptime(data['end_date'], '%Y-%m-%d')
-            participants = len(data['participants'])
-            
-            comp_info = f"**{name}**: {participants} participants, ends {data['end_date']}"
-            
-            if end_date > now:
-                active_comps.append(comp_info)
+        repository = get_competition_repository()
+        page_size = config.LIST_PAGE_SIZE
+        active_pages = max(1, math.ceil(active_count / page_size))
+        past_pages = max(1, math.ceil(past_count / page_size))
+
+        def build_page(index):
+            # Only the competitions on this page are looked up and formatted
+            if index < active_pages:
+                title = "Active Competitions"
+                names = scheduler.active_slice(index * page_size, (index + 1) * page_size)
             else:
-                past_comps.append(comp_info)
+                index -= active_pages
+                title = "Past Competitions"
+                names = scheduler.finished_slice(index * page_size, (index + 1) * page_size)
+            lines = []
+            for name in names:
+                competition = repository.get(name)
+                if competition is None:
+                    continue
+                participants = len(competition.participants)
+                lines.append(f"**{name}**: {participants} participants, ends {competition.end_date}")
+            return discord.Embed(title=title, description="\n".join(lines) or "None")
         
-        message = "**Active Competitions:**\n"
-        if active_comps:
-            message += "\n".join(active_comps)
-        else:
-            message += "None\n"
-        
-        message += "\n**Past Competitions:**\n"
-        if past_comps:
-            message += "\n".join(past_comps)
-        else:
-            message += "None"
-        
-        await interaction.response.send_message(message)
+        view = LazyPaginator(active_pages + past_pages, build_page, owner_id=interaction.user.id)
+        with phase('send'):
+            await interaction.response.send_message(**view.send_kwargs())
 
     # The autocomplete function for competition names
     async def comp_name_autocomplete(self, interaction: discord.Interaction, current: str) -> List[app_commands.Choice[str]]:
-        competitions = get_competition_choices()
-        return [
-            app_commands.Choice(name=comp, value=comp)
-            for comp in competitions if current.lower() in comp.lower()
-        ][:25]  # Discord limits to 25 choices
+        competitions = get_competition_index().search(current, limit=25)  # Discord limits to 25 choices
+        return [app_commands.Choice(name=comp, value=comp) for comp in competitions]
             
     @app_commands.command(name="compstatus", description="Show competition progress")
     @app_commands.describe(name="Name of the competition")
     @app_commands.autocomplete(name=comp_name_autocomplete)
+    @instrumented
     async def compstatus(self, interaction: discord.Interaction, name: str):
-        # Load competitions and health data
-        competitions = load_competitions()
-        health_data = load_health_data()
+        # Acknowledge right away; everything below is delivered as follow-ups
+        with phase('defer'):
+            await interaction.response.defer(thinking=True)
+
+        # Load the competition
+        with phase('load'):
+            competition = get_competition_repository().get(name)
         
         # Check if competition exists
-        if name not in competitions:
-            await interaction.response.send_message(f"Competition '{name}' doesn't exist!")
+        if competition is None:
+            await interaction.followup.send(f"Competition '{name}' doesn't exist!")
             return
-            
-        competition = competitions[name]
-        start_date = datetime.datetime.strptime(competition['start_date'], '%Y-%m-%d')
-        end_date = datetime.datetime.strptime(competition['end_date'], '%Y-%m-%d')
-        current_date = datetime.datetime.now()
         
-        if current_date < start_date:
-            await interaction.response.send_message("Competition hasn't started yet!")
+        if not competition.has_started():
+            await interaction.followup.send("Competition hasn't started yet!")
             return
-        
-        # Initialize data structure for tracking progress
-        progress_data = {}
-        user_names = {}
-        
-        # For each participant
-        for user_id, initial_stats in competition['participants'].items():
-            progress_data[user_id] = {
-                'dates': [],
-                'points': [],
-                'body_fat_points': [],
-                'muscle_mass_points': [],
-                'bmr_points': []
-            }
-            
-            # Try to get user's name
-            try:
-                user = await self.bot.fetch_user(int(user_id))
-                user_names[user_id] = user.name
-            except:
-                user_names[user_id] = f"User_{user_id[-4:]}"
-            
-            # Get relevant health data if available
-            if user_id in health_data:
-                # Process each date with health data from start_date until now or end_date
-                for date_str, daily_stats in sorted(health_data[user_id].items()):
-                    # Skip dates before start or after end
-                    date = datetime.datetime.strptime(date_str, '%Y-%m-%d')
-                    if date < start_date or date > min(end_date, current_date):
-                        continue
-                        
-                    # Calculate relative changes and points
-                    bf_change = (initial_stats['body_fat'] - daily_stats['body_fat']) / initial_stats['body_fat'] * 100
-                    bf_points = bf_change * config.BF_POINTS_MULTIPLIER
-                    
-                    mm_change = (daily_stats['muscle_mass'] / initial_stats['muscle_mass'] * 100) - 100
-                    mm_points = mm_change * config.MM_POINTS_MULTIPLIER
-                    
-                    bmr_change = (daily_stats['bmr'] / initial_stats['bmr'] * 100) - 100
-                    bmr_points = bmr_change * config.BMR_POINTS_MULTIPLIER
-                    
-                    total_points = bf_points + mm_points + bmr_points
-                    
-                    # Store progress
-                    progress_data[user_id]['dates'].append(date_str)
-                    progress_data[user_id]['points'].append(total_points)
-                    progress_data[user_id]['body_fat_points'].append(bf_points)
-                    progress_data[user_id]['muscle_mass_points'].append(mm_points)
-                    progress_data[user_id]['bmr_points'].append(bmr_points)
+
+        # Finished competitions are served from their frozen results
+        scheduler = get_competition_scheduler(self.bot)
+        if competition.has_ended():
+            results = scheduler.get_results(name)
+            if results is not None:
+                await self._send_final_results(interaction, competition, results)
+                return
+
+        # Read the precomputed point series, capped at today
+        today = datetime.date.today().isoformat()
+        with phase('scoring'):
+            series = get_scoring_engine().get_competition_series(competition)
+            progress_data = build_progress_data(series, today)
+
+        # Resolve participants' names (cached, misses fetched concurrently)
+        with phase('resolve_names'):
+            user_names = await get_username_resolver(self.bot).resolve(
+                competition.participants, interaction.guild
+            )
         
         # If no progress data, provide message
-        if all(len(data['dates']) == 0 for data in progress_data.values()):
-            await interaction.response.send_message(
+        if not has_progress(progress_data):
+            await interaction.followup.send(
                 f"No progress data found for competition '{name}'. Participants need to log their stats using /logstats.")
             return
         
-        # Create visualization
-        buf = create_competition_graph(name, progress_data, user_names)
-        
-        # Prepare status message
-        status_msg = f"**Competition Status for '{name}'**\n"
-        status_msg += f"Start Date: {competition['start_date']}\n"
-        status_msg += f"End Date: {competition['end_date']}\n\n"
-        
-        # Add detailed statistics for each participant
-        status_msg += "**Detailed Statistics:**\n"
-        for user_id in progress_data:
-            if not progress_data[user_id]['dates']:  # Skip if no data
-                continue
-                
-            initial_stats = competition['participants'][user_id]
-            current_date = progress_data[user_id]['dates'][-1]
-            current_stats = health_data[user_id][current_date]
-            
-            # Calculate relative changes
-            bf_change = ((initial_stats['body_fat'] - current_stats['body_fat']) / initial_stats['body_fat']) * 100
-            mm_change = ((current_stats['muscle_mass'] / initial_stats['muscle_mass']) * 100) - 100
-            bmr_change = ((current_stats['bmr'] / initial_stats['bmr']) * 100) - 100
-            
-            # Calculate points
-            bf_points = bf_change * config.BF_POINTS_MULTIPLIER
-            mm_points = mm_change * config.MM_POINTS_MULTIPLIER
-            bmr_points = bmr_change * config.BMR_POINTS_MULTIPLIER
-            total_points = bf_points + mm_points + bmr_points
-            
-            status_msg += f"\n__**{user_names[user_id]}**__\n"
-            status_msg += f"Body Fat: {initial_stats['body_fat']}% → {current_stats['body_fat']}% (Change: {bf_change:.2f}%, Points: {bf_points:.2f})\n"
-            status_msg += f"Muscle Mass: {initial_stats['muscle_mass']}lbs → {current_stats['muscle_mass']}lbs (Change: {mm_change:.2f}%, Points: {mm_points:.2f})\n"
-            status_msg += f"BMR: {initial_stats['bmr']} → {current_stats['bmr']} (Change: {bmr_change:.2f}%, Points: {bmr_points:.2f})\n"
-            status_msg += f"Total Points: {total_points:.2f}\n"
+        # Start the visualization in the render pool (or reuse an identical earlier render)
+        # while the standings go out
+        cache_key = (
+            'compstatus', name, get_competition_version(name),
+            tuple((user_id, get_user_version(user_id), user_names[user_id]) for user_id in progress_data)
+        )
+        cache_tags = [('comp', name)] + [('user', user_id) for user_id in progress_data]
+        render_task = asyncio.create_task(
+            render_cached(cache_key, cache_tags, render_competition_png, name, progress_data, user_names)
+        )
         
-        status_msg += "\n**Current Standings:**\n"
-        final_points = {}
-        for user_id in progress_data:
-            if progress_data[user_id]['points']:
-                final_points[user_names[user_id]] = progress_data[user_id]['points'][-1]
+        # Pages are built on demand: standings (top K) first, then participant details
+        with_data = count_with_data(series, today)
+        details_size = config.DETAILS_PAGE_SIZE
+
+        def build_page(index):
+            if index == 0:
+                embed = status_header(competition)
+                top = rank_standings(series, today, k=config.STANDINGS_TOP_K)
+                embed.add_field(
+                    name="Current Standings",
+                    value=format_standings(top, user_names) + more_line(with_data, len(top)),
+                    inline=False
+                )
+                return embed
+            start = (index - 1) * details_size
+            ranked = rank_standings(series, today, k=start + details_size)[start:]
+            embed = status_header(competition)
+            embed.description += "\n\n**Detailed Statistics:**\n\n" + "\n".join(
+                format_participant_details(competition, user_id, series[user_id], user_names[user_id], today)
+                for user_id, _ in ranked
+            )
+            return embed
         
-        # Sort by points
-        sorted_standings = dict(sorted(final_points.items(), key=lambda x: x[1], reverse=True))
-        for i, (user_name, points) in enumerate(sorted_standings.items(), 1):
-            status_msg += f"{i}. {user_name}: {points:.2f} points\n"
+        view = LazyPaginator(
+            1 + math.ceil(with_data / details_size), build_page, owner_id=interaction.user.id
+        )
         
-        # Send message and plot
-        await interaction.response.send_message(
-            content=status_msg,
-            file=discord.File(buf, filename='competition_progress.png')
+        # Post the standings now; the chart is attached once it's rendered
+        try:
+            with phase('send'):
+                await interaction.followup.send(**view.send_kwargs())
+        except BaseException:
+            render_task.cancel()
+            raise
+        try:
+            with phase('render'):
+                png = await render_task
+        except RenderError:
+            # The standings are already out; just go without the graph
+            return
+        with phase('attach'):
+            await interaction.edit_original_response(
+                attachments=[discord.File(io.BytesIO(png), filename='competition_progress.png')]
+            )
+
+    @app_commands.command(name="leaderboard", description="All-time rankings across every competition")
+    @app_commands.describe(by="What to rank by (default: points)")
+    @app_commands.choices(by=[app_commands.Choice(name=label, value=value) for label, value in LEADERBOARD_CHOICES])
+    @instrumented
+    async def leaderboard(self, interaction: discord.Interaction, by: Optional[app_commands.Choice[str]] = None):
+        order = by.value if by else 'points'
+        user_id = str(interaction.user.id)
+
+        # Kept current as stats are logged; only the first call builds it
+        with phase('load'):
+            board = get_leaderboard()
+            top = board.top(order, 0, config.LEADERBOARD_TOP_K)
+            mine = board.rank_of(user_id, order)
+            total = len(board)
+        if not top:
+            await interaction.response.send_message("No competition points yet. Join a competition with /joincomp!")
+            return
+
+        with phase('resolve_names'):
+            user_names = await get_username_resolver(self.bot).resolve(
+                [entry.user_id for _, entry in top], interaction.guild
+            )
+
+        label = dict((value, label) for label, value in LEADERBOARD_CHOICES)[order]
+        embed = discord.Embed(
+            title=f"All-Time Leaderboard ({label})",
+            description="".join(
+                f"{rank}. {user_names[entry.user_id]}: {format_leaderboard_entry(entry)}\n" for rank, entry in top
+            ) + (f"…and {total - len(top)} more\n" if total > len(top) else "")
         )
+        if mine is None:
+            embed.add_field(name="Your Rank", value="You don't have any competition points yet.", inline=False)
+        else:
+            rank, entry = mine
+            embed.add_field(name="Your Rank", value=f"#{rank} of {total}: {format_leaderboard_entry(entry)}", inline=False)
+        with phase('send'):
+            await interaction.response.send_message(embed=embed)
+
+    async def _send_final_results(self, interaction: discord.Interaction, competition, results):
+        """Send the frozen results of a finished competition"""
+        details_size = config.DETAILS_PAGE_SIZE
+
+        def build_page(index):
+            embed = status_header(competition)
+            if index == 0:
+                top = results.standings[:config.STANDINGS_TOP_K]
+                standings = "".join(
+                    f"{i}. {entry['name']}: {entry['points']:.2f} points\n" for i, entry in enumerate(top, 1)
+                )
+                embed.add_field(
+                    name="Final Standings",
+                    value=(standings + more_line(len(results.standings), len(top))) or "No progress was logged.",
+                    inline=False
+                )
+                return embed
+            start = (index - 1) * details_size
+            embed.description += "\n\n**Detailed Statistics:**\n\n" + "\n".join(
+                results.details[start:start + details_size]
+            )
+            return embed
+
+        view = LazyPaginator(
+            1 + math.ceil(len(results.details) / details_size), build_page, owner_id=interaction.user.id
+        )
+        png = results.chart()
+        with phase('send'):
+            if png is None:
+                await interaction.followup.send(**view.send_kwargs())
+                return
+            await interaction.followup.send(
+                file=discord.File(io.BytesIO(png), filename='competition_progress.png'),
+                **view.send_kwargs()
+            )
+
+def format_leaderboard_entry(entry) -> str:
+    def count(n, noun):
+        return f"{n} {noun}" if n == 1 else f"{n} {noun}s"
+    return (
+        f"{entry.points:.2f} points, {count(entry.wins, 'win')}, {count(entry.podiums, 'podium')} "
+        f"({count(entry.competitions, 'competition')})"
+    )
+
+def status_header(competition) -> discord.Embed:
+    return discord.Embed(
+        title=f"Competition Status for '{competition.name}'",
+        description=f"Start Date: {competition.start_date}\nEnd Date: {competition.end_date}"
+    )
+
+def more_line(total: int, shown: int) -> str:
+    return f"…and {total - shown} more (see the next pages)\n" if total > shown else ""
 
 async def setup(bot):
     await bot.add_cog(CompetitionCommands(bot))
\ No newline at end of file
@@ -2,11 +2,33 @@ import discord
 from discord import app_commands
 from discord.ext import commands
 import datetime
+import asyncio
 from typing import Optional
 import io
 
-from utils.data_manager import load_health_data, save_health_data
-from utils.visualization import create_personal_progress_graph
+from utils.data_manager import (
+    get_user_stats, get_user_series, record_stats, record_many, update_stats, get_user_version, get_user_lock
+)
+from utils.visualization import render_personal_progress_png
+from utils.render_service import RenderError
+from utils.render_cache import get_render_cache, render_cached
+from utils.scoring import get_scoring_engine
+from utils.repository import get_competition_repository
+from utils.trends import get_trends_engine
+from utils.leaderboard import get_leaderboard
+from utils.metrics import instrumented, phase
+from utils.downsampling import resolve_range, prepare_progress_series
+from utils.csv_import import parse_stats_csv, CSVImportError
+from utils.export import (
+    FORMAT_CHOICES, USER_FIELDS, user_rows, iter_export_parts, send_export, upload_limit, export_file_name
+)
+from models.health_series import METRICS, ordinal_to_date
+import config
+
+PERIOD_CHOICES = [('Last 30 days', '30d'), ('Last 90 days', '90d'), ('Last year', '1y'), ('All time', 'all')]
+ROLLUP_CHOICES = [('Weekly', 'weekly'), ('Monthly', 'monthly')]
+METRIC_CHOICES = [('Weight', 'weight'), ('Body Fat', 'body_fat'), ('Muscle Mass', 'muscle_mass'), ('BMR', 'bmr')]
+METRIC_UNITS = {'weight': ' lbs', 'body_fat': '%', 'muscle_mass': ' lbs', 'bmr': ' cal'}
 
 class StatsCommands(commands.Cog):
     def __init__(self, bot):
@@ -19,6 +41,7 @@ class StatsCommands(commands.Cog):
         muscle_mass="Muscle mass in lbs", 
         bmr="How many calories you burn daily"
     )
+    @instrumented
     async def logstats(self, interaction: discord.Interaction, weight: float,
                         body_fat: float, muscle_mass: float, bmr: float):
         user_id = str(interaction.user.id)
@@ -26,28 +49,26 @@ class StatsCommands(commands.Cog):
         # Grab today in YYYY-MM-DD format
         today = datetime.datetime.now().strftime('%Y-%m-%d')
         
-        # Import entire health json
-        data = load_health_data()
-        
-        # Check if user has ever logged before, if not create dict for them
-        if user_id not in data:
-            data[user_id] = {}
-
-        # Check if user has already logged their stats for today
-        if today in data[user_id]:
+        # Check and record under the user's lock so concurrent writes can't interleave
+        async with get_user_lock(user_id):
+            # Check if user has already logged their stats for today
+            with phase('load'):
+                logged = get_user_stats(user_id, today) is not None
+            if not logged:
+                # Not logged today, record the stats (only this user's data is written)
+                with phase('save'):
+                    record_stats(user_id, today, {
+                        'weight': weight,
+                        'body_fat': body_fat,
+                        'muscle_mass': muscle_mass,
+                        'bmr': bmr
+                    })
+        if logged:
             await interaction.response.send_message('You already recorded your metrics today. Use /editstats to modify them.')
             return
         
-        # Not logged today, add the stats
-        data[user_id][today] = {
-            'weight': weight,
-            'body_fat': body_fat,
-            'muscle_mass': muscle_mass,
-            'bmr': bmr
-        }
-        
-        # Save the updated data
-        save_health_data(data)
+        with phase('scoring'):
+            refresh_derived(user_id, today)
         
         # Response to user
         response = f'✅ Stats recorded for {today}:\n'
@@ -56,7 +77,8 @@ class StatsCommands(commands.Cog):
         response += f'• Muscle Mass: {muscle_mass} lbs\n'
         response += f'• BMR: {bmr} cal'
         
-        await interaction.response.send_message(response)
+        with phase('send'):
+            await interaction.response.send_message(response)
     
     @app_commands.command(name="editstats", description="Edit your recorded stats for today")
     @app_commands.describe(
@@ -65,6 +87,7 @@ class StatsCommands(commands.Cog):
         muscle_mass="Muscle mass in lbs",
         bmr="How many calories you burn daily"
     )
+    @instrumented
     async def editstats(self, interaction: discord.Interaction, 
                         weight: Optional[float] = None,
                         body_fat: Optional[float] = None, 
@@ -73,31 +96,35 @@ class StatsCommands(commands.Cog):
         user_id = str(interaction.user.id)
         today = datetime.datetime.now().strftime('%Y-%m-%d')
         
-        # Load data
-        data = load_health_data()
-        
-        # Check if user has data
-        if user_id not in data:
-            await interaction.response.send_message("You haven't logged any stats yet. Use /logstats first.")
-            return
-            
-        # Check if user has logged today
-        if today not in data[user_id]:
-            await interaction.response.send_message("You haven't logged any stats today. Use /logstats first.")
-            return
-        
         # Update only provided values
+        changes = {}
         if weight is not None:
-            data[user_id][today]['weight'] = weight
+            changes['weight'] = weight
         if body_fat is not None:
-            data[user_id][today]['body_fat'] = body_fat
+            changes['body_fat'] = body_fat
         if muscle_mass is not None:
-            data[user_id][today]['muscle_mass'] = muscle_mass
+            changes['muscle_mass'] = muscle_mass
         if bmr is not None:
-            data[user_id][today]['bmr'] = bmr
-            
-        # Save changes
-        save_health_data(data)
+            changes['bmr'] = bmr
+        
+        async with get_user_lock(user_id):
+            # Check if user has logged today
+            with phase('load'):
+                logged = get_user_stats(user_id, today) is not None
+            if logged:
+                # Save changes
+                with phase('save'):
+                    update_stats(user_id, today, changes)
+        if not logged:
+            # Check if user has data
+            if get_user_stats(user_id) is None:
+                await interaction.response.send_message("You haven't logged any stats yet. Use /logstats first.")
+                return
+            await interaction.response.send_message("You haven't logged any stats today. Use /logstats first.")
+            return
+        
+        with phase('scoring'):
+            refresh_derived(user_id, today)
         
         # Prepare response message
         response = "✅ Updated values:"
@@ -110,27 +137,58 @@ class StatsCommands(commands.Cog):
         if bmr is not None:
             response += f"\n• BMR: {bmr}"
             
-        await interaction.response.send_message(response)
+        with phase('send'):
+            await interaction.response.send_message(response)
 
     @app_commands.command(name="progress", description="Display your progress graph")
     @app_commands.describe(
         weight="Show weight progress",
         body_fat="Show body fat percentage progress", 
         muscle_mass="Show muscle mass progress",
-        bmr="Show BMR progress"
+        bmr="Show BMR progress",
+        period="How far back to show (default: all)",
+        start="Start date (YYYY-MM-DD), overrides the period",
+        end="End date (YYYY-MM-DD)",
+        rollup="Average readings per week or month"
     )
+    @app_commands.choices(
+        period=[app_commands.Choice(name=label, value=value) for label, value in PERIOD_CHOICES],
+        rollup=[app_commands.Choice(name=label, value=value) for label, value in ROLLUP_CHOICES]
+    )
+    @instrumented
     async def progress(self, interaction: discord.Interaction,
                         weight: Optional[bool] = None,
                         body_fat: Optional[bool] = None,
                         muscle_mass: Optional[bool] = None, 
-                        bmr: Optional[bool] = None):
+                        bmr: Optional[bool] = None,
+                        period: Optional[app_commands.Choice[str]] = None,
+                        start: Optional[str] = None,
+                        end: Optional[str] = None,
+                        rollup: Optional[app_commands.Choice[str]] = None):
+        # Acknowledge right away; everything below is delivered as follow-ups
+        with phase('defer'):
+            await interaction.response.defer(thinking=True)
         
         user_id = str(interaction.user.id)
-        data = load_health_data()
+        with phase('load'):
+            series = get_user_series(user_id)
 
         # Check if user has data
-        if user_id not in data:
-            await interaction.response.send_message("No data found! Use /logstats first.")
+        if series is None or not len(series):
+            await interaction.followup.send("No data found! Use /logstats first.")
+            return
+
+        # Narrow to the requested dates (bisected on the series' sorted days). Always
+        # a copy: the render pool pickles it on another thread, and the cached
+        # series can change underneath it
+        try:
+            start, end = resolve_range(period.value if period else None, start, end)
+        except ValueError:
+            await interaction.followup.send("Invalid date range. Use YYYY-MM-DD, with the start before the end.")
+            return
+        series = series.slice(start, end)
+        if not len(series):
+            await interaction.followup.send("No data found in that date range.")
             return
 
         # If no options selected, default to weight only
@@ -147,24 +205,256 @@ class StatsCommands(commands.Cog):
         # Count how many plots we need
         plots_needed = sum([weight, body_fat, muscle_mass, bmr])
         if plots_needed == 0:
-            await interaction.response.send_message("Please select at least one metric to display.")
+            await interaction.followup.send("Please select at least one metric to display.")
             return
             
-        # Generate the graph
-        buf = create_personal_progress_graph(
-            user_id, 
-            interaction.user.name, 
-            data,
-            show_weight=weight,
-            show_body_fat=body_fat,
-            show_muscle_mass=muscle_mass,
-            show_bmr=bmr
+        # Roll up and/or downsample long series to the graph's point budget
+        metrics = [metric for metric, shown in zip(METRICS, (weight, body_fat, muscle_mass, bmr)) if shown]
+        with phase('downsample'):
+            plotted = prepare_progress_series(
+                series, metrics, config.PROGRESS_MAX_POINTS, rollup.value if rollup else None
+            )
+
+        # Generate the graph in the render pool (or reuse an identical earlier render)
+        cache_key = (
+            'progress', user_id, interaction.user.name,
+            weight, body_fat, muscle_mass, bmr, start, end, rollup.value if rollup else None,
+            get_user_version(user_id)
+        )
+        render_task = asyncio.create_task(
+            render_cached(
+                cache_key, [('user', user_id)],
+                render_personal_progress_png,
+                user_id, 
+                interaction.user.name, 
+                {user_id: plotted},
+                show_weight=weight,
+                show_body_fat=body_fat,
+                show_muscle_mass=muscle_mass,
+                show_bmr=bmr
+            )
+        )
+
+        # Post a text summary while the graph renders
+        try:
+            with phase('send'):
+                await interaction.followup.send(progress_summary(
+                    interaction.user.name, series, weight, body_fat, muscle_mass, bmr
+                ))
+        except BaseException:
+            render_task.cancel()
+            raise
+        try:
+            with phase('render'):
+                png = await render_task
+        except RenderError:
+            await interaction.followup.send("Couldn't render your graph right now, please try again shortly.")
+            return
+
+        # Attach the plot to the summary
+        with phase('attach'):
+            await interaction.edit_original_response(
+                attachments=[discord.File(io.BytesIO(png), filename='progress.png')]
+            )
+
+    @app_commands.command(name="trends", description="Show your averages, rate of change and personal bests")
+    @app_commands.describe(metric="Only show one metric")
+    @app_commands.choices(metric=[app_commands.Choice(name=label, value=value) for label, value in METRIC_CHOICES])
+    @instrumented
+    async def trends(self, interaction: discord.Interaction, metric: Optional[app_commands.Choice[str]] = None):
+        user_id = str(interaction.user.id)
+
+        # Answered from the running statistics; history is only read to build them once
+        with phase('load'):
+            trends = get_trends_engine().get(user_id)
+        if trends is None:
+            await interaction.response.send_message("No data found! Use /logstats first.")
+            return
+
+        embed = discord.Embed(
+            title=f"Trends for {interaction.user.name}",
+            description=f"As of your latest reading ({ordinal_to_date(trends.last_day)})"
         )
+        for label, name in METRIC_CHOICES:
+            if metric is not None and metric.value != name:
+                continue
+            embed.add_field(name=label, value=format_trend(trends.summary(name), METRIC_UNITS[name]), inline=False)
+        with phase('send'):
+            await interaction.response.send_message(embed=embed)
+
+    @app_commands.command(name="importstats", description="Import past readings from a CSV file")
+    @app_commands.describe(file="CSV with the columns date,weight,body_fat,muscle_mass,bmr (dates as YYYY-MM-DD)")
+    @instrumented
+    async def importstats(self, interaction: discord.Interaction, file: discord.Attachment):
+        with phase('defer'):
+            await interaction.response.defer(thinking=True)
+        user_id = str(interaction.user.id)
+
+        if file.size > config.IMPORT_MAX_BYTES:
+            await interaction.followup.send(
+                f"That file is too large (the limit is {config.IMPORT_MAX_BYTES // 1024} KB).")
+            return
+        with phase('download'):
+            data = await file.read()
+
+        async with get_user_lock(user_id):
+            # Rows are validated as they're read and checked against dates already logged
+            # and the windows of ended competitions, whose results are final
+            with phase('parse'):
+                existing = get_user_stats(user_id) or {}
+                today = datetime.date.today()
+                frozen = [
+                    (competition.name, competition.start_date, competition.end_date)
+                    for competition in get_competition_repository().all()
+                    if user_id in competition.participants and competition.has_ended(today)
+                ]
+                try:
+                    result = parse_stats_csv(
+                        io.TextIOWrapper(io.BytesIO(data), encoding='utf-8-sig', newline=''), existing,
+                        today, frozen
+                    )
+                except CSVImportError as e:
+                    await interaction.followup.send(f"Couldn't import {file.filename}: {e}")
+                    return
+                except UnicodeDecodeError:
+                    await interaction.followup.send(f"Couldn't import {file.filename}: it isn't UTF-8 text.")
+                    return
+
+            # Every new reading goes to the store in one write
+            if result.readings:
+                with phase('save'):
+                    record_many(user_id, result.readings)
+
+        # Re-score each affected competition once
+        refreshed = []
+        if result.readings:
+            with phase('scoring'):
+                get_render_cache().invalidate_user(user_id)
+                get_trends_engine().invalidate(user_id)
+                try:
+                    refreshed = get_scoring_engine().refresh_user(user_id, result.readings)
+                    get_leaderboard().update_user(user_id, result.readings)
+                except Exception as e:
+                    # The readings are stored; scores rebuild on next use
+                    print(f"Failed to update scores for {user_id} after import: {e}")
+                    get_scoring_engine().invalidate()
+                    get_leaderboard().invalidate()
+
+        with phase('send'):
+            await interaction.followup.send(format_import_report(result, refreshed))
+
+    @app_commands.command(name="exportstats", description="Download your logged stats")
+    @app_commands.describe(
+        format="File format (default: CSV)",
+        start="Start date (YYYY-MM-DD)",
+        end="End date (YYYY-MM-DD)"
+    )
+    @app_commands.choices(format=[app_commands.Choice(name=label, value=value) for label, value in FORMAT_CHOICES])
+    @instrumented
+    async def exportstats(self, interaction: discord.Interaction,
+                          format: Optional[app_commands.Choice[str]] = None,
+                          start: Optional[str] = None, end: Optional[str] = None):
+        # Only the caller sees their export
+        with phase('defer'):
+            await interaction.response.defer(thinking=True, ephemeral=True)
+        user_id = str(interaction.user.id)
+        fmt = format.value if format else 'csv'
+
+        try:
+            start, end = resolve_range(start=start, end=end)
+        except ValueError:
+            await interaction.followup.send("Invalid date range. Use YYYY-MM-DD, with the start before the end.")
+            return
+        with phase('load'):
+            series = get_user_series(user_id)
+        if series is None or not len(series):
+            await interaction.followup.send("No data found. Start logging your stats with /logstats!")
+            return
+        # A copy of the columns, so readings logged while the files upload don't shift the rows
+        series = series.slice(start, end)
+        if not len(series):
+            await interaction.followup.send("No data found in that date range.")
+            return
 
-        # Send plot as Discord attachment
-        await interaction.response.send_message(
-            file=discord.File(buf, filename='progress.png')
+        # Rows are encoded as they're read and each file goes out as soon as it's full
+        parts = iter_export_parts(
+            user_rows(series), USER_FIELDS, fmt,
+            export_file_name('stats', user_id, start, end), upload_limit(interaction.guild)
         )
+        with phase('send'):
+            await send_export(interaction, parts, f"Your stats export ({len(series)} readings):")
+
+def refresh_derived(user_id, date):
+    """Update scores, trends and the leaderboard after a saved reading.
+
+    The reading is already stored, so a failure here is logged rather than
+    raised; the command still replies and the caches rebuild on next use.
+    """
+    get_render_cache().invalidate_user(user_id)
+    try:
+        get_scoring_engine().update_user(user_id, date)
+        get_trends_engine().update_user(user_id, date)
+        get_leaderboard().update_user(user_id, [date])
+    except Exception as e:
+        print(f"Failed to update scores for {user_id} on {date}: {e}")
+        get_scoring_engine().invalidate()
+        get_trends_engine().invalidate(user_id)
+        get_leaderboard().invalidate()
+
+def format_import_report(result, refreshed) -> str:
+    """Summarize an import: what was added, skipped and rejected"""
+    if result.readings:
+        dates = sorted(result.readings)
+        lines = [f"✅ Imported {len(dates)} reading(s) from {dates[0]} to {dates[-1]}."]
+    else:
+        lines = ["No new readings were imported."]
+    if result.already_logged:
+        lines.append(f"Skipped {len(result.already_logged)} date(s) you had already logged.")
+    if refreshed:
+        lines.append(f"Updated your scores in: {', '.join(refreshed)}")
+    if result.errors:
+        shown = result.errors[:config.IMPORT_MAX_ERRORS_SHOWN]
+        lines.append(f"{len(result.errors)} row(s) had problems and were skipped:")
+        lines.append("```\n" + "\n".join(error[:120] for error in shown) + "\n```")
+        if len(result.errors) > len(shown):
+            lines.append(f"…and {len(result.errors) - len(shown)} more")
+    return "\n".join(lines)
+
+def format_trend(summary, unit) -> str:
+    """Format one metric's running statistics for an embed field"""
+    def value(x, signed=False):
+        if x is None:
+            return "n/a"
+        return f"{x:+.1f}{unit}" if signed else f"{x:.1f}{unit}"
+    def readings(n):
+        return f"{n} reading" if n == 1 else f"{n} readings"
+    return (
+        f"Latest: {value(summary['latest'])} • Moving average: {value(summary['ewma'])}\n"
+        f"7-day average: {value(summary['avg_7d'])} ({readings(summary['readings_7d'])}) • "
+        f"30-day average: {value(summary['avg_30d'])} ({readings(summary['readings_30d'])})\n"
+        f"Weekly change: {value(summary['weekly_rate_7d'], True)} (7 days) • "
+        f"{value(summary['weekly_rate_30d'], True)} (30 days)\n"
+        f"Lowest: {value(summary['min'])} ({summary['min_date']}) • "
+        f"Highest: {value(summary['max'])} ({summary['max_date']})"
+    )
+
+def progress_summary(user_name, series, weight, body_fat, muscle_mass, bmr) -> str:
+    """Reading count, date range and latest values of the selected metrics"""
+    first_date = ordinal_to_date(series.days[0])
+    last_date, latest = series.latest()
+    values = []
+    if weight:
+        values.append(f"Weight: {latest.weight} lbs")
+    if body_fat:
+        values.append(f"Body Fat: {latest.body_fat}%")
+    if muscle_mass:
+        values.append(f"Muscle Mass: {latest.muscle_mass} lbs")
+    if bmr:
+        values.append(f"BMR: {latest.bmr} cal")
+    return (
+        f"📈 Progress for {user_name}: {len(series)} readings from {first_date} to {last_date}\n"
+        f"Latest ({last_date}): " + " • ".join(values)
+    )
 
 async def setup(bot):
     await bot.add_cog(StatsCommands(bot))
\ No newline at end of file
@@ -5,6 +5,7 @@ COMPETITIONS_PATH = "data/competitions.json"
 # Graph styling
 GRAPH_STYLE = "dark_background"
 GRAPH_FIGSIZE = (12, 16)
+PROGRESS_MAX_POINTS = 500  # Longer /progress series are downsampled (LTTB) to about the plot width
 
 # Graph colors
 COLOR_WEIGHT = "g-"
@@ -20,4 +21,61 @@ BMR_POINTS_MULTIPLIER = 1.0  # 1 point per 1% increase
 # Colors for competition points breakdown
 COLOR_BF_POINTS = "red"
 COLOR_MM_POINTS = "blue"
-COLOR_BMR_POINTS = "green"
\ No newline at end of file
+COLOR_BMR_POINTS = "green"
+
+# Persistence
+SAVE_DEBOUNCE_SECONDS = 2.0  # Coalesce saves made within this window into one write
+HEALTH_JOURNAL_PATH = "data/health_journal.jsonl"
+JOURNAL_FSYNC_INTERVAL = 0.5  # Seconds between batched fsyncs of the journal
+JOURNAL_FSYNC_BATCH = 64  # fsync early once this many appends are pending
+JOURNAL_COMPACT_BYTES = 1024 * 1024  # Fold the journal into a snapshot past this size
+JOURNAL_COMPACT_CHECK_SECONDS = 60
+
+# Storage backend: "json" (flat files + journal), "sharded" (one health file
+# per user, competitions stay in JSON) or "sqlite"
+STORAGE_BACKEND = "json"
+SQLITE_PATH = "data/fitness.db"
+HEALTH_SHARD_DIR = "data/health_shards"
+HEALTH_BINARY_PATH = "data/health_readings.bin"  # Memory-mapped readings for analytics (python -m utils.binary_store convert)
+
+# Graph rendering
+RENDER_WORKERS = 2  # Processes rendering graphs off the event loop
+RENDER_QUEUE_SIZE = 8  # Max render jobs queued or running before callers wait
+RENDER_TIMEOUT_SECONDS = 20.0
+RENDER_CACHE_MAX_BYTES = 64 * 1024 * 1024  # Memory budget for cached graph PNGs
+
+# Username lookups
+USERNAME_CACHE_TTL_SECONDS = 3600
+USERNAME_FETCH_CONCURRENCY = 5  # Max concurrent fetch_user calls
+
+# Startup
+COMMAND_SYNC_HASH_PATH = "data/command_sync_hash.txt"  # Signature hash recorded at the last tree sync
+PREWARM_RENDERING = True  # Start render workers and import the plotting stack after on_ready
+
+# Competition lifecycle
+RESULTS_DIR = "data/results"  # Frozen results and charts of finished competitions
+SCHEDULER_MAX_SLEEP_SECONDS = 3600
+
+# Paginated output
+LIST_PAGE_SIZE = 15  # Competitions per /listcomps page
+STANDINGS_TOP_K = 10  # Standings shown on the first /compstatus page
+DETAILS_PAGE_SIZE = 5  # Participants per /compstatus details page
+PAGINATION_TIMEOUT_SECONDS = 600
+
+# Metrics
+METRICS_PATH = "data/metrics.prom"  # Prometheus text-format file, e.g. for node_exporter's textfile collector
+METRICS_EXPORT_SECONDS = 60
+
+# Trends
+TRENDS_EWMA_ALPHA = 0.25  # Weight of the newest reading in the moving average
+
+# CSV import
+IMPORT_MAX_BYTES = 2 * 1024 * 1024  # Largest /importstats attachment accepted
+IMPORT_MAX_ROWS = 10000
+IMPORT_MAX_ERRORS_SHOWN = 15
+
+# Exports
+EXPORT_MAX_PART_BYTES = 10 * 1024 * 1024  # Largest attachment per export file (lowered to the guild's upload limit)
+
+# Leaderboard
+LEADERBOARD_TOP_K = 10  # Users shown by /leaderboard
@@ -1,35 +1,96 @@
+import time
+_process_start = time.perf_counter()
+
 import discord
 from discord.ext import commands
 import os
 from dotenv import load_dotenv
-from utils.data_manager import initialize_data_files
+import asyncio
+from utils.data_manager import initialize_data_files, flush as flush_data, journal_compaction_loop
+from utils.render_service import get_render_service
+from utils.command_sync import sync_if_changed
+from utils.scheduler import get_competition_scheduler
+from utils.metrics import metrics_export_loop, write_prometheus_file
+import config
 
 # Load environment variables
 load_dotenv()
 TOKEN = os.getenv('TOKEN')
 
+# Startup phase timings (seconds), printed once the bot is ready
+startup_timings = {'imports': time.perf_counter() - _process_start}
+
+class HealthBot(commands.Bot):
+    async def close(self):
+        # Make sure debounced saves hit the disk before we exit
+        await flush_data()
+        write_prometheus_file()
+        get_competition_scheduler(self).stop()
+        get_render_service().shutdown()
+        await super().close()
+
 # Bot initialization
 intents = discord.Intents.all()
-bot = commands.Bot(command_prefix='!', intents=intents)
+bot = HealthBot(command_prefix='!', intents=intents)
+
+async def prewarm():
+    """Warm up the scoring and rendering stacks without delaying startup"""
+    start = time.perf_counter()
+    try:
+        await asyncio.to_thread(__import__, 'utils.vector_scoring')
+        await get_render_service().warm_up()
+    except Exception as e:
+        print(f"Pre-warm failed: {e}")
+        return
+    print(f"Pre-warmed rendering in {time.perf_counter() - start:.2f}s")
 
 # Bot startup events
 @bot.event
 async def setup_hook():
+    phase_start = time.perf_counter()
+
     # Initialize data files
     initialize_data_files()
+
+    # Fold the stats journal into snapshots in the background
+    bot.compaction_task = asyncio.create_task(journal_compaction_loop())
+
+    # Periodically export command metrics in Prometheus text format
+    bot.metrics_task = asyncio.create_task(metrics_export_loop())
+    startup_timings['data'] = time.perf_counter() - phase_start
     
     # Load all cogs
+    phase_start = time.perf_counter()
     await bot.load_extension("cogs.stats_commands")
     await bot.load_extension("cogs.competition_commands")
+    await bot.load_extension("cogs.admin_commands")
+    startup_timings['cogs'] = time.perf_counter() - phase_start
+
+    # Finalize competitions as they end
+    get_competition_scheduler(bot).start()
     
-    # Sync commands
-    await bot.tree.sync()
-    print("Synced commands")
+    # Sync commands only if their signatures changed since the last sync
+    phase_start = time.perf_counter()
+    if await sync_if_changed(bot.tree, force=bool(os.getenv('FORCE_SYNC'))):
+        print("Synced commands")
+    else:
+        print("Commands unchanged, skipped sync")
+    startup_timings['sync'] = time.perf_counter() - phase_start
     
 @bot.event
 async def on_ready():
     print(f'{bot.user} has connected to Discord!')
 
+    # on_ready fires again after reconnects; only report and pre-warm once
+    if 'ready' in startup_timings:
+        return
+    startup_timings['ready'] = time.perf_counter() - _process_start
+    breakdown = ", ".join(f"{phase} {seconds:.2f}s" for phase, seconds in startup_timings.items())
+    print(f"Startup timings: {breakdown}")
+
+    if config.PREWARM_RENDERING:
+        bot.prewarm_task = asyncio.create_task(prewarm())
+
 # Run the bot
 if __name__ == "__main__":
-    bot.run(TOKEN)
\ No newline at end of file
+    bot.run(TOKEN)
@@ -1,9 +1,13 @@
 from dataclasses import dataclass, field
-from typing import Dict, Any, List
-from datetime import datetime
+from typing import Dict, Any, Optional
+from datetime import date
 from models.user_stats import UserStats
 
-@dataclass
+def parse_date(value: str) -> date:
+    """Parse a 'YYYY-MM-DD' string, raising ValueError if it's malformed"""
+    return date.fromisoformat(value)
+
+@dataclass(slots=True)
 class CompetitionParticipant:
     """Class for storing competition participant data"""
     user_id: str
@@ -17,14 +21,25 @@ class CompetitionParticipant:
             initial_stats=UserStats.from_dict(data)
         )
 
-@dataclass
+@dataclass(slots=True)
 class Competition:
-    """Class for storing competition data"""
+    """Class for storing competition data
+
+    `start` and `end` are the parsed forms of `start_date` / `end_date`; they
+    are computed once when the competition is created so date checks never
+    re-parse strings.
+    """
     name: str
     start_date: str
     end_date: str
     creator: str
     participants: Dict[str, CompetitionParticipant] = field(default_factory=dict)
+    start: date = field(init=False, repr=False, compare=False)
+    end: date = field(init=False, repr=False, compare=False)
+
+    def __post_init__(self):
+        self.start = parse_date(self.start_date)
+        self.end = parse_date(self.end_date)
     
     @classmethod
     def from_dict(cls, name: str, data: Dict[str, Any]) -> 'Competition':
@@ -50,21 +65,19 @@ class Competition:
         return {
             'start_date': self.start_date,
             'end_date': self.end_date,
-            'creator': self.creator,
-            'participants': participants_dict
+            'participants': participants_dict,
+            'creator': self.creator
         }
     
-    def is_active(self) -> bool:
+    def has_started(self, today: Optional[date] = None) -> bool:
+        """Check if competition has started"""
+        return (today or date.today()) >= self.start
+
+    def is_active(self, today: Optional[date] = None) -> bool:
         """Check if competition is currently active"""
-        now = datetime.now()
-        start_date = datetime.strptime(self.start_date, '%Y-%m-%d')
-        end_date = datetime.strptime(self.end_date, '%Y-%m-%d')
-        
-        return start_date <= now <= end_date
+        today = today or date.today()
+        return self.start <= today <= self.end
     
-    def has_ended(self) -> bool:
-        """Check if competition has ended"""
-        now = datetime.now()
-        end_date = datetime.strptime(self.end_date, '%Y-%m-%d')
-        
-        return now > end_date
\ No newline at end of file
+    def has_ended(self, today: Optional[date] = None) -> bool:
+        """Check if competition has ended (the end date is the last day that counts)"""
+        return (today or date.today()) > self.end
@@ -0,0 +1,120 @@
+from array import array
+from bisect import bisect_left, bisect_right
+from datetime import date
+from typing import Any, Dict, Optional, Tuple
+from models.user_stats import UserStats
+
+METRICS = ('weight', 'body_fat', 'muscle_mass', 'bmr')
+EPOCH_ORDINAL = date(1970, 1, 1).toordinal()
+
+def date_to_ordinal(date_str: str) -> int:
+    """'YYYY-MM-DD' -> proleptic Gregorian day ordinal"""
+    return date.fromisoformat(date_str).toordinal()
+
+def ordinal_to_date(ordinal: int) -> str:
+    """Day ordinal -> 'YYYY-MM-DD'"""
+    return date.fromordinal(ordinal).isoformat()
+
+class UserHealthSeries:
+    """Columnar health history for one user.
+
+    Dates are stored as sorted integer day ordinals and each metric in its own
+    typed array, roughly 36 bytes per reading instead of a dict of dicts keyed
+    by date strings. Date ranges are resolved with bisect and the columns can
+    be handed to NumPy without copying.
+    """
+    __slots__ = ('days', 'weight', 'body_fat', 'muscle_mass', 'bmr')
+
+    def __init__(self):
+        self.days = array('i')
+        self.weight = array('d')
+        self.body_fat = array('d')
+        self.muscle_mass = array('d')
+        self.bmr = array('d')
+
+    @classmethod
+    def from_dict(cls, history: Dict[str, Dict[str, Any]]) -> 'UserHealthSeries':
+        """Create a series from a {date: stats} history"""
+        series = cls()
+        for date_str in sorted(history):
+            stats = history[date_str]
+            series.days.append(date_to_ordinal(date_str))
+            for metric in METRICS:
+                getattr(series, metric).append(stats.get(metric, 0.0))
+        return series
+
+    def to_dict(self) -> Dict[str, Dict[str, float]]:
+        """Convert back to a {date: stats} history for storage"""
+        return {ordinal_to_date(day): self._stats_at(i).to_dict() for i, day in enumerate(self.days)}
+
+    def __len__(self):
+        return len(self.days)
+
+    def _stats_at(self, i: int) -> UserStats:
+        return UserStats(self.weight[i], self.body_fat[i], self.muscle_mass[i], self.bmr[i])
+
+    def _index(self, ordinal: int) -> Optional[int]:
+        i = bisect_left(self.days, ordinal)
+        if i < len(self.days) and self.days[i] == ordinal:
+            return i
+        return None
+
+    def get(self, date_str: str) -> Optional[UserStats]:
+        """Stats for one date, or None"""
+        i = self._index(date_to_ordinal(date_str))
+        return self._stats_at(i) if i is not None else None
+
+    def latest(self) -> Optional[Tuple[str, UserStats]]:
+        if not self.days:
+            return None
+        return ordinal_to_date(self.days[-1]), self._stats_at(len(self.days) - 1)
+
+    def set(self, date_str: str, stats: Dict[str, Any]):
+        """Insert a reading, or update the given metrics of an existing one"""
+        ordinal = date_to_ordinal(date_str)
+        i = bisect_left(self.days, ordinal)
+        if i < len(self.days) and self.days[i] == ordinal:
+            for metric in METRICS:
+                if metric in stats:
+                    getattr(self, metric)[i] = stats[metric]
+            return
+        try:
+            self._insert(i, ordinal, stats)
+        except BufferError:
+            # A NumPy view from as_numpy() still pins the buffers; detach from it
+            for name in self.__slots__:
+                setattr(self, name, array(getattr(self, name).typecode, getattr(self, name)))
+            self._insert(i, ordinal, stats)
+
+    def _insert(self, i: int, ordinal: int, stats: Dict[str, Any]):
+        self.days.insert(i, ordinal)
+        for metric in METRICS:
+            getattr(self, metric).insert(i, stats.get(metric, 0.0))
+
+    def index_range(self, start: Optional[str] = None, end: Optional[str] = None) -> Tuple[int, int]:
+        """[lo, hi) indices of readings between two dates (inclusive)"""
+        lo = bisect_left(self.days, date_to_ordinal(start)) if start else 0
+        hi = bisect_right(self.days, date_to_ordinal(end)) if end else len(self.days)
+        return lo, max(lo, hi)
+
+    def slice(self, start: Optional[str] = None, end: Optional[str] = None) -> 'UserHealthSeries':
+        """A new series holding only the readings between two dates (inclusive)"""
+        lo, hi = self.index_range(start, end)
+        part = UserHealthSeries()
+        for name in self.__slots__:
+            setattr(part, name, getattr(self, name)[lo:hi])
+        return part
+
+    def as_numpy(self, start: Optional[str] = None, end: Optional[str] = None) -> Dict[str, Any]:
+        """Zero-copy NumPy views of the columns (optionally limited to a date range).
+
+        The views share memory with the series, so don't modify the series
+        while they are in use.
+        """
+        import numpy as np
+        lo, hi = self.index_range(start, end)
+        columns = {'days': np.frombuffer(self.days, dtype=np.int32)[lo:hi] if self.days else np.empty(0, np.int32)}
+        for metric in METRICS:
+            column = getattr(self, metric)
+            columns[metric] = np.frombuffer(column, dtype=np.float64)[lo:hi] if column else np.empty(0)
+        return columns
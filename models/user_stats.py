@@ -1,8 +1,7 @@
 from dataclasses import dataclass
 from typing import Dict, Any
-from datetime import datetime
 
-@dataclass
+@dataclass(slots=True)
 class UserStats:
     """Class for storing user health statistics"""
     weight: float
@@ -14,10 +13,10 @@ class UserStats:
     def from_dict(cls, data: Dict[str, Any]) -> 'UserStats':
         """Create UserStats instance from dictionary data"""
         return cls(
-            weight=data.get('weight', 0.0),
-            body_fat=data.get('body_fat', 0.0),
-            muscle_mass=data.get('muscle_mass', 0.0),
-            bmr=data.get('bmr', 0.0)
+            weight=float(data.get('weight', 0.0)),
+            body_fat=float(data.get('body_fat', 0.0)),
+            muscle_mass=float(data.get('muscle_mass', 0.0)),
+            bmr=float(data.get('bmr', 0.0))
         )
     
     def to_dict(self) -> Dict[str, Any]:
@@ -30,10 +29,16 @@ class UserStats:
         }
     
     def calculate_changes(self, initial_stats: 'UserStats') -> Dict[str, float]:
-        """Calculate percentage changes from initial stats"""
-        bf_change = ((initial_stats.body_fat - self.body_fat) / initial_stats.body_fat) * 100
-        mm_change = ((self.muscle_mass / initial_stats.muscle_mass) * 100) - 100
-        bmr_change = ((self.bmr / initial_stats.bmr) * 100) - 100
+        """Calculate percentage changes from initial stats (0 where the initial value isn't positive)"""
+        bf_change = 0.0
+        if initial_stats.body_fat > 0:
+            bf_change = ((initial_stats.body_fat - self.body_fat) / initial_stats.body_fat) * 100
+        mm_change = 0.0
+        if initial_stats.muscle_mass > 0:
+            mm_change = ((self.muscle_mass / initial_stats.muscle_mass) * 100) - 100
+        bmr_change = 0.0
+        if initial_stats.bmr > 0:
+            bmr_change = ((self.bmr / initial_stats.bmr) * 100) - 100
         
         return {
             'body_fat_change': bf_change,
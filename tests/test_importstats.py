@@ -0,0 +1,96 @@
+import asyncio
+import datetime
+import json
+
+import config
+from utils.csv_import import parse_stats_csv
+
+USER_ID = 42
+STATS = {'weight': 200.0, 'body_fat': 30.0, 'muscle_mass': 130.0, 'bmr': 1900.0}
+
+def test_parse_rejects_rows_inside_frozen_windows():
+    lines = [
+        "date,weight,body_fat,muscle_mass,bmr",
+        "2025-01-15,199,29,131,1910",
+        "2025-03-01,198,29,131,1910"
+    ]
+    result = parse_stats_csv(
+        lines, today=datetime.date(2025, 6, 1), frozen_windows=[('spring cut', '2025-01-01', '2025-02-01')]
+    )
+    assert list(result.readings) == ['2025-03-01']
+    assert result.errors == ["Line 2: 2025-01-15 is inside 'spring cut', which has ended"]
+
+class _Followup:
+    def __init__(self, sent):
+        self.sent = sent
+
+    async def send(self, content=None, **kwargs):
+        self.sent.append(content)
+
+class _Response:
+    async def defer(self, **kwargs):
+        pass
+
+class _Interaction:
+    def __init__(self):
+        self.user = type('User', (), {'id': USER_ID, 'name': 'tester'})()
+        self.sent = []
+        self.response = _Response()
+        self.followup = _Followup(self.sent)
+
+class _Attachment:
+    filename = 'stats.csv'
+
+    def __init__(self, text):
+        self.data = text.encode()
+        self.size = len(self.data)
+
+    async def read(self):
+        return self.data
+
+def test_import_into_ended_competition(tmp_path, monkeypatch):
+    for name in dir(config):
+        value = getattr(config, name)
+        if isinstance(value, str) and value.startswith('data/'):
+            monkeypatch.setattr(config, name, str(tmp_path / value[len('data/'):]))
+    monkeypatch.setattr(config, 'STORAGE_BACKEND', 'json')
+
+    today = datetime.date.today()
+    def day(offset):
+        return (today + datetime.timedelta(days=offset)).isoformat()
+    participants = {str(USER_ID): STATS}
+    competitions = {
+        'spring cut': {'start_date': day(-60), 'end_date': day(-30), 'participants': participants},
+        'summer': {'start_date': day(-10), 'end_date': day(30), 'participants': participants}
+    }
+    (tmp_path / 'competitions.json').write_text(json.dumps(competitions))
+    (tmp_path / 'health_data.json').write_text(json.dumps({str(USER_ID): {day(-60): STATS, day(-10): STATS}}))
+
+    from cogs.stats_commands import StatsCommands
+    from utils.data_manager import flush, get_user_stats
+    from utils.repository import get_competition_repository
+    from utils.scoring import get_scoring_engine
+
+    async def run():
+        # Score both competitions first so a re-score would show in the reply
+        engine = get_scoring_engine()
+        for competition in get_competition_repository().all():
+            engine.get_competition_series(competition)
+        ended = engine.get_competition_series(get_competition_repository().get('spring cut'))
+        points_before = list(ended[str(USER_ID)].points)
+
+        cog = StatsCommands(bot=None)
+        interaction = _Interaction()
+        csv_text = f"date,weight,body_fat,muscle_mass,bmr\n{day(-45)},190,25,135,1950\n{day(-5)},195,28,132,1920\n"
+        await cog.importstats.callback(cog, interaction, _Attachment(csv_text))
+        await flush()
+        return interaction.sent[-1], points_before, list(ended[str(USER_ID)].points)
+
+    reply, points_before, points_after = asyncio.run(run())
+
+    stored = get_user_stats(str(USER_ID))
+    assert day(-45) not in stored
+    assert day(-5) in stored
+    assert f"{day(-45)} is inside 'spring cut', which has ended" in reply
+    assert "Updated your scores in: summer" in reply
+    assert points_after == points_before
@@ -0,0 +1,186 @@
+import json
+import mmap
+import os
+import struct
+import sys
+import tempfile
+import config
+from utils.persistence import write_json_atomic
+from models.health_series import METRICS, UserHealthSeries, date_to_ordinal, ordinal_to_date
+
+# File layout: a fixed header followed by fixed-width little-endian records
+# sorted by (user index, day). A JSON sidecar (<path>.idx) lists the users in
+# index order with the offset and count of their records. Both carry a random
+# write id, so a reader never pairs a file with another write's index.
+MAGIC = b'HLTHREC1'
+FORMAT_VERSION = 2
+HEADER = struct.Struct('<8sIIQQ')  # magic, version, user count, record count, write id
+RECORD_FIELDS = (('user', '<u4'), ('day', '<i4')) + tuple((metric, '<f8') for metric in METRICS)
+
+def record_dtype():
+    import numpy as np
+    return np.dtype(list(RECORD_FIELDS))
+
+def index_path(path):
+    return path + '.idx'
+
+class BinaryFormatError(Exception):
+    pass
+
+class HealthReadings:
+    """Read-only, memory-mapped view of a binary health readings file.
+
+    Records are exposed as NumPy structured arrays backed directly by the
+    mapping, so nothing is parsed or copied until a value is used. Arrays
+    handed out stay valid until close().
+    """
+    def __init__(self, path=None):
+        import numpy as np
+        self.path = path or config.HEALTH_BINARY_PATH
+        with open(index_path(self.path), 'r') as f:
+            index = json.load(f)
+        self._file = open(self.path, 'rb')
+        try:
+            self._mmap = mmap.mmap(self._file.fileno(), 0, access=mmap.ACCESS_READ)
+        except ValueError:
+            # Empty files can't be mapped
+            self._file.close()
+            raise BinaryFormatError(f"{self.path} is empty")
+        if len(self._mmap) < HEADER.size:
+            self.close()
+            raise BinaryFormatError(f"{self.path} is too short to be a health readings file")
+        magic, version, user_count, record_count, write_id = HEADER.unpack_from(self._mmap, 0)
+        if magic != MAGIC or version != FORMAT_VERSION:
+            self.close()
+            raise BinaryFormatError(f"{self.path} is not a version {FORMAT_VERSION} health readings file")
+        if (write_id != index.get('write_id') or user_count != len(index['users'])
+                or record_count != index['records']):
+            self.close()
+            raise BinaryFormatError(f"{self.path} doesn't match its index (replaced while opening?)")
+        if len(self._mmap) < HEADER.size + record_count * record_dtype().itemsize:
+            self.close()
+            raise BinaryFormatError(f"{self.path} is truncated")
+        self.records = np.frombuffer(self._mmap, dtype=record_dtype(), count=record_count, offset=HEADER.size)
+        # user id -> (user index, first record, record count)
+        self._users = {user_id: (i, start, count) for i, (user_id, start, count) in enumerate(index['users'])}
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, *exc):
+        self.close()
+
+    def __len__(self):
+        return len(self.records)
+
+    def user_ids(self):
+        return list(self._users)
+
+    def user_records(self, user_id, start=None, end=None):
+        """A user's records between two dates (inclusive), as a zero-copy view"""
+        import numpy as np
+        entry = self._users.get(user_id)
+        if entry is None:
+            return self.records[:0]
+        _, first, count = entry
+        records = self.records[first:first + count]
+        if start or end:
+            days = records['day']
+            lo = np.searchsorted(days, date_to_ordinal(start), 'left') if start else 0
+            hi = np.searchsorted(days, date_to_ordinal(end), 'right') if end else len(records)
+            records = records[lo:hi]
+        return records
+
+    def columns(self, user_id, start=None, end=None):
+        """Per-metric column views of a user's records, like UserHealthSeries.as_numpy"""
+        records = self.user_records(user_id, start, end)
+        return {'days': records['day'], **{metric: records[metric] for metric in METRICS}}
+
+    def to_series(self, user_id):
+        """Copy a user's records into a UserHealthSeries (None if they have none)"""
+        records = self.user_records(user_id)
+        if not len(records):
+            return None
+        series = UserHealthSeries()
+        series.days.frombytes(records['day'].astype('<i4').tobytes())
+        for metric in METRICS:
+            getattr(series, metric).frombytes(records[metric].astype('<f8').tobytes())
+        return series
+
+    def to_dict(self):
+        """Convert every record back to the {user_id: {date: stats}} JSON layout"""
+        data = {}
+        for user_id in self._users:
+            records = self.user_records(user_id)
+            columns = [records[metric].tolist() for metric in METRICS]
+            data[user_id] = {
+                ordinal_to_date(day): dict(zip(METRICS, values))
+                for day, *values in zip(records['day'].tolist(), *columns)
+            }
+        return data
+
+    def close(self):
+        self.records = None
+        try:
+            self._mmap.close()
+        except BufferError:
+            # Views handed out are still alive; the mapping goes when they do
+            pass
+        self._file.close()
+
+def write_binary(health_data, path=None):
+    """Write {user_id: {date: stats}} health data as a binary readings file"""
+    import numpy as np
+    path = path or config.HEALTH_BINARY_PATH
+    total = sum(len(history) for history in health_data.values())
+    records = np.zeros(total, dtype=record_dtype())
+    users = []
+    position = 0
+    for user_index, (user_id, history) in enumerate(health_data.items()):
+        dates = sorted(history)
+        chunk = records[position:position + len(dates)]
+        chunk['user'] = user_index
+        chunk['day'] = [date_to_ordinal(date) for date in dates]
+        for metric in METRICS:
+            chunk[metric] = [history[date].get(metric, 0.0) for date in dates]
+        users.append([user_id, position, len(dates)])
+        position += len(dates)
+
+    write_id = struct.unpack('<Q', os.urandom(8))[0]
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.tmp-', suffix='.bin', dir=directory)
+    try:
+        with os.fdopen(fd, 'wb') as f:
+            f.write(HEADER.pack(MAGIC, FORMAT_VERSION, len(users), total, write_id))
+            f.write(records.tobytes())
+            f.flush()
+            os.fsync(f.fileno())
+        # Readers compare the write ids, so opening between the two swaps is detected
+        write_json_atomic(index_path(path), {'records': total, 'users': users, 'write_id': write_id}, indent=None)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+    return total
+
+def convert_json_to_binary(health_path=None, binary_path=None):
+    """Convert the health data file (plus any journaled stats) to the binary format"""
+    with open(health_path or config.HEALTH_DATA_PATH, 'r') as f:
+        health_data = json.load(f)
+    if health_path is None:
+        from utils.journal import StatsJournal
+        StatsJournal('HEALTH_JOURNAL_PATH').replay(health_data)
+    return len(health_data), write_binary(health_data, binary_path)
+
+if __name__ == "__main__":
+    # python -m utils.binary_store convert
+    command = sys.argv[1] if len(sys.argv) > 1 else ''
+    if command == 'convert':
+        users, records = convert_json_to_binary()
+        print(f"Wrote {records} readings of {users} users to {config.HEALTH_BINARY_PATH}")
+    else:
+        print("Usage: python -m utils.binary_store convert")
+        sys.exit(1)
@@ -0,0 +1,39 @@
+import hashlib
+import json
+import config
+
+def command_tree_hash(tree) -> str:
+    """Hash of every registered app command's signature"""
+    payload = []
+    for command in tree.get_commands():
+        try:
+            payload.append(command.to_dict(tree))
+        except TypeError:
+            # discord.py < 2.4 doesn't take the tree
+            payload.append(command.to_dict())
+    payload.sort(key=lambda c: c.get('name', ''))
+    encoded = json.dumps(payload, sort_keys=True, default=str).encode()
+    return hashlib.sha256(encoded).hexdigest()
+
+def _read_last_hash():
+    try:
+        with open(config.COMMAND_SYNC_HASH_PATH, 'r') as f:
+            return f.read().strip()
+    except FileNotFoundError:
+        return None
+
+def _write_last_hash(digest):
+    with open(config.COMMAND_SYNC_HASH_PATH, 'w') as f:
+        f.write(digest)
+
+async def sync_if_changed(tree, force=False) -> bool:
+    """Sync the command tree only if the commands changed since the last sync.
+
+    Returns True if a sync was performed.
+    """
+    digest = command_tree_hash(tree)
+    if not force and digest == _read_last_hash():
+        return False
+    await tree.sync()
+    _write_last_hash(digest)
+    return True
@@ -0,0 +1,94 @@
+import bisect
+import datetime
+from typing import List
+from utils.data_manager import load_competitions, get_competitions_generation
+
+class CompetitionNameIndex:
+    """In-memory index of competition names for autocomplete.
+
+    Names are lowercased once and kept sorted, split into active and past
+    competitions. Prefix matches come from a bisect range; substring matches
+    are only scanned for when there aren't enough prefix matches. Active
+    competitions rank above past ones.
+    """
+    def __init__(self):
+        self._end_dates = {}
+        self._active = []
+        self._past = []
+        self._today = None
+        self._generation = None
+        self.rebuilds = 0
+
+    def _ensure_fresh(self):
+        if self._generation != get_competitions_generation():
+            self.rebuild()
+        today = datetime.date.today().isoformat()
+        if today != self._today:
+            self._partition(today)
+
+    def rebuild(self):
+        """Reload every competition name and end date"""
+        competitions = load_competitions()
+        self._end_dates = {name: data['end_date'] for name, data in competitions.items()}
+        self._generation = get_competitions_generation()
+        self._partition(datetime.date.today().isoformat())
+        self.rebuilds += 1
+
+    def _partition(self, today):
+        self._today = today
+        self._active = []
+        self._past = []
+        for name, end_date in self._end_dates.items():
+            bucket = self._active if end_date >= today else self._past
+            bucket.append((name.lower(), name))
+        self._active.sort()
+        self._past.sort()
+
+    def add(self, name, end_date):
+        """Index a newly created competition"""
+        self._ensure_fresh()
+        if name in self._end_dates:
+            return
+        self._end_dates[name] = end_date
+        bucket = self._active if end_date >= self._today else self._past
+        bisect.insort(bucket, (name.lower(), name))
+
+    @staticmethod
+    def _prefix_matches(bucket, query):
+        start = bisect.bisect_left(bucket, (query,))
+        matches = []
+        for lower, name in bucket[start:]:
+            if not lower.startswith(query):
+                break
+            matches.append(name)
+        return matches
+
+    def search(self, current: str, limit: int = 25) -> List[str]:
+        """Competition names matching `current`, best matches first"""
+        self._ensure_fresh()
+        query = current.lower()
+        results = []
+        for bucket in (self._active, self._past):
+            prefix = self._prefix_matches(bucket, query)
+            results.extend(prefix[:limit - len(results)])
+            if len(results) >= limit:
+                break
+            if query:
+                seen = set(prefix)
+                for lower, name in bucket:
+                    if query in lower and name not in seen:
+                        results.append(name)
+                        if len(results) >= limit:
+                            break
+            if len(results) >= limit:
+                break
+        return results
+
+_competition_index = None
+
+def get_competition_index():
+    """Get the shared competition name index"""
+    global _competition_index
+    if _competition_index is None:
+        _competition_index = CompetitionNameIndex()
+    return _competition_index
@@ -0,0 +1,103 @@
+import csv
+import datetime
+from dataclasses import dataclass, field
+from typing import Dict, Iterable, List, Optional, Sequence, Tuple
+import config
+
+REQUIRED_COLUMNS = ('date', 'weight', 'body_fat', 'muscle_mass', 'bmr')
+
+# Accepted range of each metric; anything outside is treated as a typo
+METRIC_LIMITS = {
+    'weight': (1.0, 2000.0),
+    'body_fat': (0.0, 100.0),
+    'muscle_mass': (1.0, 2000.0),
+    'bmr': (100.0, 20000.0)
+}
+
+class CSVImportError(Exception):
+    """The file as a whole can't be imported (bad header, too many rows...)"""
+    pass
+
+@dataclass(slots=True)
+class ImportResult:
+    readings: Dict[str, Dict[str, float]] = field(default_factory=dict)
+    errors: List[str] = field(default_factory=list)
+    already_logged: List[str] = field(default_factory=list)
+    rows: int = 0
+
+def normalize_column(name: str) -> str:
+    """'Body Fat' / 'body-fat' / ' BMR ' -> 'body_fat' / 'body_fat' / 'bmr'"""
+    return name.strip().lower().replace(' ', '_').replace('-', '_')
+
+def parse_stats_csv(lines: Iterable[str], existing_dates=(), today: Optional[datetime.date] = None,
+                    frozen_windows: Sequence[Tuple[str, str, str]] = ()) -> ImportResult:
+    """Validate CSV rows of readings one at a time.
+
+    `lines` is any iterable of text lines (e.g. a text stream), so the file is
+    never held as parsed rows all at once. Rows with problems are reported by
+    line number and skipped; dates already in `existing_dates` are skipped
+    and listed separately. `frozen_windows` are (name, start_date, end_date)
+    of ended competitions: their results are final, so rows dated inside one
+    are rejected. Raises CSVImportError if the header is unusable or the file
+    has too many rows.
+    """
+    today = today or datetime.date.today()
+    existing_dates = set(existing_dates)
+    result = ImportResult()
+    reader = csv.reader(lines)
+    header = next(reader, None)
+    if header is None:
+        raise CSVImportError("The file is empty.")
+    columns = [normalize_column(name) for name in header]
+    missing = [name for name in REQUIRED_COLUMNS if name not in columns]
+    if missing:
+        raise CSVImportError(
+            f"Missing column(s): {', '.join(missing)}. Expected a header like: {','.join(REQUIRED_COLUMNS)}"
+        )
+    positions = {name: columns.index(name) for name in REQUIRED_COLUMNS}
+
+    for row in reader:
+        if not any(cell.strip() for cell in row):
+            continue
+        result.rows += 1
+        if result.rows > config.IMPORT_MAX_ROWS:
+            raise CSVImportError(f"Too many rows (the limit is {config.IMPORT_MAX_ROWS}).")
+        line = reader.line_num
+        if len(row) < len(columns):
+            result.errors.append(f"Line {line}: expected {len(columns)} values, got {len(row)}")
+            continue
+
+        raw_date = row[positions['date']].strip()
+        try:
+            date = datetime.date.fromisoformat(raw_date)
+        except ValueError:
+            result.errors.append(f"Line {line}: invalid date '{raw_date}' (use YYYY-MM-DD)")
+            continue
+        if date > today:
+            result.errors.append(f"Line {line}: {raw_date} is in the future")
+            continue
+        date = date.isoformat()
+
+        stats = {}
+        for metric, (low, high) in METRIC_LIMITS.items():
+            raw = row[positions[metric]].strip()
+            try:
+                value = float(raw)
+            except ValueError:
+                result.errors.append(f"Line {line}: invalid {metric} '{raw}'")
+                break
+            if not low <= value <= high:
+                result.errors.append(f"Line {line}: {metric} {raw} is outside {low:g}-{high:g}")
+                break
+            stats[metric] = value
+        else:
+            frozen = next((name for name, start, end in frozen_windows if start <= date <= end), None)
+            if date in existing_dates:
+                result.already_logged.append(date)
+            elif frozen is not None:
+                result.errors.append(f"Line {line}: {date} is inside '{frozen}', which has ended")
+            elif date in result.readings:
+                result.errors.append(f"Line {line}: {date} appears more than once in the file")
+            else:
+                result.readings[date] = stats
+    return result
@@ -1,15 +1,205 @@
+import asyncio
 import json
 import os
 from pathlib import Path
 import config
+from utils.persistence import DebouncedWriter
+from utils.journal import StatsJournal
+from models.health_series import UserHealthSeries
+
+class DataCache:
+    """Process-wide in-memory copy of a JSON data file.
+
+    Reads are served from memory and the file is only parsed again when its
+    mtime or size changes underneath us. Writes update memory immediately and
+    are persisted by a debounced, atomic writer.
+    """
+    def __init__(self, path_setting, journal=None):
+        # Name of the config attribute holding the file path
+        self.path_setting = path_setting
+        # Optional journal replayed on load and folded in by each snapshot
+        self.journal = journal
+        self.data = None
+        self._signature = None
+        self.hits = 0
+        self.misses = 0
+        self.reloads = 0
+        # Bumped whenever the data is (re)loaded from disk
+        self.generation = 0
+        self.writer = DebouncedWriter(
+            lambda: self.path,
+            lambda: self.data,
+            lambda: config.SAVE_DEBOUNCE_SECONDS,
+            on_written=self._snapshot_written,
+            before_snapshot=journal.rotate if journal else None
+        )
+
+    @property
+    def path(self):
+        return getattr(config, self.path_setting)
+
+    def _file_signature(self):
+        try:
+            stat = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        return (stat.st_mtime_ns, stat.st_size)
+
+    def _snapshot_written(self):
+        self._signature = self._file_signature()
+        if self.journal:
+            self.journal.discard_rotated()
+
+    def _load(self, signature):
+        with open(self.path, 'r') as f:
+            self.data = json.load(f)
+        if self.journal:
+            self.journal.replay(self.data)
+        self._signature = signature
+        self.generation += 1
+
+    def read(self):
+        """Return the cached data, (re)loading it if the file changed"""
+        if self.data is not None and (self.writer.dirty or self.writer.writing):
+            # Unflushed changes in memory are newer than the file, and a file
+            # changed by our own in-flight write isn't an external change
+            self.hits += 1
+            return self.data
+        signature = self._file_signature()
+        if self.data is None:
+            self.misses += 1
+            self._load(signature)
+        elif signature != self._signature:
+            self.reloads += 1
+            self._load(signature)
+        else:
+            self.hits += 1
+        return self.data
+
+    def refresh(self):
+        """Reload the file if it changed underneath us (nothing to do before the first read)"""
+        if self.data is None or self.writer.dirty or self.writer.writing:
+            return
+        signature = self._file_signature()
+        if signature != self._signature:
+            self.reloads += 1
+            self._load(signature)
+
+    def write(self, data):
+        """Replace the cached data and schedule a write to disk"""
+        self.data = data
+        self.writer.schedule()
+
+    def invalidate(self):
+        """Drop the cached copy so the next read parses the file again"""
+        self.writer.flush_sync()
+        self.data = None
+        self._signature = None
+
+    def stats(self):
+        stats = {'hits': self.hits, 'misses': self.misses, 'reloads': self.reloads}
+        stats.update(self.writer.stats())
+        return stats
+
+_health_journal = StatsJournal('HEALTH_JOURNAL_PATH')
+_health_cache = DataCache('HEALTH_DATA_PATH', journal=_health_journal)
+_competitions_cache = DataCache('COMPETITIONS_PATH')
+
+_sqlite_store = None
+_shard_store = None
+
+# Per-user and per-competition change counters, used to key derived caches
+_user_versions = {}
+_competition_versions = {}
+_full_saves = {'health': 0, 'competitions': 0}
+
+def _bump(versions, key):
+    versions[key] = versions.get(key, 0) + 1
+
+def get_health_generation():
+    """Changes whenever the health data set is replaced as a whole"""
+    return (_health_cache.generation, _full_saves['health'])
+
+def get_user_version(user_id):
+    """Version of a user's health data; changes whenever their stats change"""
+    return get_health_generation() + (_user_versions.get(user_id, 0),)
+
+# Columnar per-user histories, kept in step with the user's data version
+_series_cache = {}
+
+def get_user_series(user_id):
+    """Get a user's history as a columnar UserHealthSeries (None if no data)"""
+    version = get_user_version(user_id)
+    cached = _series_cache.get(user_id)
+    if cached and cached[0] == version:
+        return cached[1]
+    history = get_user_stats(user_id)
+    if history is None:
+        _series_cache.pop(user_id, None)
+        return None
+    series = UserHealthSeries.from_dict(history)
+    _series_cache[user_id] = (version, series)
+    return series
+
+def _update_series(user_id, date, stats):
+    """Bump a user's version, patching their cached series in place if it's current"""
+    _update_series_many(user_id, {date: stats})
+
+def _update_series_many(user_id, readings):
+    cached = _series_cache.get(user_id)
+    current = cached is not None and cached[0] == get_user_version(user_id)
+    _bump(_user_versions, user_id)
+    if current:
+        for date, stats in readings.items():
+            cached[1].set(date, stats)
+        _series_cache[user_id] = (get_user_version(user_id), cached[1])
+
+def get_competitions_generation():
+    """Changes whenever the competitions data set is replaced as a whole"""
+    if not _sqlite():
+        # An edit to the file made outside the bot replaces it too
+        _competitions_cache.refresh()
+    return (_competitions_cache.generation, _full_saves['competitions'])
+
+def get_competition_version(name):
+    """Version of a competition's definition; changes when it is edited or joined"""
+    return get_competitions_generation() + (_competition_versions.get(name, 0),)
+
+def _sqlite():
+    """Get the shared SQLite store when the sqlite backend is selected"""
+    global _sqlite_store
+    if config.STORAGE_BACKEND != 'sqlite':
+        return None
+    if _sqlite_store is None:
+        from utils.sqlite_store import SQLiteStore
+        _sqlite_store = SQLiteStore(config.SQLITE_PATH)
+    return _sqlite_store
+
+def _shards():
+    """Get the per-user shard store when the sharded backend is selected"""
+    global _shard_store
+    if config.STORAGE_BACKEND != 'sharded':
+        return None
+    if _shard_store is None:
+        from utils.shard_store import ShardedHealthStore
+        _shard_store = ShardedHealthStore(config.HEALTH_SHARD_DIR)
+    return _shard_store
+
+def _health_store():
+    """The store backing health data, or None for the single JSON file"""
+    return _sqlite() or _shards()
 
 def initialize_data_files():
     """Create JSON files if they don't exist; add empty JSON"""
     # Create data directory if it doesn't exist
     Path("data").mkdir(exist_ok=True)
+
+    # The sqlite backend creates its own schema
+    if _sqlite():
+        return
     
-    # Initialize health data file
-    if not Path(config.HEALTH_DATA_PATH).exists():
+    # Initialize health data file (the shard store creates its own directory)
+    if not _shards() and not Path(config.HEALTH_DATA_PATH).exists():
         with open(config.HEALTH_DATA_PATH, 'w') as f:
             json.dump({}, f)
     
@@ -19,36 +209,204 @@ def initialize_data_files():
             json.dump({}, f)
 
 def load_health_data():
-    """Load the data from the health stat json"""
-    with open(config.HEALTH_DATA_PATH, 'r') as f:
-        return json.load(f)
+    """Load the data from the health stat json (served from memory when unchanged)"""
+    store = _health_store()
+    if store:
+        return store.load_health_data()
+    return _health_cache.read()
 
 def save_health_data(data):
     """Save to the health stat json"""
-    with open(config.HEALTH_DATA_PATH, 'w') as f:
-        json.dump(data, f, indent=2)
+    _full_saves['health'] += 1
+    store = _health_store()
+    if store:
+        store.save_health_data(data)
+        return
+    _health_cache.write(data)
+
+def record_stats(user_id, date, stats):
+    """Record a user's full stats for a date (journaled on the json backend)"""
+    _update_series(user_id, date, stats)
+    store = _health_store()
+    if store:
+        store.record_stats(user_id, date, stats)
+        return
+    data = load_health_data()
+    data.setdefault(user_id, {})[date] = dict(stats)
+    _health_journal.append({'op': 'log', 'user_id': user_id, 'date': date, 'stats': stats})
+
+def record_many(user_id, readings):
+    """Record a batch of {date: stats} readings for a user in one write"""
+    if not readings:
+        return
+    _update_series_many(user_id, readings)
+    store = _health_store()
+    if store:
+        store.record_many(user_id, readings)
+        return
+    data = load_health_data()
+    user_data = data.setdefault(user_id, {})
+    for date, stats in readings.items():
+        user_data[date] = dict(stats)
+    _health_journal.append({'op': 'import', 'user_id': user_id, 'readings': readings})
+
+def update_stats(user_id, date, changes):
+    """Update some of a user's stats for a date (journaled on the json backend)"""
+    _update_series(user_id, date, changes)
+    store = _health_store()
+    if store:
+        store.update_stats(user_id, date, changes)
+        return
+    data = load_health_data()
+    data.setdefault(user_id, {}).setdefault(date, {}).update(changes)
+    _health_journal.append({'op': 'edit', 'user_id': user_id, 'date': date, 'stats': changes})
+
+async def compact_journal():
+    """Fold the stats journal into a fresh health data snapshot"""
+    if _health_store():
+        return
+    load_health_data()
+    _health_cache.writer.schedule()
+    await _health_cache.writer.flush()
+
+async def journal_compaction_loop():
+    """Background task compacting the journal once it passes the size threshold"""
+    while True:
+        await asyncio.sleep(config.JOURNAL_COMPACT_CHECK_SECONDS)
+        if _health_journal.size() >= config.JOURNAL_COMPACT_BYTES:
+            try:
+                await compact_journal()
+            except Exception as e:
+                print(f"Journal compaction failed: {e}")
 
 def load_competitions():
-    """Load the data from the competition json"""
-    with open(config.COMPETITIONS_PATH, 'r') as f:
-        return json.load(f)
+    """Load the data from the competition json (served from memory when unchanged)"""
+    store = _sqlite()
+    if store:
+        return store.load_competitions()
+    return _competitions_cache.read()
 
 def save_competitions(data):
     """Save to the competition json"""
-    with open(config.COMPETITIONS_PATH, 'w') as f:
-        json.dump(data, f, indent=2)
+    _full_saves['competitions'] += 1
+    store = _sqlite()
+    if store:
+        store.save_competitions(data)
+        return
+    _competitions_cache.write(data)
+
+def get_competition(name):
+    """Get a single competition by name, or None if it doesn't exist"""
+    store = _sqlite()
+    if store:
+        return store.get_competition(name)
+    return load_competitions().get(name)
+
+def create_competition(name, competition):
+    """Store a new competition"""
+    _bump(_competition_versions, name)
+    store = _sqlite()
+    if store:
+        store.create_competition(name, competition)
+        return
+    competitions = load_competitions()
+    competitions[name] = competition
+    _competitions_cache.write(competitions)
+
+def add_participant(name, user_id, stats):
+    """Add a user and their starting stats to a competition"""
+    _bump(_competition_versions, name)
+    store = _sqlite()
+    if store:
+        store.add_participant(name, user_id, stats)
+        return
+    competitions = load_competitions()
+    competitions[name]['participants'][user_id] = stats
+    _competitions_cache.write(competitions)
+
+def get_cache_stats():
+    """Get hit/miss/reload counters for the in-memory data caches"""
+    stats = {
+        'health_data': _health_cache.stats(),
+        'journal': _health_journal.stats(),
+        'competitions': _competitions_cache.stats()
+    }
+    if _shards():
+        stats['health_shards'] = _shards().stats()
+    return stats
+
+async def flush():
+    """Write any pending data changes to disk (call before shutdown)"""
+    await _health_journal.sync_async()
+    await _health_cache.writer.flush()
+    await _competitions_cache.writer.flush()
+    if _shards():
+        await _shards().flush()
+
+def flush_sync():
+    """Write any pending data changes to disk from synchronous code"""
+    _health_journal.sync()
+    _health_cache.writer.flush_sync()
+    _competitions_cache.writer.flush_sync()
+    if _shards():
+        _shards().flush_sync()
+
+def invalidate_caches():
+    """Force the next load of every data file to re-read it from disk"""
+    _health_cache.invalidate()
+    _competitions_cache.invalidate()
+    if _shards():
+        _shards().invalidate()
 
 def get_competition_choices():
     """Get a list of competitions for dropdown menus"""
+    store = _sqlite()
+    if store:
+        return store.get_competition_names()
     competitions = load_competitions()
     return [name for name in competitions.keys()]
 
 def get_user_stats(user_id, date=None):
     """Get a user's stats for a specific date or all dates"""
+    store = _health_store()
+    if store:
+        return store.get_user_stats(user_id, date)
     data = load_health_data()
     if user_id not in data:
         return None
     
     if date:
         return data[user_id].get(date)
-    return data[user_id]
\ No newline at end of file
+    return data[user_id]
+
+_user_locks = {}
+
+def get_user_lock(user_id):
+    """asyncio.Lock for read-modify-write cycles on a user's stats.
+
+    On the sharded backend this is the lock of the user's shard, which its
+    writes also take.
+    """
+    store = _shards()
+    if store:
+        return store.lock(user_id)
+    lock = _user_locks.get(user_id)
+    if lock is None:
+        lock = _user_locks[user_id] = asyncio.Lock()
+    return lock
+
+def get_users_stats(user_ids, start_date=None, end_date=None):
+    """Get the history of several users, optionally limited to a date range"""
+    store = _health_store()
+    if store:
+        return store.get_users_stats(user_ids, start_date, end_date)
+    data = load_health_data()
+    result = {}
+    for user_id in user_ids:
+        if user_id not in data:
+            continue
+        result[user_id] = {
+            date: stats for date, stats in data[user_id].items()
+            if (not start_date or date >= start_date) and (not end_date or date <= end_date)
+        }
+    return result
\ No newline at end of file
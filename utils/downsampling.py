@@ -0,0 +1,118 @@
+import datetime
+import math
+from typing import Dict, Optional, Tuple
+from models.health_series import METRICS, EPOCH_ORDINAL, UserHealthSeries
+
+# /progress range presets, in days back from the end of the range (None means everything)
+PRESET_DAYS = {'30d': 30, '90d': 90, '1y': 365, 'all': None}
+
+ROLLUP_LABELS = {'weekly': 'weekly means', 'monthly': 'monthly means'}
+
+def resolve_range(preset: Optional[str] = None, start: Optional[str] = None, end: Optional[str] = None,
+                  today: Optional[datetime.date] = None) -> Tuple[Optional[str], Optional[str]]:
+    """Turn a preset and/or explicit dates into an inclusive (start, end) date range.
+
+    An explicit start wins over the preset, which otherwise counts back from
+    the end date (today by default). Raises ValueError on malformed dates or
+    a start after the end.
+    """
+    end_date = datetime.date.fromisoformat(end) if end else None
+    if start:
+        start = datetime.date.fromisoformat(start).isoformat()
+    elif PRESET_DAYS.get(preset):
+        anchor = end_date or today or datetime.date.today()
+        start = (anchor - datetime.timedelta(days=PRESET_DAYS[preset] - 1)).isoformat()
+    end = end_date.isoformat() if end_date else None
+    if start and end and start > end:
+        raise ValueError("start date is after end date")
+    return start or None, end or None
+
+def lttb_indices(x, y, threshold: int):
+    """Indices of the points kept by Largest-Triangle-Three-Buckets downsampling.
+
+    The first and last points are always kept; every bucket in between keeps
+    the point forming the largest triangle with the previously kept point and
+    the mean of the next bucket, which preserves peaks and trends.
+    """
+    import numpy as np
+    n = len(x)
+    if threshold >= n or threshold < 3:
+        return np.arange(n)
+    x = np.asarray(x, dtype=np.float64)
+    y = np.asarray(y, dtype=np.float64)
+    every = (n - 2) / (threshold - 2)
+    indices = np.empty(threshold, dtype=np.int64)
+    indices[0] = 0
+    indices[-1] = n - 1
+    a = 0
+    for i in range(threshold - 2):
+        next_start = int(math.floor((i + 1) * every)) + 1
+        next_end = min(int(math.floor((i + 2) * every)) + 1, n)
+        avg_x = x[next_start:next_end].mean()
+        avg_y = y[next_start:next_end].mean()
+        lo = int(math.floor(i * every)) + 1
+        hi = next_start
+        area = np.abs((x[a] - avg_x) * (y[lo:hi] - y[a]) - (x[a] - x[lo:hi]) * (avg_y - y[a]))
+        a = lo + int(np.argmax(area))
+        indices[i + 1] = a
+    return indices
+
+def rollup_columns(columns: Dict, period: str) -> Dict:
+    """Average day-ordinal columns (as from UserHealthSeries.as_numpy) per week or month.
+
+    Each bucket is dated by its first day (weeks start on Monday).
+    """
+    import numpy as np
+    days = columns['days'].astype(np.int64)
+    if not len(days):
+        return {name: column[:0] for name, column in columns.items()}
+    if period == 'weekly':
+        # Day ordinal 1 (0001-01-01) was a Monday
+        keys = (days - 1) // 7
+        starts = keys * 7 + 1
+    elif period == 'monthly':
+        months = (days - EPOCH_ORDINAL).astype('datetime64[D]').astype('datetime64[M]')
+        keys = months.astype(np.int64)
+        starts = months.astype('datetime64[D]').astype(np.int64) + EPOCH_ORDINAL
+    else:
+        raise ValueError(f"Unknown rollup period: {period}")
+    # Days are sorted, so each bucket is one contiguous run
+    first = np.concatenate(([0], np.flatnonzero(np.diff(keys)) + 1))
+    counts = np.diff(np.append(first, len(days)))
+    result = {'days': starts[first].astype(np.int32)}
+    for metric in METRICS:
+        result[metric] = np.add.reduceat(columns[metric], first) / counts
+    return result
+
+class DownsampledSeries:
+    """Per-metric (day ordinals, values) points prepared for plotting"""
+    __slots__ = ('points', 'note')
+
+    def __init__(self, points: Dict, note: Optional[str] = None):
+        self.points = points
+        self.note = note
+
+    def __len__(self):
+        return max((len(days) for days, _ in self.points.values()), default=0)
+
+def prepare_progress_series(series: UserHealthSeries, metrics, max_points: int,
+                            rollup: Optional[str] = None):
+    """Fit a series to the graph's point budget.
+
+    Returns the series itself when it's short enough and no rollup is asked
+    for; otherwise a DownsampledSeries holding, for each requested metric,
+    the rolled-up and/or LTTB-downsampled points.
+    """
+    if rollup is None and len(series) <= max_points:
+        return series
+    columns = series.as_numpy()
+    if rollup:
+        columns = rollup_columns(columns, rollup)
+    notes = [ROLLUP_LABELS[rollup]] if rollup else []
+    if len(columns['days']) > max_points:
+        notes.append(f"downsampled to {max_points} points")
+    points = {}
+    for metric in metrics:
+        keep = lttb_indices(columns['days'], columns[metric], max_points)
+        points[metric] = (columns['days'][keep], columns[metric][keep])
+    return DownsampledSeries(points, ", ".join(notes) or None)
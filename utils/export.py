@@ -0,0 +1,146 @@
+import csv
+import gzip
+import io
+import json
+import discord
+from typing import Dict, Iterable, Iterator, Optional, Sequence, Tuple
+import config
+from models.health_series import METRICS, ordinal_to_date
+
+EXPORT_FORMATS = {'csv': '.csv', 'jsonl.gz': '.jsonl.gz'}
+FORMAT_CHOICES = [('CSV', 'csv'), ('Gzipped JSON Lines', 'jsonl.gz')]
+
+USER_FIELDS = ('date',) + METRICS
+COMPETITION_FIELDS = ('user_id', 'name', 'date') + METRICS + (
+    'points', 'body_fat_points', 'muscle_mass_points', 'bmr_points'
+)
+
+# Encoded rows are handed to a part in chunks of about this many bytes
+CHUNK_BYTES = 64 * 1024
+# Room left in every part for the gzip trailer and the final flush
+PART_OVERHEAD = 1024
+
+def user_rows(series, start: Optional[str] = None, end: Optional[str] = None) -> Iterator[Tuple]:
+    """(date, weight, body_fat, muscle_mass, bmr) rows of a UserHealthSeries"""
+    lo, hi = series.index_range(start, end)
+    columns = [getattr(series, metric) for metric in METRICS]
+    for i in range(lo, hi):
+        yield (ordinal_to_date(series.days[i]),) + tuple(column[i] for column in columns)
+
+def competition_rows(series_by_user: Dict, user_names: Dict, until: Optional[str] = None) -> Iterator[Tuple]:
+    """One row per participant per logged date: readings plus the points they earned"""
+    for user_id, participant in list(series_by_user.items()):
+        name = user_names.get(user_id, user_id)
+        # Copies, so stats scored while earlier rows are uploading don't shift this participant's rows
+        columns = zip(
+            participant.dates[:], participant.stats[:], participant.points[:],
+            participant.body_fat_points[:], participant.muscle_mass_points[:], participant.bmr_points[:]
+        )
+        for date, stats, points, bf_points, mm_points, bmr_points in columns:
+            if until and date > until:
+                break
+            yield (
+                user_id, name, date, stats.weight, stats.body_fat, stats.muscle_mass, stats.bmr,
+                points, bf_points, mm_points, bmr_points
+            )
+
+def _csv_line(row: Sequence) -> bytes:
+    out = io.StringIO()
+    csv.writer(out, lineterminator='\n').writerow(row)
+    return out.getvalue().encode()
+
+class _Part:
+    """One attachment being filled; gzip parts are sync-flushed so their size is exact"""
+    def __init__(self, fmt: str, header: bytes):
+        self.buffer = io.BytesIO()
+        self.gzip = gzip.GzipFile(fileobj=self.buffer, mode='wb', mtime=0) if fmt == 'jsonl.gz' else None
+        self.rows = 0
+        if header:
+            self.write(header, 0)
+
+    def size(self) -> int:
+        return self.buffer.tell()
+
+    def write(self, data: bytes, rows: int):
+        if self.gzip:
+            self.gzip.write(data)
+            self.gzip.flush()
+        else:
+            self.buffer.write(data)
+        self.rows += rows
+
+    def finish(self) -> bytes:
+        if self.gzip:
+            self.gzip.close()
+        return self.buffer.getvalue()
+
+def iter_export_parts(rows: Iterable[Sequence], fields: Sequence[str], fmt: str, base_name: str,
+                      max_bytes: int) -> Iterator[Tuple[str, bytes, int]]:
+    """Encode rows into (filename, data, row count) parts of at most `max_bytes` each.
+
+    Rows are encoded one at a time and written to the current part in
+    chunks, and each part is yielded as soon as it's full, so only the part
+    being filled is held here. CSV parts each start with the header row.
+    With more than one part, file names are numbered (base-part1.csv, ...).
+    """
+    if fmt == 'csv':
+        header = _csv_line(fields)
+        encode = _csv_line
+    else:
+        header = b''
+        encode = lambda row: (json.dumps(dict(zip(fields, row))) + '\n').encode()
+    extension = EXPORT_FORMATS[fmt]
+
+    part = _Part(fmt, header)
+    pending = []
+    pending_bytes = 0
+    number = 0
+    for row in rows:
+        line = encode(row)
+        # Start a new part when this row would overflow the current one
+        if (part.rows or pending) and part.size() + pending_bytes + len(line) + PART_OVERHEAD > max_bytes:
+            part.write(b''.join(pending), len(pending))
+            pending, pending_bytes = [], 0
+            # More rows follow, so this file is one of several. The finished
+            # buffer is dropped before yielding so only its bytes stay alive
+            number += 1
+            data, count = part.finish(), part.rows
+            part = _Part(fmt, header)
+            yield f"{base_name}-part{number}{extension}", data, count
+            del data
+        pending.append(line)
+        pending_bytes += len(line)
+        if pending_bytes >= CHUNK_BYTES:
+            part.write(b''.join(pending), len(pending))
+            pending, pending_bytes = [], 0
+    part.write(b''.join(pending), len(pending))
+    name = f"{base_name}-part{number + 1}{extension}" if number else f"{base_name}{extension}"
+    yield name, part.finish(), part.rows
+
+def upload_limit(guild=None) -> int:
+    """Largest attachment we'll send: the configured cap, or the guild's limit if lower"""
+    limit = config.EXPORT_MAX_PART_BYTES
+    if guild is not None:
+        limit = min(limit, guild.filesize_limit)
+    return limit
+
+def export_file_name(*parts: str) -> str:
+    """Build a file-system-safe base name like 'stats-1234-2025-01-01'"""
+    name = '-'.join(part for part in parts if part)
+    return ''.join(c if c.isalnum() or c in '-_.' else '_' for c in name)[:80]
+
+async def send_export(interaction, parts, description: str):
+    """Send each part as its own follow-up as soon as it's encoded; returns (files, rows)"""
+    files = rows = 0
+    for filename, data, count in parts:
+        files += 1
+        rows += count
+        await interaction.followup.send(
+            content=description if files == 1 else None,
+            file=discord.File(io.BytesIO(data), filename=filename)
+        )
+        # Release this part before the next one is encoded
+        del data
+    if files > 1:
+        await interaction.followup.send(f"Export complete: {rows} rows in {files} files.")
+    return files, rows
@@ -0,0 +1,162 @@
+import asyncio
+import json
+import os
+import config
+
+class StatsJournal:
+    """Append-only JSONL journal of stat log/edit/import events.
+
+    Each /logstats or /editstats call appends one line instead of rewriting the
+    whole health data file. Appends are flushed to the OS immediately and
+    fsync'd in batches. The journal is replayed on top of the last snapshot
+    when the data is loaded, and folded into a new snapshot by compaction.
+    """
+    def __init__(self, path_setting):
+        # Name of the config attribute holding the journal path
+        self.path_setting = path_setting
+        self._file = None
+        self._fsync_handle = None
+        self.pending_fsync = 0
+        self.appends = 0
+        self.fsyncs = 0
+        self.compactions = 0
+
+    @property
+    def path(self):
+        return getattr(config, self.path_setting)
+
+    @property
+    def rotated_path(self):
+        return self.path + '.1'
+
+    def _open(self):
+        if self._file is None:
+            self._file = open(self.path, 'a')
+        return self._file
+
+    def append(self, event):
+        """Append one event and schedule a batched fsync"""
+        f = self._open()
+        f.write(json.dumps(event) + '\n')
+        f.flush()
+        self.appends += 1
+        self.pending_fsync += 1
+
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.sync()
+            return
+        if self.pending_fsync >= config.JOURNAL_FSYNC_BATCH:
+            loop.create_task(self.sync_async())
+        elif self._fsync_handle is None:
+            self._fsync_handle = loop.call_later(
+                config.JOURNAL_FSYNC_INTERVAL,
+                lambda: loop.create_task(self.sync_async())
+            )
+
+    def _cancel_pending(self):
+        if self._fsync_handle is not None:
+            self._fsync_handle.cancel()
+            self._fsync_handle = None
+
+    def sync(self):
+        """fsync all appended events now"""
+        self._cancel_pending()
+        if self._file is None or not self.pending_fsync:
+            return
+        self.pending_fsync = 0
+        os.fsync(self._file.fileno())
+        self.fsyncs += 1
+
+    async def sync_async(self):
+        """fsync all appended events in a worker thread"""
+        self._cancel_pending()
+        if self._file is None or not self.pending_fsync:
+            return
+        self.pending_fsync = 0
+        try:
+            await asyncio.to_thread(os.fsync, self._file.fileno())
+        except (OSError, ValueError):
+            # The file was rotated (and synced) while we were waiting
+            return
+        self.fsyncs += 1
+
+    def size(self):
+        """Bytes of journal not yet folded into a snapshot"""
+        total = 0
+        for path in (self.rotated_path, self.path):
+            try:
+                total += os.path.getsize(path)
+            except FileNotFoundError:
+                pass
+        return total
+
+    def rotate(self):
+        """Move the live journal aside before a snapshot is taken.
+
+        Everything in the rotated file is contained in the snapshot, so it can
+        be discarded once the snapshot is safely on disk. If a previous
+        compaction failed the live journal is appended to the rotated one.
+        """
+        if self._file is not None:
+            self.sync()
+            self._file.close()
+            self._file = None
+        if not os.path.exists(self.path):
+            return
+        if os.path.exists(self.rotated_path):
+            with open(self.path, 'r') as src, open(self.rotated_path, 'a') as dst:
+                dst.write(src.read())
+                dst.flush()
+                os.fsync(dst.fileno())
+            os.unlink(self.path)
+        else:
+            os.replace(self.path, self.rotated_path)
+
+    def discard_rotated(self):
+        """Drop the rotated journal after its snapshot has been written"""
+        try:
+            os.unlink(self.rotated_path)
+        except FileNotFoundError:
+            return
+        self.compactions += 1
+
+    def replay(self, data):
+        """Apply every journaled event on top of snapshot data"""
+        for path in (self.rotated_path, self.path):
+            try:
+                f = open(path, 'r')
+            except FileNotFoundError:
+                continue
+            with f:
+                for line in f:
+                    line = line.strip()
+                    if not line:
+                        continue
+                    try:
+                        event = json.loads(line)
+                    except json.JSONDecodeError:
+                        # Torn final line from a crash mid-append
+                        continue
+                    apply_event(data, event)
+        return data
+
+    def stats(self):
+        return {
+            'appends': self.appends,
+            'fsyncs': self.fsyncs,
+            'compactions': self.compactions,
+            'bytes': self.size()
+        }
+
+def apply_event(data, event):
+    """Apply a single journal event to the health data dict"""
+    user_data = data.setdefault(event['user_id'], {})
+    if event['op'] == 'log':
+        user_data[event['date']] = dict(event['stats'])
+    elif event['op'] == 'edit':
+        user_data.setdefault(event['date'], {}).update(event['stats'])
+    elif event['op'] == 'import':
+        for date, stats in event['readings'].items():
+            user_data[date] = dict(stats)
@@ -0,0 +1,336 @@
+import datetime
+import random
+from typing import Dict, Iterable, List, Optional, Tuple
+from utils.data_manager import get_health_generation, get_competitions_generation, get_competition_version
+from utils.repository import get_competition_repository
+from utils.scoring import get_scoring_engine
+from utils.standings import rank_standings
+
+PODIUM_SIZE = 3
+
+class _Last:
+    """Sorts after every key; the value of the skip list's tail sentinel"""
+    def __lt__(self, other):
+        return False
+
+    def __le__(self, other):
+        return False
+
+class _Node:
+    __slots__ = ('key', 'links', 'widths')
+
+    def __init__(self, key, level: int):
+        self.key = key
+        self.links = [None] * level
+        # How many positions each link skips
+        self.widths = [1] * level
+
+class RankedSkipList:
+    """Sorted, distinct keys with positional access.
+
+    An indexable skip list: every link records how many keys it skips, so
+    insert, remove, rank (position of a key) and select (key at a position)
+    all take O(log n) expected time.
+    """
+    MAX_LEVEL = 32
+
+    def __init__(self):
+        self._tail = _Node(_Last(), 0)
+        self._head = _Node(None, self.MAX_LEVEL)
+        self._head.links = [self._tail] * self.MAX_LEVEL
+        self._size = 0
+
+    def __len__(self):
+        return self._size
+
+    def _chain(self, key):
+        """The last node before `key` on every level, and its position"""
+        chain = [None] * self.MAX_LEVEL
+        positions = [0] * self.MAX_LEVEL
+        node = self._head
+        position = 0
+        for level in reversed(range(self.MAX_LEVEL)):
+            while node.links[level].key < key:
+                position += node.widths[level]
+                node = node.links[level]
+            chain[level] = node
+            positions[level] = position
+        return chain, positions
+
+    def insert(self, key):
+        chain, positions = self._chain(key)
+        level = 1
+        while level < self.MAX_LEVEL and random.random() < 0.5:
+            level += 1
+        node = _Node(key, level)
+        # The new node sits at position positions[0] + 1 (the head is position 0)
+        for i in range(level):
+            previous = chain[i]
+            skipped = positions[0] - positions[i]
+            node.links[i] = previous.links[i]
+            node.widths[i] = previous.widths[i] - skipped
+            previous.links[i] = node
+            previous.widths[i] = skipped + 1
+        for i in range(level, self.MAX_LEVEL):
+            chain[i].widths[i] += 1
+        self._size += 1
+
+    def remove(self, key):
+        chain, _ = self._chain(key)
+        node = chain[0].links[0]
+        if node is self._tail or node.key != key:
+            raise KeyError(key)
+        for i in range(len(node.links)):
+            previous = chain[i]
+            previous.widths[i] += node.widths[i] - 1
+            previous.links[i] = node.links[i]
+        for i in range(len(node.links), self.MAX_LEVEL):
+            chain[i].widths[i] -= 1
+        self._size -= 1
+
+    def rank(self, key) -> int:
+        """0-based position `key` has (or would have)"""
+        _, positions = self._chain(key)
+        return positions[0]
+
+    def slice(self, start: int, count: int) -> List:
+        """Up to `count` keys from position `start` on"""
+        if start >= self._size or count <= 0:
+            return []
+        # Walk down to the node just before `start`, then along the bottom level
+        remaining = start
+        node = self._head
+        for level in reversed(range(self.MAX_LEVEL)):
+            while node.links[level] is not self._tail and node.widths[level] <= remaining:
+                remaining -= node.widths[level]
+                node = node.links[level]
+        keys = []
+        node = node.links[0]
+        while node is not self._tail and len(keys) < count:
+            keys.append(node.key)
+            node = node.links[0]
+        return keys
+
+class LeaderboardEntry:
+    """One user's totals across every competition they have points in"""
+    __slots__ = ('user_id', 'points', 'wins', 'podiums', 'competitions')
+
+    def __init__(self, user_id: str):
+        self.user_id = user_id
+        self.points = 0.0
+        self.wins = 0
+        self.podiums = 0
+        self.competitions = 0
+
+# Sort keys for each ranking; later fields break ties
+ORDERS = {
+    'points': lambda e: (-round(e.points, 6), -e.wins, -e.podiums, e.user_id),
+    'wins': lambda e: (-e.wins, -e.podiums, -round(e.points, 6), e.user_id),
+    'podiums': lambda e: (-e.podiums, -e.wins, -round(e.points, 6), e.user_id)
+}
+
+class LeaderboardEngine:
+    """All-time leaderboard across competitions, kept current incrementally.
+
+    Each competition contributes its participants' current points and, once
+    it has ended, a win and podium places. Totals live in one ranked skip
+    list per ordering, so a score change repositions only the affected
+    users, and top-K pages and a user's rank are O(log n). Built from the
+    competitions and health data on first use, and rebuilt if the health
+    data is replaced wholesale.
+    """
+    def __init__(self):
+        self._entries: Dict[str, LeaderboardEntry] = {}
+        self._indexes = {order: RankedSkipList() for order in ORDERS}
+        # name -> {user_id: points} and name -> podium user ids (ended competitions only)
+        self._competition_points = {}
+        self._podiums = {}
+        # name -> (competition version, ended) the contributions were computed at
+        self._counted = {}
+        # user_id -> {name: (start_date, end_date)} of the competitions they're in
+        self._windows = {}
+        self._health_generation = None
+        self._competitions_generation = None
+        self._today = None
+        self.builds = 0
+        self.updates = 0
+
+    def _ensure_fresh(self):
+        if self._health_generation != get_health_generation():
+            self.rebuild()
+            return
+        today = datetime.date.today()
+        if self._competitions_generation != get_competitions_generation() or today != self._today:
+            self._sync(today)
+
+    def rebuild(self):
+        """Recompute every competition's contribution from scratch"""
+        self._entries.clear()
+        self._indexes = {order: RankedSkipList() for order in ORDERS}
+        self._competition_points.clear()
+        self._podiums.clear()
+        self._counted.clear()
+        self._windows.clear()
+        self._sync(datetime.date.today())
+        # Taken after scoring, which may have been what loaded the health data
+        self._health_generation = get_health_generation()
+        self.builds += 1
+
+    def _sync(self, today):
+        """Re-count competitions that were created, joined or ended since last time"""
+        self._today = today
+        self._competitions_generation = get_competitions_generation()
+        competitions = {competition.name: competition for competition in get_competition_repository().all()}
+        for name in list(self._counted):
+            if name not in competitions:
+                self._drop(name)
+        for name, competition in competitions.items():
+            state = (get_competition_version(name), competition.has_ended(today))
+            if self._counted.get(name) != state:
+                self._score(competition)
+                self._counted[name] = state
+
+    def _adjust(self, user_id, points=0.0, wins=0, podiums=0, competitions=0):
+        """Apply deltas to one user's totals and reposition them in every ranking"""
+        entry = self._entries.get(user_id)
+        if entry is None:
+            entry = self._entries[user_id] = LeaderboardEntry(user_id)
+        else:
+            for order, index in self._indexes.items():
+                index.remove(ORDERS[order](entry))
+        entry.points += points
+        entry.wins += wins
+        entry.podiums += podiums
+        entry.competitions += competitions
+        if entry.competitions <= 0:
+            del self._entries[user_id]
+            return
+        for order, index in self._indexes.items():
+            index.insert(ORDERS[order](entry))
+
+    def _score(self, competition, user_ids: Optional[Iterable[str]] = None):
+        """Bring a competition's contribution up to date for some (default all) participants"""
+        name = competition.name
+        series = get_scoring_engine().get_competition_series(competition)
+        until = min(self._today, competition.end).isoformat()
+        points = self._competition_points.setdefault(name, {})
+        if user_ids is None:
+            for user_id in series:
+                self._windows.setdefault(user_id, {})[name] = (competition.start_date, competition.end_date)
+        deltas = {}
+        for user_id in (series if user_ids is None else user_ids):
+            latest = series[user_id].latest(until) if user_id in series else None
+            new = None if latest is None else latest[2].total
+            old = points.get(user_id)
+            if new == old:
+                continue
+            if new is None:
+                del points[user_id]
+            else:
+                points[user_id] = new
+            deltas[user_id] = [(new or 0.0) - (old or 0.0), 0, 0, (new is not None) - (old is not None)]
+        if user_ids is None:
+            # Participants no longer in the competition
+            for user_id in [user_id for user_id in points if user_id not in series]:
+                deltas[user_id] = [-points.pop(user_id), 0, 0, -1]
+
+        old_podium = self._podiums.get(name, [])
+        new_podium = []
+        if competition.has_ended(self._today):
+            new_podium = [user_id for user_id, _ in rank_standings(series, until, k=PODIUM_SIZE)]
+        if new_podium != old_podium:
+            self._podiums[name] = new_podium
+            for user_id in set(old_podium) | set(new_podium):
+                delta = deltas.setdefault(user_id, [0.0, 0, 0, 0])
+                delta[1] += (new_podium[:1] == [user_id]) - (old_podium[:1] == [user_id])
+                delta[2] += (user_id in new_podium) - (user_id in old_podium)
+
+        for user_id, (points_delta, wins, podiums, competitions) in deltas.items():
+            self._adjust(user_id, points_delta, wins, podiums, competitions)
+
+    def _drop(self, name):
+        points = self._competition_points.pop(name, {})
+        podium = self._podiums.pop(name, [])
+        self._counted.pop(name, None)
+        for windows in self._windows.values():
+            windows.pop(name, None)
+        for user_id in set(points) | set(podium):
+            self._adjust(
+                user_id, -points.get(user_id, 0.0), -(podium[:1] == [user_id]),
+                -(user_id in podium), -(user_id in points)
+            )
+
+    def competition_changed(self, name):
+        """Re-count a competition that was just created or joined"""
+        if self._health_generation is None:
+            return
+        self._ensure_fresh()
+        competition = get_competition_repository().get(name)
+        if competition is None:
+            self._drop(name)
+            return
+        self._score(competition)
+        self._counted[name] = (get_competition_version(name), competition.has_ended(self._today))
+
+    def update_user(self, user_id, dates: Iterable[str]):
+        """Re-count one user in the competitions whose windows hold any of the changed dates"""
+        if self._health_generation is None:
+            # Not built yet; built on first use
+            return
+        self._ensure_fresh()
+        dates = list(dates)
+        repository = get_competition_repository()
+        for name, (start_date, end_date) in list(self._windows.get(user_id, {}).items()):
+            if not any(start_date <= date <= end_date for date in dates):
+                continue
+            competition = repository.get(name)
+            if competition is not None:
+                self._score(competition, [user_id])
+                self.updates += 1
+
+    def top(self, order: str = 'points', start: int = 0, count: int = 10) -> List[Tuple[int, LeaderboardEntry]]:
+        """(rank, entry) for `count` users from 0-based position `start`"""
+        self._ensure_fresh()
+        keys = self._indexes[order].slice(start, count)
+        # Every key ends with the user id
+        return [(start + i + 1, self._entries[key[-1]]) for i, key in enumerate(keys)]
+
+    def rank_of(self, user_id, order: str = 'points') -> Optional[Tuple[int, LeaderboardEntry]]:
+        """A user's 1-based (rank, entry), or None if they have no points anywhere"""
+        self._ensure_fresh()
+        entry = self._entries.get(user_id)
+        if entry is None:
+            return None
+        return self._indexes[order].rank(ORDERS[order](entry)) + 1, entry
+
+    def __len__(self):
+        self._ensure_fresh()
+        return len(self._entries)
+
+    def invalidate(self):
+        self._health_generation = None
+
+    def stats(self):
+        return {'users': len(self._entries), 'builds': self.builds, 'updates': self.updates}
+
+_leaderboard = None
+
+def get_leaderboard():
+    """Get the shared leaderboard engine"""
+    global _leaderboard
+    if _leaderboard is None:
+        _leaderboard = LeaderboardEngine()
+    return _leaderboard
+
+if __name__ == "__main__":
+    # python -m utils.leaderboard [points|wins|podiums]: rebuild from the data files and print the top
+    import sys
+    order = sys.argv[1] if len(sys.argv) > 1 else 'points'
+    if order not in ORDERS:
+        print("Usage: python -m utils.leaderboard [points|wins|podiums]")
+        sys.exit(1)
+    board = get_leaderboard()
+    board.rebuild()
+    for rank, entry in board.top(order, 0, 25):
+        print(f"{rank:>3}. {entry.user_id}: {entry.points:.2f} points, {entry.wins} wins, "
+              f"{entry.podiums} podiums ({entry.competitions} competitions)")
@@ -0,0 +1,215 @@
+import asyncio
+import bisect
+import contextvars
+import functools
+import os
+import tempfile
+import time
+from contextlib import contextmanager
+import config
+
+# Upper bounds (seconds) of the latency histogram buckets; the last one is +Inf
+BUCKETS = (0.001, 0.0025, 0.005, 0.01, 0.025, 0.05, 0.1, 0.25, 0.5, 1.0, 2.5, 5.0, 10.0, 30.0, float('inf'))
+
+class Histogram:
+    """Fixed-bucket latency histogram; constant memory however many samples it sees"""
+    __slots__ = ('counts', 'count', 'sum', 'max')
+
+    def __init__(self):
+        self.counts = [0] * len(BUCKETS)
+        self.count = 0
+        self.sum = 0.0
+        self.max = 0.0
+
+    def observe(self, seconds):
+        self.counts[bisect.bisect_left(BUCKETS, seconds)] += 1
+        self.count += 1
+        self.sum += seconds
+        if seconds > self.max:
+            self.max = seconds
+
+    def quantile(self, q):
+        """Estimate the q-quantile by interpolating inside its bucket"""
+        if not self.count:
+            return 0.0
+        rank = q * self.count
+        seen = 0
+        for i, bucket_count in enumerate(self.counts):
+            if seen + bucket_count >= rank and bucket_count:
+                lower = BUCKETS[i - 1] if i else 0.0
+                upper = min(BUCKETS[i], self.max)
+                if upper <= lower:
+                    return upper
+                return lower + (upper - lower) * (rank - seen) / bucket_count
+            seen += bucket_count
+        return self.max
+
+class CommandMetrics:
+    """Per-command call/error counters and per-phase latency histograms"""
+    def __init__(self):
+        self.calls = {}
+        self.errors = {}
+        self.phases = {}  # (command, phase) -> Histogram
+        self.started = time.time()
+
+    def observe(self, command, phase, seconds):
+        histogram = self.phases.get((command, phase))
+        if histogram is None:
+            histogram = self.phases[(command, phase)] = Histogram()
+        histogram.observe(seconds)
+
+    def record_call(self, command, seconds, failed):
+        self.calls[command] = self.calls.get(command, 0) + 1
+        if failed:
+            self.errors[command] = self.errors.get(command, 0) + 1
+        self.observe(command, 'total', seconds)
+
+    def summary(self):
+        """{command: {'calls', 'errors', 'phases': {phase: {count, p50, p95, p99, max}}}}"""
+        result = {}
+        for command in sorted(self.calls):
+            result[command] = {
+                'calls': self.calls[command],
+                'errors': self.errors.get(command, 0),
+                'phases': {}
+            }
+        for (command, phase), histogram in sorted(self.phases.items()):
+            entry = result.setdefault(command, {'calls': 0, 'errors': 0, 'phases': {}})
+            entry['phases'][phase] = {
+                'count': histogram.count,
+                'p50': histogram.quantile(0.50),
+                'p95': histogram.quantile(0.95),
+                'p99': histogram.quantile(0.99),
+                'max': histogram.max
+            }
+        return result
+
+    def to_prometheus(self):
+        """Render everything in the Prometheus text exposition format"""
+        lines = [
+            "# HELP bot_command_calls_total Slash command invocations.",
+            "# TYPE bot_command_calls_total counter"
+        ]
+        for command, calls in sorted(self.calls.items()):
+            lines.append(f'bot_command_calls_total{{command="{command}"}} {calls}')
+        lines += [
+            "# HELP bot_command_errors_total Slash command invocations that raised.",
+            "# TYPE bot_command_errors_total counter"
+        ]
+        for command in sorted(self.calls):
+            lines.append(f'bot_command_errors_total{{command="{command}"}} {self.errors.get(command, 0)}')
+        lines += [
+            "# HELP bot_command_phase_seconds Time spent in each phase of a slash command.",
+            "# TYPE bot_command_phase_seconds histogram"
+        ]
+        for (command, phase), histogram in sorted(self.phases.items()):
+            labels = f'command="{command}",phase="{phase}"'
+            cumulative = 0
+            for bound, bucket_count in zip(BUCKETS, histogram.counts):
+                cumulative += bucket_count
+                le = "+Inf" if bound == float('inf') else repr(bound)
+                lines.append(f'bot_command_phase_seconds_bucket{{{labels},le="{le}"}} {cumulative}')
+            lines.append(f'bot_command_phase_seconds_sum{{{labels}}} {histogram.sum:.6f}')
+            lines.append(f'bot_command_phase_seconds_count{{{labels}}} {histogram.count}')
+        lines += [
+            "# HELP bot_start_time_seconds Unix time the metrics were started.",
+            "# TYPE bot_start_time_seconds gauge",
+            f"bot_start_time_seconds {self.started:.0f}"
+        ]
+        return "\n".join(lines) + "\n"
+
+    def reset(self):
+        self.calls.clear()
+        self.errors.clear()
+        self.phases.clear()
+
+_metrics = CommandMetrics()
+
+def get_metrics():
+    return _metrics
+
+# Name of the command running in the current task, so phase() knows where to record
+_current_command = contextvars.ContextVar('current_command', default=None)
+
+def instrumented(func):
+    """Time an app command callback, counting calls and errors.
+
+    Apply it directly to the coroutine, under the app_commands decorators.
+    """
+    command = func.__name__
+
+    @functools.wraps(func)
+    async def wrapper(*args, **kwargs):
+        token = _current_command.set(command)
+        start = time.perf_counter()
+        failed = True
+        try:
+            result = await func(*args, **kwargs)
+            failed = False
+            return result
+        finally:
+            _metrics.record_call(command, time.perf_counter() - start, failed)
+            _current_command.reset(token)
+    return wrapper
+
+@contextmanager
+def phase(name):
+    """Time a block as one phase of the current command (no-op outside one)"""
+    command = _current_command.get()
+    start = time.perf_counter()
+    try:
+        yield
+    finally:
+        if command is not None:
+            _metrics.observe(command, name, time.perf_counter() - start)
+
+def cache_stats():
+    """{cache: {counter: value}} for the bot's in-memory caches"""
+    from utils.data_manager import get_cache_stats
+    from utils.render_cache import get_render_cache
+    stats = get_cache_stats()
+    stats['render'] = get_render_cache().stats()
+    return stats
+
+def caches_to_prometheus(stats):
+    """Render cache counters in the Prometheus text exposition format"""
+    lines = [
+        "# HELP bot_cache_stat Counters and sizes of the bot's in-memory caches.",
+        "# TYPE bot_cache_stat gauge"
+    ]
+    for cache, counters in sorted(stats.items()):
+        for name, value in sorted(counters.items()):
+            lines.append(f'bot_cache_stat{{cache="{cache}",stat="{name}"}} {float(value)}')
+    return "\n".join(lines) + "\n"
+
+def render_prometheus():
+    """Command metrics followed by cache counters"""
+    return _metrics.to_prometheus() + caches_to_prometheus(cache_stats())
+
+def write_prometheus_file(text=None, path=None):
+    """Atomically write the metrics for a node_exporter textfile collector"""
+    text = render_prometheus() if text is None else text
+    path = path or config.METRICS_PATH
+    directory = os.path.dirname(os.path.abspath(path))
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(prefix='.tmp-', suffix='.prom', dir=directory)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            f.write(text)
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+async def metrics_export_loop():
+    """Background task rewriting the Prometheus file periodically"""
+    while True:
+        await asyncio.sleep(config.METRICS_EXPORT_SECONDS)
+        try:
+            # Render on the loop (the counters aren't thread-safe), write in a thread
+            await asyncio.to_thread(write_prometheus_file, render_prometheus())
+        except Exception as e:
+            print(f"Metrics export failed: {e}")
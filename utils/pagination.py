@@ -0,0 +1,59 @@
+from typing import Callable, Dict, Optional
+import discord
+import config
+
+class LazyPaginator(discord.ui.View):
+    """Embed pages with previous/next buttons, each built only when first shown.
+
+    `build_page(index)` returns the embed for a page; results are cached so
+    flipping back and forth doesn't rebuild them. Only the user who ran the
+    command can turn pages.
+    """
+    def __init__(self, page_count: int, build_page: Callable[[int], discord.Embed],
+                 owner_id: Optional[int] = None, timeout: Optional[float] = None):
+        super().__init__(timeout=timeout if timeout is not None else config.PAGINATION_TIMEOUT_SECONDS)
+        self.page_count = max(1, page_count)
+        self.build_page = build_page
+        self.owner_id = owner_id
+        self.current = 0
+        self._pages: Dict[int, discord.Embed] = {}
+        self._update_buttons()
+
+    def page(self, index: int) -> discord.Embed:
+        embed = self._pages.get(index)
+        if embed is None:
+            embed = self.build_page(index)
+            if self.page_count > 1:
+                embed.set_footer(text=f"Page {index + 1}/{self.page_count}")
+            self._pages[index] = embed
+        return embed
+
+    def _update_buttons(self):
+        self.previous_page.disabled = self.current == 0
+        self.next_page.disabled = self.current >= self.page_count - 1
+
+    async def interaction_check(self, interaction: discord.Interaction) -> bool:
+        if self.owner_id is not None and interaction.user.id != self.owner_id:
+            await interaction.response.send_message("Only the person who ran the command can turn pages.", ephemeral=True)
+            return False
+        return True
+
+    async def _show(self, interaction: discord.Interaction, index: int):
+        self.current = max(0, min(index, self.page_count - 1))
+        self._update_buttons()
+        await interaction.response.edit_message(embed=self.page(self.current), view=self)
+
+    @discord.ui.button(label="◀ Previous", style=discord.ButtonStyle.secondary)
+    async def previous_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._show(interaction, self.current - 1)
+
+    @discord.ui.button(label="Next ▶", style=discord.ButtonStyle.secondary)
+    async def next_page(self, interaction: discord.Interaction, button: discord.ui.Button):
+        await self._show(interaction, self.current + 1)
+
+    def send_kwargs(self) -> Dict:
+        """Arguments for send_message/followup.send showing the first page"""
+        kwargs = {'embed': self.page(0)}
+        if self.page_count > 1:
+            kwargs['view'] = self
+        return kwargs
@@ -0,0 +1,135 @@
+import asyncio
+import json
+import os
+import tempfile
+from typing import Iterable, List
+
+def write_json_atomic(path, data, indent=2):
+    """Serialize data to a temp file next to path and atomically swap it in"""
+    directory = os.path.dirname(os.path.abspath(path))
+    fd, tmp_path = tempfile.mkstemp(prefix='.tmp-', suffix='.json', dir=directory)
+    try:
+        with os.fdopen(fd, 'w') as f:
+            json.dump(data, f, indent=indent)
+            f.flush()
+            os.fsync(f.fileno())
+        os.replace(tmp_path, path)
+    except BaseException:
+        try:
+            os.unlink(tmp_path)
+        except FileNotFoundError:
+            pass
+        raise
+
+class StaleExportError(Exception):
+    """An export would overwrite files changed after the store it reads from"""
+    pass
+
+def _mtime(path):
+    try:
+        return os.stat(path).st_mtime_ns
+    except FileNotFoundError:
+        return None
+
+def files_newer_than(sources: Iterable[str], paths: Iterable[str]) -> List[str]:
+    """Those of `paths` modified after the newest of `sources` (missing files are skipped)"""
+    newest = max((mtime for mtime in map(_mtime, sources) if mtime is not None), default=None)
+    if newest is None:
+        return []
+    return [path for path in paths if (_mtime(path) or 0) > newest]
+
+def copy_tree(obj):
+    """Copy nested dicts/lists so a worker thread can serialize them safely"""
+    if isinstance(obj, dict):
+        return {key: copy_tree(value) for key, value in obj.items()}
+    if isinstance(obj, list):
+        return [copy_tree(value) for value in obj]
+    return obj
+
+class DebouncedWriter:
+    """Coalesces many save requests into a single atomic write.
+
+    The first save inside the debounce window schedules a flush; further saves
+    before it fires are folded into the same write. Serialization and the disk
+    write happen in a worker thread so the event loop is never blocked. Outside
+    of a running event loop saves are written synchronously.
+    """
+    def __init__(self, path_getter, snapshot, delay_getter, on_written=None,
+                 before_snapshot=None, lock=None):
+        self._path_getter = path_getter
+        self._snapshot = snapshot
+        self._delay_getter = delay_getter
+        self._on_written = on_written
+        self._before_snapshot = before_snapshot
+        self._handle = None
+        # Optional asyncio.Lock shared with callers that must not interleave with a write
+        self._lock = lock
+        self.dirty = False
+        # True while a write is running in the worker thread; the file on disk
+        # is then our own half-finished write, not an external change
+        self.writing = False
+        self.writes = 0
+        self.requests = 0
+
+    def schedule(self):
+        """Mark the data dirty and make sure a flush is pending"""
+        self.dirty = True
+        self.requests += 1
+        try:
+            loop = asyncio.get_running_loop()
+        except RuntimeError:
+            self.flush_sync()
+            return
+        if self._handle is None:
+            self._handle = loop.call_later(self._delay_getter(), self._fire)
+
+    def _fire(self):
+        self._handle = None
+        asyncio.get_running_loop().create_task(self.flush())
+
+    def _cancel_pending(self):
+        if self._handle is not None:
+            self._handle.cancel()
+            self._handle = None
+
+    async def flush(self):
+        """Write any pending changes now"""
+        self._cancel_pending()
+        if self._lock is None:
+            self._lock = asyncio.Lock()
+        async with self._lock:
+            if not self.dirty:
+                return
+            self.dirty = False
+            if self._before_snapshot:
+                self._before_snapshot()
+            # Snapshot on the loop, serialize off it
+            payload = copy_tree(self._snapshot())
+            path = self._path_getter()
+            self.writing = True
+            try:
+                await asyncio.to_thread(write_json_atomic, path, payload)
+            except BaseException:
+                self.dirty = True
+                raise
+            finally:
+                self.writing = False
+            self.writes += 1
+            if self._on_written:
+                self._on_written()
+
+    def flush_sync(self):
+        """Write any pending changes from synchronous code"""
+        self._cancel_pending()
+        if not self.dirty:
+            return
+        self.dirty = False
+        if self._before_snapshot:
+            self._before_snapshot()
+        write_json_atomic(self._path_getter(), self._snapshot())
+        self.writes += 1
+        if self._on_written:
+            self._on_written()
+
+    def stats(self):
+        return {'requests': self.requests, 'writes': self.writes, 'pending': self.dirty}
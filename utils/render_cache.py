@@ -0,0 +1,100 @@
+from collections import OrderedDict
+import config
+from utils.render_service import get_render_service
+
+class RenderCache:
+    """Byte-bounded LRU cache of rendered PNGs.
+
+    Keys include the data versions the image was drawn from, so a stale entry
+    can never be served. Entries are also tagged (e.g. ('user', id) or
+    ('comp', name)) so mutations can drop them eagerly to free memory.
+    """
+    def __init__(self, max_bytes=None):
+        self.max_bytes = max_bytes or config.RENDER_CACHE_MAX_BYTES
+        self._entries = OrderedDict()
+        self._tags = {}
+        self.size = 0
+        self.hits = 0
+        self.misses = 0
+        self.evictions = 0
+        self.invalidations = 0
+
+    def get(self, key):
+        entry = self._entries.get(key)
+        if entry is None:
+            self.misses += 1
+            return None
+        self._entries.move_to_end(key)
+        self.hits += 1
+        return entry[0]
+
+    def put(self, key, png, tags=()):
+        if len(png) > self.max_bytes:
+            return
+        if key in self._entries:
+            self._remove(key)
+        self._entries[key] = (png, tuple(tags))
+        self.size += len(png)
+        for tag in tags:
+            self._tags.setdefault(tag, set()).add(key)
+        while self.size > self.max_bytes:
+            oldest = next(iter(self._entries))
+            self._remove(oldest)
+            self.evictions += 1
+
+    def _remove(self, key):
+        png, tags = self._entries.pop(key)
+        self.size -= len(png)
+        for tag in tags:
+            keys = self._tags.get(tag)
+            if keys:
+                keys.discard(key)
+                if not keys:
+                    del self._tags[tag]
+
+    def invalidate(self, tag):
+        """Drop every entry carrying the given tag"""
+        for key in list(self._tags.get(tag, ())):
+            self._remove(key)
+            self.invalidations += 1
+
+    def invalidate_user(self, user_id):
+        self.invalidate(('user', user_id))
+
+    def invalidate_competition(self, name):
+        self.invalidate(('comp', name))
+
+    def clear(self):
+        self._entries.clear()
+        self._tags.clear()
+        self.size = 0
+
+    def stats(self):
+        lookups = self.hits + self.misses
+        return {
+            'entries': len(self._entries),
+            'bytes': self.size,
+            'hits': self.hits,
+            'misses': self.misses,
+            'hit_rate': self.hits / lookups if lookups else 0.0,
+            'evictions': self.evictions,
+            'invalidations': self.invalidations
+        }
+
+_render_cache = None
+
+def get_render_cache():
+    """Get the shared render cache"""
+    global _render_cache
+    if _render_cache is None:
+        _render_cache = RenderCache()
+    return _render_cache
+
+async def render_cached(key, tags, func, *args, **kwargs) -> bytes:
+    """Serve a PNG from the cache, rendering it in the pool on a miss"""
+    cache = get_render_cache()
+    png = cache.get(key)
+    if png is None:
+        png = await get_render_service().render(func, *args, **kwargs)
+        cache.put(key, png, tags)
+    return png
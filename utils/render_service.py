@@ -0,0 +1,115 @@
+import asyncio
+import concurrent.futures
+import config
+
+class RenderError(Exception):
+    """Raised when a graph could not be rendered"""
+
+class RenderBusy(RenderError):
+    """Raised when the render queue stays full for too long"""
+
+class RenderTimeout(RenderError):
+    """Raised when a render job takes longer than its timeout"""
+
+def _init_worker():
+    # Workers never show windows; pick the non-interactive backend up front
+    import matplotlib
+    matplotlib.use('Agg')
+
+class RenderService:
+    """Renders graphs in a process pool so matplotlib never blocks the event loop.
+
+    Jobs take plain data and return PNG bytes. At most `max_pending` jobs may be
+    queued or running; further callers wait for a slot (backpressure) and give
+    up with RenderBusy if none frees up within the job timeout.
+    """
+    def __init__(self, workers=None, max_pending=None, timeout=None):
+        self.workers = workers or config.RENDER_WORKERS
+        self.max_pending = max_pending or config.RENDER_QUEUE_SIZE
+        self.timeout = timeout or config.RENDER_TIMEOUT_SECONDS
+        self._executor = None
+        self._slots = None
+        self.completed = 0
+        self.failed = 0
+        self.timeouts = 0
+        self.rejected = 0
+
+    def _get_executor(self):
+        if self._executor is None:
+            self._executor = concurrent.futures.ProcessPoolExecutor(
+                max_workers=self.workers, initializer=_init_worker
+            )
+        return self._executor
+
+    async def render(self, func, *args, **kwargs) -> bytes:
+        """Run a module-level render function in the pool and return its PNG bytes"""
+        if self._slots is None:
+            self._slots = asyncio.Semaphore(self.max_pending)
+
+        try:
+            await asyncio.wait_for(self._slots.acquire(), self.timeout)
+        except asyncio.TimeoutError:
+            self.rejected += 1
+            raise RenderBusy("Render queue is full")
+
+        try:
+            executor = self._get_executor()
+            future = executor.submit(func, *args, **kwargs)
+        except BaseException:
+            self._slots.release()
+            raise
+        # Hold the slot until the worker is actually free again, even if we stop waiting
+        loop = asyncio.get_running_loop()
+        future.add_done_callback(lambda _: loop.call_soon_threadsafe(self._slots.release))
+
+        try:
+            result = await asyncio.wait_for(asyncio.wrap_future(future), self.timeout)
+        except asyncio.TimeoutError:
+            self.timeouts += 1
+            raise RenderTimeout(f"Rendering took longer than {self.timeout}s")
+        except concurrent.futures.process.BrokenProcessPool as e:
+            self.failed += 1
+            # Shut the broken pool down (its workers and management thread) and
+            # start a fresh one for the next job, unless another job already has
+            executor.shutdown(wait=False, cancel_futures=True)
+            if self._executor is executor:
+                self._executor = None
+            raise RenderError("Render worker crashed") from e
+        except Exception as e:
+            self.failed += 1
+            raise RenderError(str(e)) from e
+
+        self.completed += 1
+        return result
+
+    async def warm_up(self):
+        """Start every worker and import the plotting stack in it"""
+        from utils.visualization import warm_up
+        loop = asyncio.get_running_loop()
+        executor = self._get_executor()
+        await asyncio.gather(*(
+            loop.run_in_executor(executor, warm_up) for _ in range(self.workers)
+        ))
+
+    def stats(self):
+        return {
+            'workers': self.workers,
+            'completed': self.completed,
+            'failed': self.failed,
+            'timeouts': self.timeouts,
+            'rejected': self.rejected
+        }
+
+    def shutdown(self):
+        if self._executor is not None:
+            self._executor.shutdown(wait=False, cancel_futures=True)
+            self._executor = None
+
+_render_service = None
+
+def get_render_service():
+    """Get the shared render service"""
+    global _render_service
+    if _render_service is None:
+        _render_service = RenderService()
+    return _render_service
@@ -0,0 +1,82 @@
+from typing import Dict, List, Optional
+from models.competition import Competition, CompetitionParticipant
+from models.user_stats import UserStats
+from utils.data_manager import (
+    load_competitions, get_competition, create_competition, add_participant,
+    get_competitions_generation, get_competition_version
+)
+
+class CompetitionRepository:
+    """Typed access to competitions.
+
+    Raw competition dicts are hydrated into Competition models (dates parsed
+    and stats validated) once, and re-hydrated only when the underlying data
+    changes. Writes go through data_manager so every storage backend and
+    derived cache stays in step.
+    """
+    def __init__(self):
+        self._competitions: Dict[str, Competition] = {}
+        self._versions = {}
+        self._generation = None
+        self.hydrations = 0
+
+    def _ensure_loaded(self):
+        if self._generation == get_competitions_generation():
+            return
+        self._competitions = {}
+        self._versions = {}
+        for name, data in load_competitions().items():
+            self._hydrate(name, data)
+        self._generation = get_competitions_generation()
+
+    def _hydrate(self, name, data) -> Optional[Competition]:
+        try:
+            competition = Competition.from_dict(name, data)
+        except (ValueError, TypeError, KeyError) as e:
+            print(f"Skipping invalid competition '{name}': {e}")
+            self._competitions.pop(name, None)
+            return None
+        self._competitions[name] = competition
+        self._versions[name] = get_competition_version(name)
+        self.hydrations += 1
+        return competition
+
+    def get(self, name: str) -> Optional[Competition]:
+        """Get a competition by name, or None"""
+        self._ensure_loaded()
+        competition = self._competitions.get(name)
+        if competition is not None and self._versions.get(name) == get_competition_version(name):
+            return competition
+        # Changed (or created) since we last looked
+        data = get_competition(name)
+        if data is None:
+            self._competitions.pop(name, None)
+            return None
+        return self._hydrate(name, data)
+
+    def all(self) -> List[Competition]:
+        """Every competition, in storage order"""
+        self._ensure_loaded()
+        return list(self._competitions.values())
+
+    def create(self, competition: Competition):
+        """Store a new competition"""
+        self._ensure_loaded()
+        create_competition(competition.name, competition.to_dict())
+        self._competitions[competition.name] = competition
+        self._versions[competition.name] = get_competition_version(competition.name)
+
+    def add_participant(self, competition: Competition, user_id: str, initial_stats: UserStats):
+        """Add a user and their starting stats to a competition"""
+        add_participant(competition.name, user_id, initial_stats.to_dict())
+        competition.participants[user_id] = CompetitionParticipant(user_id, initial_stats)
+        self._versions[competition.name] = get_competition_version(competition.name)
+
+_repository = None
+
+def get_competition_repository():
+    """Get the shared competition repository"""
+    global _repository
+    if _repository is None:
+        _repository = CompetitionRepository()
+    return _repository
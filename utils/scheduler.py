@@ -0,0 +1,238 @@
+import asyncio
+import bisect
+import datetime
+import hashlib
+import heapq
+import json
+import os
+from typing import Dict, List, Optional, Tuple
+import config
+from utils.persistence import write_json_atomic
+from utils.repository import get_competition_repository
+from utils.scoring import get_scoring_engine
+from utils.standings import build_progress_data, has_progress, rank_standings, format_participant_details
+from utils.user_resolver import get_username_resolver
+from utils.visualization import render_competition_png
+from utils.render_service import get_render_service, RenderError
+
+def _results_stem(name: str) -> str:
+    # Competition names can hold anything; key files by a hash of the name
+    return os.path.join(config.RESULTS_DIR, hashlib.sha1(name.encode()).hexdigest()[:16])
+
+class CompetitionResults:
+    """Frozen final results of a finished competition"""
+    __slots__ = ('name', 'start_date', 'end_date', 'finalized_at', 'standings', 'details', 'chart_path', '_chart')
+
+    def __init__(self, name, start_date, end_date, finalized_at, standings, details, chart_path=None):
+        self.name = name
+        self.start_date = start_date
+        self.end_date = end_date
+        self.finalized_at = finalized_at
+        # Ranked standings and the matching per-participant detail blocks
+        self.standings = standings
+        self.details = details
+        self.chart_path = chart_path
+        self._chart = None
+
+    def chart(self) -> Optional[bytes]:
+        """The pre-rendered chart PNG (read from disk once)"""
+        if self._chart is None and self.chart_path:
+            try:
+                with open(self.chart_path, 'rb') as f:
+                    self._chart = f.read()
+            except FileNotFoundError:
+                self.chart_path = None
+        return self._chart
+
+    def to_dict(self):
+        return {
+            'name': self.name,
+            'start_date': self.start_date,
+            'end_date': self.end_date,
+            'finalized_at': self.finalized_at,
+            'standings': self.standings,
+            'details': self.details,
+            'chart_path': self.chart_path
+        }
+
+    @classmethod
+    def from_dict(cls, data):
+        return cls(data['name'], data['start_date'], data['end_date'], data['finalized_at'],
+                   data['standings'], data['details'], data.get('chart_path'))
+
+class CompetitionScheduler:
+    """Finalizes competitions when they end.
+
+    Upcoming end dates sit in a min-heap; a single background task sleeps until
+    the earliest one, then computes the final standings, point breakdowns and
+    chart once and stores them as a frozen CompetitionResults. Finished
+    competitions are afterwards served from those results.
+    """
+    def __init__(self, bot):
+        self.bot = bot
+        self._heap: List[Tuple[datetime.date, str]] = []
+        # End-date-sorted indexes of running and finished competitions for listings
+        self._active_index: List[Tuple[datetime.date, str]] = []
+        self._finished_index: List[Tuple[str, str]] = []
+        self._scheduled = set()
+        self._results: Dict[str, CompetitionResults] = {}
+        self._wakeup = asyncio.Event()
+        self._task = None
+        self.finalized = 0
+
+    def start(self):
+        """Load frozen results, queue every running competition and start the timer"""
+        self._load_results()
+        for competition in get_competition_repository().all():
+            if competition.name not in self._results:
+                self.schedule(competition)
+        if self._task is None:
+            self._task = asyncio.create_task(self._run())
+
+    def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            self._task = None
+
+    def _load_results(self):
+        os.makedirs(config.RESULTS_DIR, exist_ok=True)
+        for filename in os.listdir(config.RESULTS_DIR):
+            if not filename.endswith('.json'):
+                continue
+            try:
+                with open(os.path.join(config.RESULTS_DIR, filename), 'r') as f:
+                    results = CompetitionResults.from_dict(json.load(f))
+            except (OSError, ValueError, KeyError) as e:
+                print(f"Skipping unreadable results file {filename}: {e}")
+                continue
+            self._add_results(results)
+
+    def _add_results(self, results):
+        if results.name not in self._results:
+            bisect.insort(self._finished_index, (results.end_date, results.name))
+        self._results[results.name] = results
+
+    def schedule(self, competition):
+        """Queue a competition for finalization once its end date is over"""
+        if competition.name in self._scheduled or competition.name in self._results:
+            return
+        self._scheduled.add(competition.name)
+        heapq.heappush(self._heap, (competition.end, competition.name))
+        bisect.insort(self._active_index, (competition.end, competition.name))
+        self._wakeup.set()
+
+    def get_results(self, name: str) -> Optional[CompetitionResults]:
+        return self._results.get(name)
+
+    def active_count(self) -> int:
+        return len(self._active_index)
+
+    def finished_count(self) -> int:
+        return len(self._finished_index)
+
+    def active_slice(self, start: int, stop: int) -> List[str]:
+        """Running competitions ending soonest first"""
+        return [name for _, name in self._active_index[start:stop]]
+
+    def finished_slice(self, start: int, stop: int) -> List[str]:
+        """Finished competitions, most recently ended first"""
+        total = len(self._finished_index)
+        lo, hi = max(0, total - stop), max(0, total - start)
+        return [name for _, name in reversed(self._finished_index[lo:hi])]
+
+    async def _run(self):
+        while True:
+            self._wakeup.clear()
+            today = datetime.date.today()
+            while self._heap and self._heap[0][0] < today:
+                end, name = heapq.heappop(self._heap)
+                self._scheduled.discard(name)
+                try:
+                    await self.finalize(name)
+                except Exception as e:
+                    print(f"Failed to finalize competition '{name}': {e}")
+                    # List it as finished anyway; /compstatus falls back to live scoring
+                    bisect.insort(self._finished_index, (end.isoformat(), name))
+                finally:
+                    index = bisect.bisect_left(self._active_index, (end, name))
+                    if index < len(self._active_index) and self._active_index[index] == (end, name):
+                        del self._active_index[index]
+
+            if self._heap:
+                # Readings on the end date still count, so competitions end when the next day begins
+                wake_at = datetime.datetime.combine(
+                    self._heap[0][0] + datetime.timedelta(days=1), datetime.time.min
+                )
+                delay = max(0.0, (wake_at - datetime.datetime.now()).total_seconds())
+                # Re-check periodically in case the clock jumps
+                delay = min(delay, config.SCHEDULER_MAX_SLEEP_SECONDS)
+            else:
+                delay = None
+            try:
+                await asyncio.wait_for(self._wakeup.wait(), delay)
+            except asyncio.TimeoutError:
+                pass
+
+    async def finalize(self, name: str) -> Optional[CompetitionResults]:
+        """Compute and store the frozen results of a finished competition"""
+        competition = get_competition_repository().get(name)
+        if competition is None:
+            return None
+
+        series = get_scoring_engine().get_competition_series(competition)
+        until = competition.end_date
+        progress_data = build_progress_data(series, until)
+        user_names = await get_username_resolver(self.bot).resolve(competition.participants)
+
+        standings = []
+        details = []
+        for user_id, points in rank_standings(series, until):
+            date, _, score = series[user_id].latest(until)
+            details.append(format_participant_details(
+                competition, user_id, series[user_id], user_names[user_id], until
+            ))
+            standings.append({
+                'user_id': user_id,
+                'name': user_names[user_id],
+                'date': date,
+                'points': score.total,
+                'body_fat_points': score.body_fat_points,
+                'muscle_mass_points': score.muscle_mass_points,
+                'bmr_points': score.bmr_points
+            })
+
+        stem = _results_stem(name)
+        os.makedirs(config.RESULTS_DIR, exist_ok=True)
+        chart_path = None
+        if has_progress(progress_data):
+            try:
+                png = await get_render_service().render(render_competition_png, name, progress_data, user_names)
+            except RenderError as e:
+                print(f"Couldn't render final chart for '{name}': {e}")
+            else:
+                chart_path = stem + '.png'
+                await asyncio.to_thread(_write_bytes, chart_path, png)
+
+        results = CompetitionResults(
+            name, competition.start_date, competition.end_date,
+            datetime.datetime.now().isoformat(timespec='seconds'),
+            standings, details, chart_path
+        )
+        await asyncio.to_thread(write_json_atomic, stem + '.json', results.to_dict())
+        self._add_results(results)
+        self.finalized += 1
+        return results
+
+def _write_bytes(path, data):
+    tmp_path = path + '.tmp'
+    with open(tmp_path, 'wb') as f:
+        f.write(data)
+    os.replace(tmp_path, path)
+
+def get_competition_scheduler(bot) -> CompetitionScheduler:
+    """Get the scheduler shared by every cog of a bot"""
+    scheduler = getattr(bot, 'competition_scheduler', None)
+    if scheduler is None:
+        scheduler = CompetitionScheduler(bot)
+        bot.competition_scheduler = scheduler
+    return scheduler
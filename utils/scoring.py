@@ -0,0 +1,222 @@
+import bisect
+from typing import Dict, NamedTuple
+import config
+from models.user_stats import UserStats
+from utils.data_manager import (
+    get_user_stats, get_users_stats, get_competition_version, get_health_generation
+)
+
+class Score(NamedTuple):
+    """Points earned by one reading relative to the participant's starting stats"""
+    bf_change: float
+    mm_change: float
+    bmr_change: float
+    body_fat_points: float
+    muscle_mass_points: float
+    bmr_points: float
+    total: float
+
+# score_arrays() keys in Score field order
+SCORE_ARRAY_KEYS = (
+    'bf_change', 'mm_change', 'bmr_change',
+    'body_fat_points', 'muscle_mass_points', 'bmr_points', 'points'
+)
+
+def calculate_score(initial_stats: UserStats, stats: UserStats) -> Score:
+    """Calculate relative changes and points for one reading"""
+    changes = stats.calculate_changes(initial_stats)
+    bf_change = changes['body_fat_change']
+    mm_change = changes['muscle_mass_change']
+    bmr_change = changes['bmr_change']
+
+    bf_points = bf_change * config.BF_POINTS_MULTIPLIER
+    mm_points = mm_change * config.MM_POINTS_MULTIPLIER
+    bmr_points = bmr_change * config.BMR_POINTS_MULTIPLIER
+
+    return Score(bf_change, mm_change, bmr_change,
+                 bf_points, mm_points, bmr_points,
+                 bf_points + mm_points + bmr_points)
+
+class ParticipantSeries:
+    """A participant's point series inside one competition, kept sorted by date"""
+    def __init__(self, initial_stats: UserStats):
+        self.initial_stats = initial_stats
+        self.dates = []
+        self.points = []
+        self.body_fat_points = []
+        self.muscle_mass_points = []
+        self.bmr_points = []
+        self.scores = []
+        self.stats = []
+
+    def load(self, history):
+        """Bulk-score a {date: stats} history with NumPy, replacing the series"""
+        import numpy as np
+        from utils.vector_scoring import score_arrays
+
+        dates = sorted(history)
+        stats = [history[date] for date in dates]
+        scores = score_arrays(
+            self.initial_stats.to_dict(),
+            np.array([s['body_fat'] for s in stats], dtype=float),
+            np.array([s['muscle_mass'] for s in stats], dtype=float),
+            np.array([s['bmr'] for s in stats], dtype=float)
+        )
+        columns = [scores[key].tolist() for key in SCORE_ARRAY_KEYS]
+
+        self.dates = dates
+        self.points = scores['points'].tolist()
+        self.body_fat_points = scores['body_fat_points'].tolist()
+        self.muscle_mass_points = scores['muscle_mass_points'].tolist()
+        self.bmr_points = scores['bmr_points'].tolist()
+        self.scores = [Score(*row) for row in zip(*columns)]
+        self.stats = [UserStats.from_dict(s) for s in stats]
+
+    def set(self, date, stats):
+        """Insert or replace the score for a date"""
+        stats = UserStats.from_dict(stats)
+        score = calculate_score(self.initial_stats, stats)
+        idx = bisect.bisect_left(self.dates, date)
+        if idx < len(self.dates) and self.dates[idx] == date:
+            self.points[idx] = score.total
+            self.body_fat_points[idx] = score.body_fat_points
+            self.muscle_mass_points[idx] = score.muscle_mass_points
+            self.bmr_points[idx] = score.bmr_points
+            self.scores[idx] = score
+            self.stats[idx] = stats
+            return
+        self.dates.insert(idx, date)
+        self.points.insert(idx, score.total)
+        self.body_fat_points.insert(idx, score.body_fat_points)
+        self.muscle_mass_points.insert(idx, score.muscle_mass_points)
+        self.bmr_points.insert(idx, score.bmr_points)
+        self.scores.insert(idx, score)
+        self.stats.insert(idx, stats)
+
+    def _end(self, until):
+        if until is None or not self.dates or self.dates[-1] <= until:
+            return len(self.dates)
+        return bisect.bisect_right(self.dates, until)
+
+    def latest(self, until=None):
+        """(date, stats, score) of the last reading on or before `until`"""
+        end = self._end(until)
+        if end == 0:
+            return None
+        return self.dates[end - 1], self.stats[end - 1], self.scores[end - 1]
+
+    def as_progress_data(self, until=None):
+        """Copies of the series in the shape create_competition_graph expects.
+
+        Always copies: the render pool pickles its arguments on another
+        thread, while scoring may still append to these lists.
+        """
+        end = self._end(until)
+        return {
+            'dates': self.dates[:end],
+            'points': self.points[:end],
+            'body_fat_points': self.body_fat_points[:end],
+            'muscle_mass_points': self.muscle_mass_points[:end],
+            'bmr_points': self.bmr_points[:end]
+        }
+
+class ScoringEngine:
+    """Keeps each competition's per-participant point series up to date.
+
+    A competition's series are built once from the participants' readings in
+    its window, then updated one date at a time as stats are logged or edited.
+    A competition is rebuilt only if it changes (e.g. someone joins) or the
+    health data is replaced wholesale.
+    """
+    def __init__(self):
+        self._series = {}
+        self._built_versions = {}
+        self._windows = {}
+        self._user_competitions = {}
+        self.builds = 0
+        self.updates = 0
+
+    def _version(self, name):
+        return (get_competition_version(name), get_health_generation())
+
+    def _build(self, name, competition):
+        participants = competition.participants
+        health_data = get_users_stats(
+            list(participants), competition.start_date, competition.end_date
+        )
+        series = {}
+        for user_id, participant_info in participants.items():
+            participant = ParticipantSeries(participant_info.initial_stats)
+            participant.load(health_data.get(user_id, {}))
+            series[user_id] = participant
+            self._user_competitions.setdefault(user_id, set()).add(name)
+
+        self._series[name] = series
+        self._windows[name] = (competition.start_date, competition.end_date)
+        self._built_versions[name] = self._version(name)
+        self.builds += 1
+        return series
+
+    def get_competition_series(self, competition) -> Dict[str, ParticipantSeries]:
+        """Get every participant's series, building them on first use"""
+        name = competition.name
+        if name not in self._series or self._built_versions[name] != self._version(name):
+            return self._build(name, competition)
+        return self._series[name]
+
+    def update_user(self, user_id, date):
+        """Re-score one user's reading for a date in every competition it falls inside"""
+        names = self._user_competitions.get(user_id)
+        if not names:
+            return
+        stats = get_user_stats(user_id, date)
+        if stats is None:
+            return
+        for name in names:
+            start_date, end_date = self._windows[name]
+            if start_date <= date <= end_date and user_id in self._series[name]:
+                self._series[name][user_id].set(date, stats)
+                self.updates += 1
+
+    def refresh_user(self, user_id, dates):
+        """Re-score a user from scratch in every competition window holding one of `dates`.
+
+        Used after bulk imports: one reload per affected competition instead
+        of one update per reading. Returns the refreshed competitions' names.
+        """
+        refreshed = []
+        for name in sorted(self._user_competitions.get(user_id, ())):
+            start_date, end_date = self._windows[name]
+            if user_id not in self._series[name] or not any(start_date <= date <= end_date for date in dates):
+                continue
+            history = get_users_stats([user_id], start_date, end_date).get(user_id, {})
+            self._series[name][user_id].load(history)
+            refreshed.append(name)
+            self.updates += 1
+        return refreshed
+
+    def invalidate(self, name=None):
+        """Drop the series for one competition, or all of them"""
+        names = [name] if name else list(self._series)
+        for comp in names:
+            series = self._series.pop(comp, None)
+            self._built_versions.pop(comp, None)
+            self._windows.pop(comp, None)
+            for user_id in series or ():
+                self._user_competitions.get(user_id, set()).discard(comp)
+
+    def stats(self):
+        return {
+            'competitions': len(self._series),
+            'builds': self.builds,
+            'updates': self.updates
+        }
+
+_scoring_engine = None
+
+def get_scoring_engine():
+    """Get the shared scoring engine"""
+    global _scoring_engine
+    if _scoring_engine is None:
+        _scoring_engine = ScoringEngine()
+    return _scoring_engine
@@ -0,0 +1,233 @@
+import asyncio
+import json
+import os
+import sys
+import config
+from utils.persistence import DebouncedWriter, write_json_atomic, files_newer_than, StaleExportError
+from utils.journal import StatsJournal
+
+def _file_signature(path):
+    try:
+        stat = os.stat(path)
+    except FileNotFoundError:
+        return None
+    return (stat.st_mtime_ns, stat.st_size)
+
+class HealthShard:
+    """One user's history file, cached in memory and written debounced.
+
+    The shard's asyncio lock is shared with its writer, so flushes of the same
+    shard never overlap and callers can hold it across awaits for a safe
+    read-modify-write. Different shards are written independently.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.data = None
+        self._signature = None
+        self._loaded = False
+        self.lock = asyncio.Lock()
+        self.writer = DebouncedWriter(
+            lambda: self.path,
+            lambda: self.data,
+            lambda: config.SAVE_DEBOUNCE_SECONDS,
+            on_written=self._written,
+            lock=self.lock
+        )
+
+    def _written(self):
+        self._signature = _file_signature(self.path)
+
+    def read(self):
+        """The user's history (None if they have none), reloaded if the file changed"""
+        if self.writer.dirty or self.writer.writing:
+            # Unflushed changes in memory are newer than the file (or it's our own write in flight)
+            return self.data
+        signature = _file_signature(self.path)
+        if not self._loaded or signature != self._signature:
+            self._loaded = True
+            self._signature = signature
+            if signature is None:
+                self.data = None
+            else:
+                with open(self.path, 'r') as f:
+                    self.data = json.load(f)
+        return self.data
+
+    def write(self, data):
+        """Replace the user's history and schedule a write of this shard only"""
+        self.data = data
+        self._loaded = True
+        self.writer.schedule()
+
+    def delete(self):
+        self.writer.flush_sync()
+        try:
+            os.remove(self.path)
+        except FileNotFoundError:
+            pass
+        self.data = None
+        self._signature = None
+
+class ShardedHealthStore:
+    """Health data stored as one JSON file per user.
+
+    Logging or editing stats rewrites only the caller's file, and readers load
+    only the users they ask for. Mirrors the health data functions of
+    data_manager so it can back them directly.
+    """
+    def __init__(self, directory):
+        self.directory = directory
+        os.makedirs(directory, exist_ok=True)
+        self._shards = {}
+
+    def shard_path(self, user_id):
+        # Discord ids are numeric, which keeps file names safe
+        if not user_id.isdigit():
+            raise ValueError(f"Invalid user id: {user_id!r}")
+        return os.path.join(self.directory, f"{user_id}.json")
+
+    def shard(self, user_id):
+        shard = self._shards.get(user_id)
+        if shard is None:
+            shard = self._shards[user_id] = HealthShard(self.shard_path(user_id))
+        return shard
+
+    def lock(self, user_id):
+        """asyncio.Lock guarding a user's shard"""
+        return self.shard(user_id).lock
+
+    def user_ids(self):
+        user_ids = {
+            name[:-len('.json')] for name in os.listdir(self.directory)
+            if name.endswith('.json') and not name.startswith('.')
+        }
+        user_ids.update(user_id for user_id, shard in self._shards.items() if shard.data is not None)
+        return sorted(user_ids)
+
+    def get_user_stats(self, user_id, date=None):
+        history = self.shard(user_id).read()
+        if history is None:
+            return None
+        if date:
+            return history.get(date)
+        return history
+
+    def get_users_stats(self, user_ids, start_date=None, end_date=None):
+        result = {}
+        for user_id in user_ids:
+            history = self.shard(user_id).read()
+            if history is None:
+                continue
+            result[user_id] = {
+                date: stats for date, stats in history.items()
+                if (not start_date or date >= start_date) and (not end_date or date <= end_date)
+            }
+        return result
+
+    def record_stats(self, user_id, date, stats):
+        shard = self.shard(user_id)
+        history = shard.read() or {}
+        history[date] = dict(stats)
+        shard.write(history)
+
+    def record_many(self, user_id, readings):
+        shard = self.shard(user_id)
+        history = shard.read() or {}
+        for date, stats in readings.items():
+            history[date] = dict(stats)
+        shard.write(history)
+
+    def update_stats(self, user_id, date, changes):
+        shard = self.shard(user_id)
+        history = shard.read() or {}
+        history.setdefault(date, {}).update(changes)
+        shard.write(history)
+
+    def load_health_data(self):
+        """Every user's history (reads all shards; prefer the per-user getters)"""
+        data = {}
+        for user_id in self.user_ids():
+            history = self.shard(user_id).read()
+            if history is not None:
+                data[user_id] = history
+        return data
+
+    def save_health_data(self, data):
+        for user_id in self.user_ids():
+            if user_id not in data:
+                self.shard(user_id).delete()
+        for user_id, history in data.items():
+            self.shard(user_id).write(history)
+
+    async def flush(self):
+        await asyncio.gather(*(
+            shard.writer.flush() for shard in list(self._shards.values()) if shard.writer.dirty
+        ))
+
+    def flush_sync(self):
+        for shard in list(self._shards.values()):
+            shard.writer.flush_sync()
+
+    def invalidate(self):
+        """Flush and forget every cached shard"""
+        self.flush_sync()
+        self._shards.clear()
+
+    def stats(self):
+        return {
+            'shards_loaded': sum(1 for shard in self._shards.values() if shard.data is not None),
+            'writes': sum(shard.writer.writes for shard in self._shards.values()),
+            'pending': sum(1 for shard in self._shards.values() if shard.writer.dirty)
+        }
+
+def migrate_json_to_shards(shard_dir=None, health_path=None):
+    """Split the health data file (plus any journaled stats) into per-user shards"""
+    with open(health_path or config.HEALTH_DATA_PATH, 'r') as f:
+        health_data = json.load(f)
+    if health_path is None:
+        StatsJournal('HEALTH_JOURNAL_PATH').replay(health_data)
+    store = ShardedHealthStore(shard_dir or config.HEALTH_SHARD_DIR)
+    store.save_health_data(health_data)
+    store.flush_sync()
+    return len(health_data)
+
+def export_shards_to_json(shard_dir=None, health_path=None):
+    """Merge the per-user shards back into a single health data file.
+
+    Refuses (StaleExportError) if the file or the stats journal changed
+    after the newest shard, since the export would overwrite newer data. The
+    journal is kept and replayed over the export on the next load.
+    """
+    shard_dir = shard_dir or config.HEALTH_SHARD_DIR
+    targets = []
+    if health_path is None:
+        # Exporting over the live data, so its journal counts too
+        journal = StatsJournal('HEALTH_JOURNAL_PATH')
+        targets += [journal.rotated_path, journal.path]
+    health_path = health_path or config.HEALTH_DATA_PATH
+    targets.append(health_path)
+    shards = [os.path.join(shard_dir, name) for name in os.listdir(shard_dir)] if os.path.isdir(shard_dir) else []
+    newer = files_newer_than([shard_dir] + shards, targets)
+    if newer:
+        raise StaleExportError(f"{', '.join(newer)} changed after the shards in {shard_dir}; not exporting over it")
+    store = ShardedHealthStore(shard_dir)
+    health_data = store.load_health_data()
+    write_json_atomic(health_path, health_data)
+    return len(health_data)
+
+if __name__ == "__main__":
+    # python -m utils.shard_store migrate|export
+    command = sys.argv[1] if len(sys.argv) > 1 else ''
+    if command == 'migrate':
+        users = migrate_json_to_shards()
+        print(f"Split {users} users into {config.HEALTH_SHARD_DIR}")
+    elif command == 'export':
+        try:
+            users = export_shards_to_json()
+        except StaleExportError as e:
+            print(f"Export refused: {e}")
+            sys.exit(1)
+        print(f"Merged {users} users from {config.HEALTH_SHARD_DIR} into {config.HEALTH_DATA_PATH}")
+    else:
+        print("Usage: python -m utils.shard_store migrate|export")
+        sys.exit(1)
@@ -0,0 +1,285 @@
+import json
+import sqlite3
+import sys
+import config
+from utils.persistence import write_json_atomic, files_newer_than, StaleExportError
+from utils.journal import StatsJournal
+
+METRICS = ('weight', 'body_fat', 'muscle_mass', 'bmr')
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS health_stats (
+    user_id TEXT NOT NULL,
+    date TEXT NOT NULL,
+    weight REAL,
+    body_fat REAL,
+    muscle_mass REAL,
+    bmr REAL,
+    PRIMARY KEY (user_id, date)
+) WITHOUT ROWID;
+
+CREATE TABLE IF NOT EXISTS competitions (
+    name TEXT PRIMARY KEY,
+    start_date TEXT NOT NULL,
+    end_date TEXT NOT NULL,
+    creator TEXT
+);
+
+CREATE TABLE IF NOT EXISTS competition_participants (
+    competition TEXT NOT NULL REFERENCES competitions(name) ON DELETE CASCADE,
+    user_id TEXT NOT NULL,
+    weight REAL,
+    body_fat REAL,
+    muscle_mass REAL,
+    bmr REAL,
+    PRIMARY KEY (competition, user_id)
+) WITHOUT ROWID;
+
+CREATE INDEX IF NOT EXISTS idx_participants_user ON competition_participants (user_id);
+CREATE INDEX IF NOT EXISTS idx_competitions_end_date ON competitions (end_date);
+"""
+
+def _stats_from_row(row):
+    """Turn the four metric columns of a row into a stats dict"""
+    return {metric: row[metric] for metric in METRICS}
+
+class SQLiteStore:
+    """SQLite storage for health stats and competitions.
+
+    Mirrors the shape of the JSON files so data_manager can hand back the same
+    dicts, but answers per-user, per-date-range and per-competition queries
+    through indexes instead of loading everything.
+    """
+    def __init__(self, path):
+        self.path = path
+        self.conn = sqlite3.connect(path, check_same_thread=False)
+        self.conn.row_factory = sqlite3.Row
+        self.conn.execute("PRAGMA journal_mode=WAL")
+        self.conn.execute("PRAGMA synchronous=NORMAL")
+        self.conn.execute("PRAGMA foreign_keys=ON")
+        self.conn.executescript(SCHEMA)
+
+    def close(self):
+        self.conn.close()
+
+    # Health stats
+
+    def get_user_stats(self, user_id, date=None):
+        """Get a user's stats for one date, or their full history"""
+        if date:
+            row = self.conn.execute(
+                "SELECT * FROM health_stats WHERE user_id = ? AND date = ?", (user_id, date)
+            ).fetchone()
+            return _stats_from_row(row) if row else None
+        rows = self.conn.execute(
+            "SELECT * FROM health_stats WHERE user_id = ? ORDER BY date", (user_id,)
+        ).fetchall()
+        if not rows:
+            return None
+        return {row['date']: _stats_from_row(row) for row in rows}
+
+    def get_users_stats(self, user_ids, start_date=None, end_date=None):
+        """Get the history of several users, optionally limited to a date range"""
+        result = {}
+        query = "SELECT * FROM health_stats WHERE user_id = ?"
+        if start_date:
+            query += " AND date >= ?"
+        if end_date:
+            query += " AND date <= ?"
+        query += " ORDER BY date"
+        for user_id in user_ids:
+            params = [user_id]
+            if start_date:
+                params.append(start_date)
+            if end_date:
+                params.append(end_date)
+            rows = self.conn.execute(query, params).fetchall()
+            if rows:
+                result[user_id] = {row['date']: _stats_from_row(row) for row in rows}
+        return result
+
+    def record_stats(self, user_id, date, stats):
+        with self.conn:
+            self.conn.execute(
+                "INSERT OR REPLACE INTO health_stats (user_id, date, weight, body_fat, muscle_mass, bmr) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                (user_id, date, *(stats.get(metric) for metric in METRICS))
+            )
+
+    def record_many(self, user_id, readings):
+        with self.conn:
+            self.conn.executemany(
+                "INSERT OR REPLACE INTO health_stats (user_id, date, weight, body_fat, muscle_mass, bmr) "
+                "VALUES (?, ?, ?, ?, ?, ?)",
+                [(user_id, date, *(stats.get(metric) for metric in METRICS)) for date, stats in readings.items()]
+            )
+
+    def update_stats(self, user_id, date, changes):
+        columns = [metric for metric in METRICS if metric in changes]
+        if not columns:
+            return
+        assignments = ", ".join(f"{metric} = ?" for metric in columns)
+        with self.conn:
+            self.conn.execute(
+                f"UPDATE health_stats SET {assignments} WHERE user_id = ? AND date = ?",
+                (*(changes[metric] for metric in columns), user_id, date)
+            )
+
+    def load_health_data(self):
+        """Build the full health data dict (same shape as health_data.json)"""
+        data = {}
+        for row in self.conn.execute("SELECT * FROM health_stats ORDER BY user_id, date"):
+            data.setdefault(row['user_id'], {})[row['date']] = _stats_from_row(row)
+        return data
+
+    def save_health_data(self, data):
+        """Replace all health stats with the contents of a health data dict"""
+        rows = [
+            (user_id, date, *(stats.get(metric) for metric in METRICS))
+            for user_id, history in data.items()
+            for date, stats in history.items()
+        ]
+        with self.conn:
+            self.conn.execute("DELETE FROM health_stats")
+            self.conn.executemany(
+                "INSERT INTO health_stats (user_id, date, weight, body_fat, muscle_mass, bmr) "
+                "VALUES (?, ?, ?, ?, ?, ?)", rows
+            )
+
+    # Competitions
+
+    def _participants(self, name):
+        rows = self.conn.execute(
+            "SELECT * FROM competition_participants WHERE competition = ?", (name,)
+        ).fetchall()
+        return {row['user_id']: _stats_from_row(row) for row in rows}
+
+    def get_competition(self, name):
+        """Get one competition in the competitions.json shape"""
+        row = self.conn.execute("SELECT * FROM competitions WHERE name = ?", (name,)).fetchone()
+        if not row:
+            return None
+        return {
+            'start_date': row['start_date'],
+            'end_date': row['end_date'],
+            'participants': self._participants(name),
+            'creator': row['creator']
+        }
+
+    def get_competition_names(self):
+        return [row['name'] for row in self.conn.execute("SELECT name FROM competitions ORDER BY name")]
+
+    def create_competition(self, name, competition):
+        with self.conn:
+            self.conn.execute(
+                "INSERT INTO competitions (name, start_date, end_date, creator) VALUES (?, ?, ?, ?)",
+                (name, competition['start_date'], competition['end_date'], competition.get('creator'))
+            )
+            for user_id, stats in competition.get('participants', {}).items():
+                self._insert_participant(name, user_id, stats)
+
+    def _insert_participant(self, name, user_id, stats):
+        self.conn.execute(
+            "INSERT OR REPLACE INTO competition_participants "
+            "(competition, user_id, weight, body_fat, muscle_mass, bmr) VALUES (?, ?, ?, ?, ?, ?)",
+            (name, user_id, *(stats.get(metric) for metric in METRICS))
+        )
+
+    def add_participant(self, name, user_id, stats):
+        with self.conn:
+            self._insert_participant(name, user_id, stats)
+
+    def get_user_competitions(self, user_id):
+        """Names of the competitions a user takes part in"""
+        rows = self.conn.execute(
+            "SELECT competition FROM competition_participants WHERE user_id = ?", (user_id,)
+        ).fetchall()
+        return [row['competition'] for row in rows]
+
+    def load_competitions(self):
+        """Build the full competitions dict (same shape as competitions.json)"""
+        competitions = {}
+        for row in self.conn.execute("SELECT * FROM competitions"):
+            competitions[row['name']] = {
+                'start_date': row['start_date'],
+                'end_date': row['end_date'],
+                'participants': {},
+                'creator': row['creator']
+            }
+        for row in self.conn.execute("SELECT * FROM competition_participants"):
+            if row['competition'] in competitions:
+                competitions[row['competition']]['participants'][row['user_id']] = _stats_from_row(row)
+        return competitions
+
+    def save_competitions(self, competitions):
+        """Replace all competitions with the contents of a competitions dict"""
+        with self.conn:
+            self.conn.execute("DELETE FROM competition_participants")
+            self.conn.execute("DELETE FROM competitions")
+            for name, competition in competitions.items():
+                self.conn.execute(
+                    "INSERT INTO competitions (name, start_date, end_date, creator) VALUES (?, ?, ?, ?)",
+                    (name, competition['start_date'], competition['end_date'], competition.get('creator'))
+                )
+                for user_id, stats in competition.get('participants', {}).items():
+                    self._insert_participant(name, user_id, stats)
+
+def migrate_json_to_sqlite(db_path=None, health_path=None, competitions_path=None):
+    """One-shot import of the JSON data files into a SQLite database"""
+    store = SQLiteStore(db_path or config.SQLITE_PATH)
+    with open(health_path or config.HEALTH_DATA_PATH, 'r') as f:
+        health_data = json.load(f)
+    if health_path is None:
+        # Recent stats may only be in the journal so far
+        StatsJournal('HEALTH_JOURNAL_PATH').replay(health_data)
+    with open(competitions_path or config.COMPETITIONS_PATH, 'r') as f:
+        competitions = json.load(f)
+    store.save_health_data(health_data)
+    store.save_competitions(competitions)
+    store.close()
+    return len(health_data), len(competitions)
+
+def export_sqlite_to_json(db_path=None, health_path=None, competitions_path=None):
+    """Write the SQLite database back out as the JSON data files.
+
+    Refuses (StaleExportError) if a JSON file or the stats journal changed
+    after the database, since the export would overwrite newer data. The
+    journal is kept and replayed over the export on the next load, so stats
+    journaled but never migrated aren't lost.
+    """
+    db_path = db_path or config.SQLITE_PATH
+    targets = []
+    if health_path is None:
+        # Exporting over the live data, so its journal counts too
+        journal = StatsJournal('HEALTH_JOURNAL_PATH')
+        targets += [journal.rotated_path, journal.path]
+    health_path = health_path or config.HEALTH_DATA_PATH
+    competitions_path = competitions_path or config.COMPETITIONS_PATH
+    targets += [health_path, competitions_path]
+    newer = files_newer_than([db_path, db_path + '-wal'], targets)
+    if newer:
+        raise StaleExportError(f"{', '.join(newer)} changed after {db_path}; not exporting over it")
+    store = SQLiteStore(db_path)
+    health_data = store.load_health_data()
+    competitions = store.load_competitions()
+    store.close()
+    write_json_atomic(health_path, health_data)
+    write_json_atomic(competitions_path, competitions)
+    return len(health_data), len(competitions)
+
+if __name__ == "__main__":
+    # python -m utils.sqlite_store migrate|export
+    command = sys.argv[1] if len(sys.argv) > 1 else ''
+    if command == 'migrate':
+        users, comps = migrate_json_to_sqlite()
+        print(f"Migrated {users} users and {comps} competitions into {config.SQLITE_PATH}")
+    elif command == 'export':
+        try:
+            users, comps = export_sqlite_to_json()
+        except StaleExportError as e:
+            print(f"Export refused: {e}")
+            sys.exit(1)
+        print(f"Exported {users} users and {comps} competitions from {config.SQLITE_PATH}")
+    else:
+        print("Usage: python -m utils.sqlite_store migrate|export")
+        sys.exit(1)
@@ -0,0 +1,46 @@
+import heapq
+from typing import Dict, List, Optional, Tuple
+
+def build_progress_data(series: Dict, until: str) -> Dict:
+    """Per-participant point series, capped at `until`, in the graph's shape"""
+    return {user_id: participant.as_progress_data(until) for user_id, participant in series.items()}
+
+def has_progress(progress_data: Dict) -> bool:
+    return any(data['dates'] for data in progress_data.values())
+
+def rank_standings(series: Dict, until: str, k: Optional[int] = None) -> List[Tuple[str, float]]:
+    """(user_id, points) for participants with data, best first.
+
+    With `k`, only the top k are selected (heap selection, no full sort).
+    """
+    standings = []
+    for user_id, participant in series.items():
+        latest = participant.latest(until)
+        if latest is not None:
+            standings.append((user_id, latest[2].total))
+    if k is not None and k < len(standings):
+        return heapq.nlargest(k, standings, key=lambda x: x[1])
+    standings.sort(key=lambda x: x[1], reverse=True)
+    return standings
+
+def count_with_data(series: Dict, until: str) -> int:
+    return sum(1 for participant in series.values() if participant.latest(until) is not None)
+
+def format_standings(ranked: List[Tuple[str, float]], user_names: Dict, start: int = 1) -> str:
+    """Numbered standings lines"""
+    return "".join(
+        f"{i}. {user_names[user_id]}: {points:.2f} points\n"
+        for i, (user_id, points) in enumerate(ranked, start)
+    )
+
+def format_participant_details(competition, user_id: str, participant, user_name: str, until: str) -> str:
+    """One participant's block of the Detailed Statistics section"""
+    initial_stats = competition.participants[user_id].initial_stats
+    _, current_stats, score = participant.latest(until)
+    
+    details = f"__**{user_name}**__\n"
+    details += f"Body Fat: {initial_stats.body_fat}% → {current_stats.body_fat}% (Change: {score.bf_change:.2f}%, Points: {score.body_fat_points:.2f})\n"
+    details += f"Muscle Mass: {initial_stats.muscle_mass}lbs → {current_stats.muscle_mass}lbs (Change: {score.mm_change:.2f}%, Points: {score.muscle_mass_points:.2f})\n"
+    details += f"BMR: {initial_stats.bmr} → {current_stats.bmr} (Change: {score.bmr_change:.2f}%, Points: {score.bmr_points:.2f})\n"
+    details += f"Total Points: {score.total:.2f}\n"
+    return details
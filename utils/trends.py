@@ -0,0 +1,221 @@
+from collections import deque
+from typing import Dict, Optional
+import config
+from models.health_series import METRICS, date_to_ordinal, ordinal_to_date
+from utils.data_manager import get_user_stats, get_user_series, get_user_version
+
+class RollingWindow:
+    """Readings from the last `days` calendar days, with running sums for mean and slope.
+
+    x is the day relative to the user's first reading, which keeps the sums
+    small enough that adding and evicting readings doesn't lose precision.
+    """
+    __slots__ = ('days', 'entries', 'n', 'sum_x', 'sum_y', 'sum_xx', 'sum_xy')
+
+    def __init__(self, days: int):
+        self.days = days
+        self.entries = deque()
+        self.n = 0
+        self.sum_x = self.sum_y = self.sum_xx = self.sum_xy = 0.0
+
+    def _add(self, x, y, sign):
+        self.n += sign
+        self.sum_x += sign * x
+        self.sum_y += sign * y
+        self.sum_xx += sign * x * x
+        self.sum_xy += sign * x * y
+
+    def push(self, x: int, y: float):
+        """Add a reading newer than every reading already in the window"""
+        self.entries.append((x, y))
+        self._add(x, y, 1)
+        while self.entries[0][0] <= x - self.days:
+            old_x, old_y = self.entries.popleft()
+            self._add(old_x, old_y, -1)
+
+    def replace_last(self, y: float):
+        x, old_y = self.entries[-1]
+        self._add(x, old_y, -1)
+        self._add(x, y, 1)
+        self.entries[-1] = (x, y)
+
+    def mean(self) -> Optional[float]:
+        return self.sum_y / self.n if self.n else None
+
+    def slope(self) -> Optional[float]:
+        """Least-squares change per day, or None with fewer than two distinct days"""
+        denominator = self.n * self.sum_xx - self.sum_x * self.sum_x
+        if self.n < 2 or denominator <= 0:
+            return None
+        return (self.n * self.sum_xy - self.sum_x * self.sum_y) / denominator
+
+class MetricTrend:
+    """Running statistics of one metric, updated one reading at a time.
+
+    Readings must arrive in date order; the newest one can be replaced (as
+    /editstats does) because the state from before it is kept.
+    """
+    __slots__ = ('count', 'last_x', 'last_value', 'ewma', 'min', 'min_x', 'max', 'max_x',
+                 'week', 'month', '_before_last')
+
+    def __init__(self):
+        self.count = 0
+        self.last_x = None
+        self.last_value = None
+        self.ewma = None
+        self.min = self.max = None
+        self.min_x = self.max_x = None
+        self.week = RollingWindow(7)
+        self.month = RollingWindow(30)
+        # (ewma, min, min_x, max, max_x) before the newest reading
+        self._before_last = (None, None, None, None, None)
+
+    def _apply(self, x, value):
+        ewma, low, low_x, high, high_x = self._before_last
+        alpha = config.TRENDS_EWMA_ALPHA
+        self.ewma = value if ewma is None else alpha * value + (1 - alpha) * ewma
+        if low is None or value < low:
+            low, low_x = value, x
+        if high is None or value > high:
+            high, high_x = value, x
+        self.min, self.min_x, self.max, self.max_x = low, low_x, high, high_x
+        self.last_x = x
+        self.last_value = value
+
+    def push(self, x: int, value: float):
+        self._before_last = (self.ewma, self.min, self.min_x, self.max, self.max_x)
+        self.count += 1
+        self.week.push(x, value)
+        self.month.push(x, value)
+        self._apply(x, value)
+
+    def replace_last(self, value: float):
+        self.week.replace_last(value)
+        self.month.replace_last(value)
+        self._apply(self.last_x, value)
+
+class UserTrends:
+    """Per-metric running statistics for one user"""
+    __slots__ = ('origin', 'metrics')
+
+    def __init__(self, origin: int):
+        # Day ordinal the windows' x values are measured from
+        self.origin = origin
+        self.metrics = {metric: MetricTrend() for metric in METRICS}
+
+    @property
+    def last_day(self) -> Optional[int]:
+        last_x = self.metrics[METRICS[0]].last_x
+        return None if last_x is None else self.origin + last_x
+
+    def add(self, day: int, stats: Dict) -> bool:
+        """Fold in a reading; False if it's older than the newest one (needs a rebuild)"""
+        last_day = self.last_day
+        if last_day is not None and day < last_day:
+            return False
+        x = day - self.origin
+        for metric in METRICS:
+            value = float(stats.get(metric, 0.0))
+            if day == last_day:
+                self.metrics[metric].replace_last(value)
+            else:
+                self.metrics[metric].push(x, value)
+        return True
+
+    def date_of(self, x: Optional[int]) -> Optional[str]:
+        return None if x is None else ordinal_to_date(self.origin + x)
+
+    def summary(self, metric: str) -> Dict:
+        trend = self.metrics[metric]
+        month_slope = trend.month.slope()
+        week_slope = trend.week.slope()
+        return {
+            'readings': trend.count,
+            'latest': trend.last_value,
+            'latest_date': self.date_of(trend.last_x),
+            'ewma': trend.ewma,
+            'avg_7d': trend.week.mean(),
+            'readings_7d': trend.week.n,
+            'avg_30d': trend.month.mean(),
+            'readings_30d': trend.month.n,
+            'weekly_rate_7d': None if week_slope is None else week_slope * 7,
+            'weekly_rate_30d': None if month_slope is None else month_slope * 7,
+            'min': trend.min,
+            'min_date': self.date_of(trend.min_x),
+            'max': trend.max,
+            'max_date': self.date_of(trend.max_x)
+        }
+
+class TrendsEngine:
+    """Keeps every user's rolling statistics current as stats are logged.
+
+    A user's statistics are built from their history on first use, then
+    updated in O(1) amortized time per logged or edited reading. A user is
+    rebuilt if their data changed some other way (their data version moved
+    without an update) or a reading arrives out of date order.
+    """
+    def __init__(self):
+        self._users = {}
+        self._versions = {}
+        self.builds = 0
+        self.updates = 0
+
+    def rebuild(self, user_id) -> Optional[UserTrends]:
+        series = get_user_series(user_id)
+        self._versions[user_id] = get_user_version(user_id)
+        if series is None or not len(series):
+            self._users.pop(user_id, None)
+            return None
+        trends = UserTrends(series.days[0])
+        columns = [getattr(series, metric) for metric in METRICS]
+        for day, *values in zip(series.days, *columns):
+            trends.add(day, dict(zip(METRICS, values)))
+        self._users[user_id] = trends
+        self.builds += 1
+        return trends
+
+    def get(self, user_id) -> Optional[UserTrends]:
+        """A user's statistics, (re)built from history only when they're missing or stale"""
+        if user_id in self._versions and self._versions[user_id] == get_user_version(user_id):
+            return self._users.get(user_id)
+        return self.rebuild(user_id)
+
+    def update_user(self, user_id, date):
+        """Fold a newly logged or edited reading into a user's statistics"""
+        trends = self._users.get(user_id)
+        if trends is None:
+            # Not built yet (or no earlier data); built on first use
+            self._versions.pop(user_id, None)
+            return
+        version = get_user_version(user_id)
+        expected = self._versions.get(user_id)
+        # Exactly this one write must have happened since the statistics were current
+        if expected is None or expected[:-1] != version[:-1] or expected[-1] + 1 != version[-1]:
+            self.rebuild(user_id)
+            return
+        stats = get_user_stats(user_id, date)
+        if stats is None or not trends.add(date_to_ordinal(date), stats):
+            self.rebuild(user_id)
+            return
+        self._versions[user_id] = version
+        self.updates += 1
+
+    def invalidate(self, user_id=None):
+        if user_id is None:
+            self._users.clear()
+            self._versions.clear()
+            return
+        self._users.pop(user_id, None)
+        self._versions.pop(user_id, None)
+
+    def stats(self):
+        return {'users': len(self._users), 'builds': self.builds, 'updates': self.updates}
+
+_trends_engine = None
+
+def get_trends_engine():
+    """Get the shared trends engine"""
+    global _trends_engine
+    if _trends_engine is None:
+        _trends_engine = TrendsEngine()
+    return _trends_engine
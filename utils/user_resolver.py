@@ -0,0 +1,97 @@
+import asyncio
+import time
+from typing import Dict, Iterable
+import config
+
+def fallback_name(user_id: str) -> str:
+    """Label used when a user's name can't be resolved"""
+    return f"User_{user_id[-4:]}"
+
+class UsernameResolver:
+    """Resolves user ids to display names with as few REST calls as possible.
+
+    Lookup order: guild member cache, the client's user cache, a TTL cache of
+    earlier fetches, and finally concurrent fetch_user calls bounded by a
+    semaphore. Anything that still fails gets the User_XXXX label.
+    """
+    def __init__(self, bot, ttl=None, concurrency=None):
+        self.bot = bot
+        self.ttl = ttl if ttl is not None else config.USERNAME_CACHE_TTL_SECONDS
+        self._semaphore = asyncio.Semaphore(concurrency or config.USERNAME_FETCH_CONCURRENCY)
+        self._cache = {}
+        self.cache_hits = 0
+        self.fetches = 0
+        self.failures = 0
+
+    def _cached(self, user_id: str):
+        entry = self._cache.get(user_id)
+        if entry is None:
+            return None
+        name, expires = entry
+        if expires < time.monotonic():
+            del self._cache[user_id]
+            return None
+        return name
+
+    def _remember(self, user_id: str, name: str):
+        self._cache[user_id] = (name, time.monotonic() + self.ttl)
+
+    def _from_discord_cache(self, user_id: str, guild):
+        if guild is not None:
+            member = guild.get_member(int(user_id))
+            if member is not None:
+                return member.name
+        user = self.bot.get_user(int(user_id))
+        if user is not None:
+            return user.name
+        return None
+
+    async def _fetch(self, user_id: str):
+        async with self._semaphore:
+            self.fetches += 1
+            try:
+                user = await self.bot.fetch_user(int(user_id))
+            except Exception:
+                self.failures += 1
+                return fallback_name(user_id)
+        self._remember(user_id, user.name)
+        return user.name
+
+    async def resolve(self, user_ids: Iterable[str], guild=None) -> Dict[str, str]:
+        """Get {user_id: name} for every id, fetching cache misses concurrently"""
+        names = {}
+        missing = []
+        for user_id in user_ids:
+            name = self._from_discord_cache(user_id, guild)
+            if name is None:
+                name = self._cached(user_id)
+                if name is not None:
+                    self.cache_hits += 1
+            if name is None:
+                missing.append(user_id)
+            else:
+                names[user_id] = name
+
+        if missing:
+            fetched = await asyncio.gather(*(self._fetch(user_id) for user_id in missing))
+            names.update(zip(missing, fetched))
+        return names
+
+    async def resolve_one(self, user_id: str, guild=None) -> str:
+        return (await self.resolve([user_id], guild))[user_id]
+
+    def stats(self):
+        return {
+            'cached': len(self._cache),
+            'cache_hits': self.cache_hits,
+            'fetches': self.fetches,
+            'failures': self.failures
+        }
+
+def get_username_resolver(bot) -> UsernameResolver:
+    """Get the resolver shared by every cog of a bot"""
+    resolver = getattr(bot, 'username_resolver', None)
+    if resolver is None:
+        resolver = UsernameResolver(bot)
+        bot.username_resolver = resolver
+    return resolver
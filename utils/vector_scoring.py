@@ -0,0 +1,69 @@
+from typing import Dict, List, Tuple
+import numpy as np
+import config
+
+METRICS = ('weight', 'body_fat', 'muscle_mass', 'bmr')
+
+def _ratio(numerator, base):
+    """numerator / base, broadcast, with 0 wherever the base isn't positive"""
+    numerator, base = np.broadcast_arrays(np.asarray(numerator, dtype=float), np.asarray(base, dtype=float))
+    return np.divide(numerator, base, out=np.zeros(numerator.shape), where=base > 0)
+
+def score_arrays(initial_stats: Dict, body_fat, muscle_mass, bmr) -> Dict[str, np.ndarray]:
+    """Vectorized version of the competition point formula.
+
+    `initial_stats` values may be scalars (one participant) or arrays that
+    broadcast against the readings (one column per participant). Like
+    UserStats.calculate_changes, a metric whose initial value isn't positive
+    scores a change of 0.
+    """
+    initial_bf = np.asarray(initial_stats['body_fat'], dtype=float)
+    initial_mm = np.asarray(initial_stats['muscle_mass'], dtype=float)
+    initial_bmr = np.asarray(initial_stats['bmr'], dtype=float)
+    bf_change = _ratio(initial_bf - body_fat, initial_bf) * 100
+    mm_change = np.where(initial_mm > 0, _ratio(muscle_mass, initial_mm) * 100 - 100, 0.0)
+    bmr_change = np.where(initial_bmr > 0, _ratio(bmr, initial_bmr) * 100 - 100, 0.0)
+
+    bf_points = bf_change * config.BF_POINTS_MULTIPLIER
+    mm_points = mm_change * config.MM_POINTS_MULTIPLIER
+    bmr_points = bmr_change * config.BMR_POINTS_MULTIPLIER
+
+    return {
+        'bf_change': bf_change,
+        'mm_change': mm_change,
+        'bmr_change': bmr_change,
+        'body_fat_points': bf_points,
+        'muscle_mass_points': mm_points,
+        'bmr_points': bmr_points,
+        'points': bf_points + mm_points + bmr_points
+    }
+
+def forward_fill(values: np.ndarray, fill: float = 0.0) -> np.ndarray:
+    """Carry the last valid value down each column; leading gaps become `fill`"""
+    if values.size == 0:
+        return values.copy()
+    valid = ~np.isnan(values)
+    rows = np.arange(values.shape[0])[:, None]
+    last_valid = np.maximum.accumulate(np.where(valid, rows, 0), axis=0)
+    filled = values[last_valid, np.arange(values.shape[1])]
+    filled[~np.maximum.accumulate(valid, axis=0)] = fill
+    return filled
+
+def align_points(progress_data: Dict) -> Tuple[List[str], List[str], np.ndarray]:
+    """Align per-participant point series on a shared, forward-filled timeline.
+
+    Returns (dates, user_ids, matrix) where matrix[i, j] is participant j's
+    points on dates[i], carrying their last value over days they didn't log.
+    """
+    user_ids = list(progress_data)
+    dates = sorted({date for user_id in user_ids for date in progress_data[user_id]['dates']})
+    row_of = {date: row for row, date in enumerate(dates)}
+
+    matrix = np.full((len(dates), len(user_ids)), np.nan)
+    for col, user_id in enumerate(user_ids):
+        series = progress_data[user_id]
+        if not series['dates']:
+            continue
+        rows = np.fromiter((row_of[date] for date in series['dates']), dtype=np.intp, count=len(series['dates']))
+        matrix[rows, col] = series['points']
+    return dates, user_ids, forward_fill(matrix)
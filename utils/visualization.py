@@ -1,19 +1,49 @@
-import matplotlib.pyplot as plt
-import pandas as pd
-import numpy as np
 import io
-import datetime
-from typing import Dict, List
+from typing import Dict
 import config
+from models.health_series import UserHealthSeries, EPOCH_ORDINAL
+from utils.downsampling import DownsampledSeries
+
+# matplotlib, pandas and numpy are imported on first render so that loading the
+# cogs (and starting the bot) doesn't pay for the plotting stack
+
+def warm_up():
+    """Import the plotting stack ahead of the first render"""
+    import matplotlib
+    matplotlib.use('Agg')
+    # Warm-up imports: loaded only so the first render doesn't pay for them
+    import matplotlib.pyplot  # noqa: F401
+    import pandas  # noqa: F401
+    import utils.vector_scoring  # noqa: F401
+    return True
 
 def create_personal_progress_graph(user_id: str, username: str, health_data: Dict, 
                                   show_weight=False, show_body_fat=False, 
                                   show_muscle_mass=False, show_bmr=False):
     """Create personal progress graphs for the user"""
-    # Convert data to pandas DataFrame
-    df = pd.DataFrame.from_dict(health_data[user_id], orient='index')
-    df.index = pd.to_datetime(df.index)
-    df = df.sort_index()
+    import matplotlib.pyplot as plt
+    import pandas as pd
+
+    history = health_data[user_id]
+    if isinstance(history, DownsampledSeries):
+        # Already reduced per metric; each metric keeps its own dates
+        note = history.note
+        points = {
+            metric: ((days - EPOCH_ORDINAL).astype('datetime64[D]'), values)
+            for metric, (days, values) in history.points.items()
+        }
+    else:
+        # Convert data to pandas DataFrame
+        note = None
+        if isinstance(history, UserHealthSeries):
+            columns = history.as_numpy()
+            dates = (columns.pop('days') - EPOCH_ORDINAL).astype('datetime64[D]')
+            df = pd.DataFrame(columns, index=pd.to_datetime(dates))
+        else:
+            df = pd.DataFrame.from_dict(history, orient='index')
+            df.index = pd.to_datetime(df.index)
+            df = df.sort_index()
+        points = {metric: (df.index, df[metric]) for metric in df.columns}
 
     # Count how many plots we need
     plots_needed = sum([show_weight, show_body_fat, show_muscle_mass, show_bmr])
@@ -30,33 +60,36 @@ def create_personal_progress_graph(user_id: str, username: str, health_data: Dic
 
     # Create individual plots
     if show_weight:
-        axs[current_plot].plot(df.index, df['weight'], config.COLOR_WEIGHT, label='Weight (lbs)')
+        axs[current_plot].plot(*points['weight'], config.COLOR_WEIGHT, label='Weight (lbs)')
         axs[current_plot].set_title('Weight Progress')
         axs[current_plot].grid(True, alpha=0.3)
         axs[current_plot].legend()
         current_plot += 1
 
     if show_body_fat:
-        axs[current_plot].plot(df.index, df['body_fat'], config.COLOR_BODY_FAT, label='Body Fat %')
+        axs[current_plot].plot(*points['body_fat'], config.COLOR_BODY_FAT, label='Body Fat %')
         axs[current_plot].set_title('Body Fat Progress')
         axs[current_plot].grid(True, alpha=0.3)
         axs[current_plot].legend()
         current_plot += 1
 
     if show_muscle_mass:
-        axs[current_plot].plot(df.index, df['muscle_mass'], config.COLOR_MUSCLE_MASS, label='Muscle Mass (lbs)')
+        axs[current_plot].plot(*points['muscle_mass'], config.COLOR_MUSCLE_MASS, label='Muscle Mass (lbs)')
         axs[current_plot].set_title('Muscle Mass Progress')
         axs[current_plot].grid(True, alpha=0.3)
         axs[current_plot].legend()
         current_plot += 1
 
     if show_bmr:
-        axs[current_plot].plot(df.index, df['bmr'], config.COLOR_BMR, label='BMR (cal)')
+        axs[current_plot].plot(*points['bmr'], config.COLOR_BMR, label='BMR (cal)')
         axs[current_plot].set_title('BMR Progress')
         axs[current_plot].grid(True, alpha=0.3)
         axs[current_plot].legend()
 
-    fig.suptitle(f'Health Progress for {username}', fontsize=16)
+    title = f'Health Progress for {username}'
+    if note:
+        title += f' ({note})'
+    fig.suptitle(title, fontsize=16)
     plt.tight_layout()
     
     # Save plot to buffer
@@ -71,41 +104,19 @@ def create_personal_progress_graph(user_id: str, username: str, health_data: Dic
 
 def create_competition_graph(comp_name: str, progress_data: Dict, user_names: Dict):
     """Create competition progress visualization"""
+    import matplotlib.pyplot as plt
+    from utils.vector_scoring import align_points
+
     plt.style.use(config.GRAPH_STYLE)
     fig, (ax1, ax2) = plt.subplots(2, 1, figsize=config.GRAPH_FIGSIZE)
     
-    # Fix for the date ordering bug:
-    # 1. Collect all unique dates across all participants
-    all_dates = set()
-    for user_id in progress_data:
-        all_dates.update(progress_data[user_id]['dates'])
-    
-    # 2. Sort all dates chronologically
-    all_dates = sorted(list(all_dates))
+    # Align every participant on one chronologically sorted timeline,
+    # carrying their last points over days they didn't log
+    all_dates, user_ids, aligned_points = align_points(progress_data)
     
     # Plot total points progression with properly ordered dates
-    for user_id in progress_data:
-        # Create a complete timeline with all dates
-        complete_dates = all_dates.copy()
-        complete_points = []
-        
-        # For each date in the complete timeline, find the corresponding point value
-        # or use None for dates where this user has no data
-        last_valid_point = 0  # Use last valid point for missing data
-        
-        for date in complete_dates:
-            if date in progress_data[user_id]['dates']:
-                idx = progress_data[user_id]['dates'].index(date)
-                point = progress_data[user_id]['points'][idx]
-                last_valid_point = point
-                complete_points.append(point)
-            else:
-                # If user doesn't have data for this date, use last valid point
-                # This ensures the line doesn't drop to zero for missing dates
-                complete_points.append(last_valid_point)
-        
-        # Plot the complete timeline
-        ax1.plot(complete_dates, complete_points, marker='o', label=user_names[user_id])
+    for col, user_id in enumerate(user_ids):
+        ax1.plot(all_dates, aligned_points[:, col], marker='o', label=user_names[user_id])
     
     ax1.set_title('Total Points Progress')
     ax1.set_xlabel('Date')
@@ -158,4 +169,12 @@ def create_competition_graph(comp_name: str, progress_data: Dict, user_names: Di
     buf.seek(0)
     plt.close()
     
-    return buf
\ No newline at end of file
+    return buf
+
+def render_personal_progress_png(*args, **kwargs) -> bytes:
+    """Render a personal progress graph to PNG bytes (process pool entry point)"""
+    return create_personal_progress_graph(*args, **kwargs).getvalue()
+
+def render_competition_png(*args, **kwargs) -> bytes:
+    """Render a competition graph to PNG bytes (process pool entry point)"""
+    return create_competition_graph(*args, **kwargs).getvalue()